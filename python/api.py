@@ -0,0 +1,259 @@
+import hmac
+import json
+import os
+import queue
+import re
+import threading
+
+from flask import Flask, Response, abort, jsonify, request, send_from_directory, stream_with_context
+from flask_cors import CORS
+
+import config
+from auth import verify_token
+from database import get_job_reels, get_processing_trace, get_reel_path, record_processing
+from ingest import UrlIngest
+from metrics import REGISTRY
+from progress import get_job, register_job
+from thumbnails import SPRITE_NAME, VTT_NAME, thumbnail_dir, thumbnail_strip, url_key
+from zip_stream import stream_zip
+
+app = Flask(__name__)
+CORS(app)
+
+_server_thread = None
+_server_lock = threading.Lock()
+_processor = None
+_processor_lock = threading.Lock()
+
+
+def _require_secret():
+    """Reject server-to-server calls that do not carry config.API_SECRET as a bearer token."""
+    header = request.headers.get("Authorization", "")
+    if not config.API_SECRET:
+        abort(403)
+    if not hmac.compare_digest(header.encode(), f"Bearer {config.API_SECRET}".encode()):
+        abort(401)
+
+
+def _require_user() -> str:
+    """User of the signed token (auth.issue_token) in the ``token`` parameter or a bearer header."""
+    token = request.args.get("token", "")
+    header = request.headers.get("Authorization", "")
+    if not token and header.startswith("Bearer "):
+        token = header[len("Bearer "):]
+    user_id = verify_token(token) if token else None
+    if user_id is None:
+        abort(401)
+    return user_id
+
+
+def _get_processor():
+    """One VideoProcessor per process, loaded on the first submitted job."""
+    global _processor
+    with _processor_lock:
+        if _processor is None:
+            from video_processor import VideoProcessor
+            _processor = VideoProcessor()
+        return _processor
+
+
+def _run_url_job(job_id: str, url: str, options: dict):
+    """
+    Download ``url`` and turn it into reels under the caller's job id: the
+    audio first, then the video in the background while it is transcribed.
+    """
+    from workspace import JobWorkspace
+
+    job = get_job(job_id)
+    try:
+        with JobWorkspace(job_id) as workspace:
+            job.update('download', 0, "Downloading audio...")
+            ingest = UrlIngest(url, str(workspace.disk_dir))
+            ingest.start()
+            result = _get_processor().process_video(ingest.video_path, workspace=workspace, job_id=job_id,
+                                                    ingest=ingest, **options)
+        if result.get('busy'):
+            job.finish('failed', result['error'])
+            return
+        if result.get('cancelled'):
+            status = 'cancelled'
+        else:
+            status = 'completed' if result['success'] else 'failed'
+        record_processing(url, status, result.get('reel_details', []), user_id=job.owner,
+                          trace=result.get('trace'), source_path=url, db_path=config.DATABASE_PATH)
+    except Exception as e:
+        print(f"Job {job_id} failed: {e}")
+    finally:
+        if not job.finished:
+            job.finish('cancelled' if job.cancelled else 'failed', "Interrupted")
+
+
+@app.route("/metrics")
+def metrics():
+    """Prometheus scrape endpoint for the pipeline counters and histograms."""
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/api/processing/<int:processing_id>/trace")
+def processing_trace(processing_id: int):
+    """Span tree stored with one of the caller's processing_history rows."""
+    trace = get_processing_trace(processing_id, _require_user(), db_path=config.DATABASE_PATH)
+    if trace is None:
+        abort(404)
+    return jsonify(trace)
+
+
+@app.route("/api/jobs/<job_id>/progress")
+def job_progress(job_id: str):
+    """Current stage and percentage of a running or recently finished job."""
+    job = get_job(job_id)
+    if job is None:
+        abort(404)
+    return jsonify(job.snapshot())
+
+
+@app.route("/api/jobs/<job_id>/events")
+def job_events(job_id: str):
+    """Server-sent event stream of progress snapshots until the job finishes."""
+    job = get_job(job_id)
+    if job is None:
+        abort(404)
+
+    updates: "queue.Queue[dict]" = queue.Queue()
+
+    def generate():
+        job.add_listener(updates.put)
+        try:
+            snapshot = job.snapshot()
+            while True:
+                yield f"data: {json.dumps(snapshot)}\n\n"
+                if snapshot['finished']:
+                    return
+                try:
+                    snapshot = updates.get(timeout=15)
+                except queue.Empty:
+                    snapshot = job.snapshot()
+        finally:
+            job.remove_listener(updates.put)
+
+    return Response(stream_with_context(generate()), mimetype="text/event-stream",
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route("/api/jobs/<job_id>/cancel", methods=["POST"])
+def job_cancel(job_id: str):
+    """Cancel one of the caller's jobs: kills its ffmpeg processes and stops transcription at the next window."""
+    user_id = _require_user()
+    job = get_job(job_id)
+    if job is None or job.owner is None or job.owner != user_id:
+        abort(404)
+    job.cancel()
+    return jsonify({'video_id': job_id, 'cancelled': True})
+
+
+@app.route("/api/jobs/<job_id>/process", methods=["POST"])
+def job_process(job_id: str):
+    """
+    Start processing a video URL under the caller's job id, so progress and
+    cancel calls made with that id (the frontend's video id) reach it.
+    Called by the upload backend with config.API_SECRET, never by browsers;
+    ``user_id`` in the body is the user allowed to cancel the job.
+    """
+    _require_secret()
+    body = request.get_json(silent=True) or {}
+    url = body.get('url')
+    if not url:
+        abort(400)
+    existing = get_job(job_id)
+    if existing is not None and not existing.finished:
+        abort(409)
+    options = {key: body[key] for key in ('reel_count', 'reel_duration', 'captions') if key in body}
+    owner = body.get('user_id')
+    register_job(job_id, owner=str(owner) if owner is not None else None)
+    threading.Thread(target=_run_url_job, args=(job_id, url, options), daemon=True).start()
+    return jsonify({'video_id': job_id, 'started': True}), 202
+
+
+@app.route("/api/reels/<int:reel_id>/thumbnails")
+def reel_thumbnails(reel_id: int):
+    """URLs of one of the caller's reels' keyframe sprite sheet and WebVTT index, built on first request."""
+    reel_path = get_reel_path(reel_id, _require_user(), db_path=config.DATABASE_PATH)
+    if reel_path is None or not os.path.exists(reel_path):
+        abort(404)
+    strip = thumbnail_strip(reel_path)
+    if strip is None:
+        abort(500)
+    return jsonify({
+        'sprite_url': f"/api/thumbnails/{strip['key']}/{SPRITE_NAME}",
+        'vtt_url': f"/api/thumbnails/{strip['key']}/{VTT_NAME}"
+    })
+
+
+@app.route("/api/thumbnails")
+def url_thumbnails():
+    """
+    Like reel_thumbnails, for a reel stored elsewhere (the frontend's Supabase
+    reels) and named by its public ``url``. Only URLs under
+    config.THUMBNAIL_URL_PREFIXES are fetched.
+    """
+    url = request.args.get("url", "")
+    if not any(url.startswith(prefix) for prefix in config.THUMBNAIL_URL_PREFIXES):
+        abort(403)
+    strip = thumbnail_strip(url, key=url_key(url))
+    if strip is None:
+        abort(404)
+    return jsonify({
+        'sprite_url': f"/api/thumbnails/{strip['key']}/{SPRITE_NAME}",
+        'vtt_url': f"/api/thumbnails/{strip['key']}/{VTT_NAME}"
+    })
+
+
+@app.route("/api/thumbnails/<key>/<filename>")
+def thumbnail_file(key: str, filename: str):
+    """Cached sprite sheet or WebVTT index. Keys are content hashes, so responses never change."""
+    if filename not in (SPRITE_NAME, VTT_NAME) or not re.fullmatch(r"[0-9a-f]+", key):
+        abort(404)
+    mimetype = "text/vtt" if filename == VTT_NAME else "image/jpeg"
+    return send_from_directory(os.path.abspath(thumbnail_dir(key)), filename, mimetype=mimetype,
+                               max_age=365 * 24 * 60 * 60)
+
+
+@app.route("/api/reels/archive")
+def reels_archive():
+    """
+    Every reel of the caller's jobs named by the repeated ``processing_id``
+    query parameter as one ZIP, stored and streamed with chunked transfer
+    while it is built, one folder per job.
+    """
+    user_id = _require_user()
+    processing_ids = request.args.getlist("processing_id", type=int)
+    entries = []
+    for processing_id, original_filename, reel_path in get_job_reels(processing_ids, user_id,
+                                                                     db_path=config.DATABASE_PATH):
+        if reel_path and os.path.exists(reel_path):
+            folder = f"{processing_id}_{os.path.splitext(os.path.basename(original_filename))[0]}"
+            entries.append((reel_path, f"{folder}/{os.path.basename(reel_path)}"))
+    if not entries:
+        abort(404)
+    name = f"reels_{processing_ids[0]}.zip" if len(processing_ids) == 1 else "reels.zip"
+    return Response(stream_with_context(stream_zip(entries)), mimetype="application/zip",
+                    headers={'Content-Disposition': f'attachment; filename="{name}"',
+                             'X-Accel-Buffering': 'no'})
+
+
+def start_in_background(port: int = config.API_PORT):
+    """Serve the API from a daemon thread, once per process."""
+    global _server_thread
+    with _server_lock:
+        if _server_thread is not None or not port:
+            return
+        _server_thread = threading.Thread(
+            target=app.run,
+            kwargs={'host': config.API_HOST, 'port': port, 'use_reloader': False},
+            daemon=True
+        )
+        _server_thread.start()
+
+
+if __name__ == "__main__":
+    app.run(host=config.API_HOST, port=config.API_PORT)
@@ -1,39 +1,25 @@
 import streamlit as st
 import os
 from pathlib import Path
+import shutil
 import tempfile
-import warnings
 
 # ✅ Add FFmpeg directory to system PATH
-os.environ["PATH"] += os.pathsep + r"C:\Users\DIVYA SRI\Reelify\ffmpeg\bin"
-
-from video_processor import VideoProcessor
-from auth import AuthManager
-from database import init_database
+if r"C:\Users\DIVYA SRI\Reelify\ffmpeg\bin" not in os.environ["PATH"]:
+    os.environ["PATH"] += os.pathsep + r"C:\Users\DIVYA SRI\Reelify\ffmpeg\bin"
+
+import config
+from auth import AuthManager, issue_token
+from database import init_database, record_processing
+from workspace import JobWorkspace, cleanup_stale_workspaces
+from progress import cancel_job, register_job
+from thumbnails import thumbnail_strip
 from dotenv import load_dotenv
 
-warnings.filterwarnings("ignore", message="FP16 is not supported on CPU; using FP32 instead")
-
 # Load environment variables
 load_dotenv()
 api_key = os.getenv("OPENAI_API_KEY")
 
-import whisper
-model = whisper.load_model("base")
-
-# Initialize database
-init_database()
-
-# Flask app setup (optional, for API)
-from flask import Flask
-from flask_cors import CORS
-app = Flask(__name__)
-CORS(app)
-
-# Initialize components
-auth_manager = AuthManager()
-video_processor = VideoProcessor()
-
 # Page configuration
 st.set_page_config(
     page_title="Video to Reels Converter",
@@ -41,6 +27,66 @@ st.set_page_config(
     layout="wide"
 )
 
+# Streamlit re-executes this script on every interaction. Everything expensive
+# is created once per process through st.cache_resource and shared by all
+# reruns and sessions; torch/whisper are only imported when a video is processed.
+
+@st.cache_resource(show_spinner=False)
+def init_services():
+    # Initialize database
+    init_database()
+
+    # Sweep scratch space left behind by crashed runs
+    cleanup_stale_workspaces()
+
+    # Flask app setup (optional, for API and /metrics)
+    from api import start_in_background
+    start_in_background()
+    return True
+
+@st.cache_resource(show_spinner=False)
+def get_auth_manager() -> AuthManager:
+    return AuthManager()
+
+@st.cache_resource(show_spinner="Loading speech recognition model...")
+def get_video_processor():
+    from video_processor import VideoProcessor
+    return VideoProcessor()
+
+def show_thumbnails(video_path, caption=None):
+    """Keyframe sprite sheet of a video instead of embedding the whole file"""
+    strip = thumbnail_strip(video_path)
+    if strip is not None:
+        st.image(strip['sprite'], caption=caption)
+    else:
+        st.video(video_path)
+
+def show_upload_thumbnails(uploaded_file):
+    """Sprite of an upload, built once per file and kept in the session"""
+    key = (uploaded_file.name, uploaded_file.size)
+    if st.session_state.get('upload_preview_key') != key:
+        with tempfile.NamedTemporaryFile(suffix=Path(uploaded_file.name).suffix, delete=False) as tmp:
+            uploaded_file.seek(0)
+            shutil.copyfileobj(uploaded_file, tmp)
+        try:
+            st.session_state.upload_preview = thumbnail_strip(tmp.name)
+        finally:
+            os.unlink(tmp.name)
+        st.session_state.upload_preview_key = key
+    if st.session_state.upload_preview is not None:
+        st.image(st.session_state.upload_preview['sprite'], caption="Keyframes")
+    else:
+        st.video(uploaded_file)
+
+def archive_url(processing_ids, user_id):
+    """Streaming ZIP of the user's reels of these processing runs, served by api.py"""
+    base = config.API_PUBLIC_URL or f"http://{config.API_HOST}:{config.API_PORT}"
+    query = "&".join(f"processing_id={processing_id}" for processing_id in processing_ids)
+    return f"{base.rstrip('/')}/api/reels/archive?{query}&token={issue_token(user_id)}"
+
+init_services()
+auth_manager = get_auth_manager()
+
 def main():
     st.title("🎬 Video to Reels Converter")
     st.markdown("Transform your videos into engaging 30-second reels using AI")
@@ -111,6 +157,13 @@ def show_main_app():
         st.markdown("3. Important segments are identified")
         st.markdown("4. 30-second reels are generated")
 
+        export_ids = st.session_state.get('export_ids', [])
+        user_info = auth_manager.get_user_info(st.session_state.username)
+        if export_ids and config.API_PORT and user_info:
+            st.markdown("---")
+            st.link_button(f"Download all reels ({len(export_ids)} job(s), ZIP)",
+                           archive_url(export_ids, user_info['id']))
+
     # Main content
     st.subheader("Upload Video for Reel Generation")
 
@@ -121,7 +174,7 @@ def show_main_app():
     )
 
     if uploaded_file is not None:
-        st.video(uploaded_file)
+        show_upload_thumbnails(uploaded_file)
 
         col1, col2 = st.columns([1, 1])
         with col1:
@@ -131,29 +184,86 @@ def show_main_app():
         with col2:
             reel_count = st.number_input("Number of reels to generate", min_value=1, max_value=5, value=2)
             reel_duration = st.number_input("Reel duration (seconds)", min_value=15, max_value=60, value=30)
+            caption_choice = st.selectbox("Captions", ["None", "Burned in", "Subtitle track"])
+
+        # Clicking Cancel reruns the script, which interrupts the running job;
+        # cancel_job() additionally kills its ffmpeg children right away
+        if st.session_state.get("cancel_processing") and st.session_state.get("active_job_id"):
+            cancel_job(st.session_state.active_job_id)
+            st.session_state.active_job_id = None
+            st.warning("Processing cancelled.")
 
         if st.button("Generate Reels", type="primary"):
-            with st.spinner("Processing video... This may take a few minutes."):
+            with st.container():
                 try:
-                    # Save uploaded file temporarily
-                    with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp_file:
-                        tmp_file.write(uploaded_file.read())
-                        temp_path = tmp_file.name
-
-                    # Process video
-                    result = video_processor.process_video(
-                        temp_path,
-                        reel_count=reel_count,
-                        reel_duration=reel_duration
+                    with JobWorkspace() as workspace:
+                        st.session_state.active_job_id = workspace.job_id
+                        st.button("Cancel", key="cancel_processing")
+                        progress_bar = st.progress(0, text="Uploading...")
+
+                        def show_progress(snapshot):
+                            progress_bar.progress(snapshot['progress'], text=snapshot['message'] or snapshot['stage'])
+
+                        # Owned by the user, so their API token may cancel it too
+                        job = register_job(workspace.job_id, owner=str(user_info['id']) if user_info else None)
+                        job.add_listener(show_progress)
+                        try:
+                            # Save uploaded file into the job workspace
+                            temp_path = workspace.path(f"upload{Path(uploaded_file.name).suffix or '.mp4'}")
+                            with open(temp_path, 'wb') as tmp_file:
+                                uploaded_file.seek(0)
+                                shutil.copyfileobj(uploaded_file, tmp_file)
+
+                            # Process video
+                            result = get_video_processor().process_video(
+                                temp_path,
+                                reel_count=reel_count,
+                                reel_duration=reel_duration,
+                                workspace=workspace,
+                                user=st.session_state.username,
+                                captions={'Burned in': 'burn', 'Subtitle track': 'soft'}.get(caption_choice, '')
+                            )
+                        except BaseException:
+                            # Clicking Cancel reruns the script by raising RerunException, which is
+                            # not an Exception; close the job so it never lingers as running
+                            if not job.finished:
+                                job.finish('cancelled', "Interrupted")
+                            raise
+                        finally:
+                            job.remove_listener(show_progress)
+                        if not job.finished:
+                            # Refused at admission before the pipeline took the job over
+                            job.finish('failed', result.get('error', ''))
+                        st.session_state.active_job_id = None
+
+                    if result.get('busy'):
+                        # Refused at admission, nothing was processed
+                        st.warning(result['error'])
+                        return
+
+                    if result.get('cancelled'):
+                        status = 'cancelled'
+                    else:
+                        status = 'completed' if result['success'] else 'failed'
+                    user_info = auth_manager.get_user_info(st.session_state.username)
+                    processing_id = record_processing(
+                        uploaded_file.name,
+                        status,
+                        result.get('reel_details'),
+                        user_id=user_info['id'] if user_info else None,
+                        trace=result.get('trace')
                     )
 
                     if result['success']:
                         st.success("Reels generated successfully!")
                         st.subheader("Generated Reels")
+                        st.session_state.setdefault('export_ids', []).append(processing_id)
+                        if config.API_PORT and user_info:
+                            st.link_button("Download all reels (ZIP)", archive_url([processing_id], user_info['id']))
 
                         for i, reel_path in enumerate(result['reels']):
                             st.write(f"**Reel {i+1}**")
-                            st.video(reel_path)
+                            show_thumbnails(reel_path)
                             with open(reel_path, 'rb') as f:
                                 st.download_button(
                                     label=f"Download Reel {i+1}",
@@ -172,8 +282,6 @@ def show_main_app():
                     else:
                         st.error(f"Error processing video: {result['error']}")
 
-                    os.unlink(temp_path)
-
                 except Exception as e:
                     st.error(f"An error occurred: {str(e)}")
 
@@ -0,0 +1,113 @@
+from typing import Dict, List
+
+import numpy as np
+
+from transcription import SAMPLE_RATE, PcmReader
+
+FRAME_SIZE = 512  # 32 ms analysis window
+HOP = 256  # 16 ms between frames
+FRAME_RATE = SAMPLE_RATE / HOP
+ONSET_CONTEXT_SECONDS = 0.5  # flux is compared against its local mean over this span
+
+# Weights of the z-scored columns in the combined audio_score
+SCORE_WEIGHTS = {'loudness_z': 0.5, 'flux_z': 0.3, 'onset_z': 0.2}
+
+
+def frame_features(audio_path: str, block_seconds: float = 60.0) -> Dict[str, np.ndarray]:
+    """
+    Short-time RMS and spectral flux of 16 kHz PCM, one value per HOP.
+
+    Each block of audio is framed with a strided view (no copies) and
+    transformed with one batched rfft, so the whole pass is a handful of
+    array operations per minute of audio. Memory is bounded by the block.
+    """
+    window = np.hanning(FRAME_SIZE).astype(np.float32)
+    block_frames = int(block_seconds * FRAME_RATE)
+    rms_blocks, flux_blocks = [], []
+    previous = None
+
+    with PcmReader(audio_path) as audio:
+        total_frames = max(0, (len(audio) - FRAME_SIZE) // HOP + 1)
+        for first in range(0, total_frames, block_frames):
+            count = min(block_frames, total_frames - first)
+            pcm = audio.read(first * HOP, (first + count - 1) * HOP + FRAME_SIZE)
+            frames = np.lib.stride_tricks.sliding_window_view(pcm, FRAME_SIZE)[::HOP][:count]
+
+            rms_blocks.append(np.sqrt(np.mean(frames ** 2, axis=1)))
+            magnitude = np.log1p(np.abs(np.fft.rfft(frames * window, axis=1)))
+            # Flux across block boundaries continues from the previous block's last frame
+            reference = magnitude[:1] if previous is None else previous[None, :]
+            rising = np.diff(magnitude, axis=0, prepend=reference)
+            flux_blocks.append(np.maximum(rising, 0.0).sum(axis=1))
+            previous = magnitude[-1]
+
+    if not rms_blocks:
+        empty = np.zeros(0, dtype=np.float32)
+        return {'rms': empty, 'flux': empty}
+    return {'rms': np.concatenate(rms_blocks), 'flux': np.concatenate(flux_blocks)}
+
+
+def detect_onsets(flux: np.ndarray) -> np.ndarray:
+    """Boolean mask of frames where flux peaks clearly above its local mean."""
+    if len(flux) < 3:
+        return np.zeros(len(flux), dtype=bool)
+    width = max(3, int(ONSET_CONTEXT_SECONDS * FRAME_RATE) | 1)
+    padded = np.pad(flux, width // 2, mode='edge')
+    cumulative = np.concatenate(([0.0], np.cumsum(padded)))
+    local_mean = (cumulative[width:] - cumulative[:-width]) / width
+
+    peak = np.zeros(len(flux), dtype=bool)
+    peak[1:-1] = (flux[1:-1] >= flux[:-2]) & (flux[1:-1] > flux[2:])
+    return peak & (flux > local_mean + flux.std())
+
+
+def _zscore(values: np.ndarray, reference: np.ndarray) -> np.ndarray:
+    return (values - np.median(reference)) / (reference.std() + 1e-6)
+
+
+def segment_features(audio_path: str, segments: List[Dict]) -> List[Dict[str, float]]:
+    """
+    Aggregate frame features over each Whisper segment.
+
+    Returns one dict per segment with ``loudness_z`` and ``flux_z`` (segment
+    mean against the whole file's frames), ``onsets_per_sec`` and ``onset_z``,
+    and the weighted ``audio_score``. Applause, laughter and raised voices
+    push all of them up.
+    """
+    if not segments:
+        return []
+    features = frame_features(audio_path)
+    loudness = 20 * np.log10(features['rms'] + 1e-8)
+    flux = features['flux']
+    onsets = detect_onsets(flux).astype(np.float64)
+    if len(loudness) == 0:
+        return [{'loudness_z': 0.0, 'flux_z': 0.0, 'onsets_per_sec': 0.0, 'onset_z': 0.0, 'audio_score': 0.0}
+                for _ in segments]
+
+    # Per-segment means from prefix sums: O(frames + segments), no Python loop over frames
+    starts = np.clip((np.array([s['start'] for s in segments]) * FRAME_RATE).astype(int), 0, len(loudness) - 1)
+    ends = np.clip(np.ceil(np.array([s['end'] for s in segments]) * FRAME_RATE).astype(int), starts + 1, len(loudness))
+    lengths = ends - starts
+
+    def segment_mean(values: np.ndarray) -> np.ndarray:
+        cumulative = np.concatenate(([0.0], np.cumsum(values, dtype=np.float64)))
+        return (cumulative[ends] - cumulative[starts]) / lengths
+
+    loudness_z = _zscore(segment_mean(loudness), loudness)
+    flux_z = _zscore(segment_mean(flux), flux)
+    onsets_per_sec = segment_mean(onsets) * FRAME_RATE
+    onset_z = (onsets_per_sec - onsets_per_sec.mean()) / (onsets_per_sec.std() + 1e-6)
+
+    columns = {'loudness_z': loudness_z, 'flux_z': flux_z, 'onset_z': onset_z}
+    audio_score = sum(weight * columns[name] for name, weight in SCORE_WEIGHTS.items())
+
+    return [
+        {
+            'loudness_z': round(float(loudness_z[i]), 2),
+            'flux_z': round(float(flux_z[i]), 2),
+            'onsets_per_sec': round(float(onsets_per_sec[i]), 2),
+            'onset_z': round(float(onset_z[i]), 2),
+            'audio_score': round(float(audio_score[i]), 2)
+        }
+        for i in range(len(segments))
+    ]
@@ -1,7 +1,65 @@
 import sqlite3
+import base64
+import binascii
 import hashlib
+import hmac
+import json
 import os
-from typing import Optional
+import secrets
+import time
+from typing import Optional, Union
+
+import config
+from database import connection
+
+# Signs API tokens when no API_SECRET is configured; only the API served by this
+# process (api.start_in_background) can then verify them
+_process_secret = secrets.token_hex(32)
+
+def _sign(payload: str) -> str:
+    key = (config.API_SECRET or _process_secret).encode()
+    return hmac.new(key, payload.encode(), hashlib.sha256).hexdigest()
+
+def issue_token(user_id: Union[int, str], ttl: Optional[int] = None) -> str:
+    """Signed, expiring token naming a user, for links into api.py"""
+    expires = int(time.time()) + (config.API_TOKEN_TTL if ttl is None else ttl)
+    payload = f"{user_id}.{expires}"
+    return f"{payload}.{_sign(payload)}"
+
+def _b64url_decode(part: str) -> bytes:
+    return base64.urlsafe_b64decode(part + "=" * (-len(part) % 4))
+
+def _verify_supabase_jwt(token: str) -> Optional[str]:
+    """``sub`` of an unexpired HS256 Supabase session token, checked with SUPABASE_JWT_SECRET"""
+    if not config.SUPABASE_JWT_SECRET:
+        return None
+    try:
+        header, payload, signature = token.split(".")
+        if json.loads(_b64url_decode(header)).get("alg") != "HS256":
+            return None
+        expected = hmac.new(config.SUPABASE_JWT_SECRET.encode(), f"{header}.{payload}".encode(),
+                            hashlib.sha256).digest()
+        if not hmac.compare_digest(expected, _b64url_decode(signature)):
+            return None
+        claims = json.loads(_b64url_decode(payload))
+        if claims.get("exp", 0) < time.time() or not claims.get("sub"):
+            return None
+        return str(claims["sub"])
+    except (ValueError, binascii.Error, AttributeError):
+        return None
+
+def verify_token(token: str) -> Optional[str]:
+    """
+    User id of a valid, unexpired token from issue_token, or of the React
+    frontend's Supabase session token when SUPABASE_JWT_SECRET is set, else None
+    """
+    try:
+        user_id, expires, signature = token.split(".")
+        if hmac.compare_digest(signature, _sign(f"{user_id}.{expires}")):
+            return user_id if int(expires) >= time.time() else None
+    except ValueError:
+        pass
+    return _verify_supabase_jwt(token)
 
 class AuthManager:
     def __init__(self, db_path: str = "users.db"):
@@ -10,10 +68,10 @@ class AuthManager:
     
     def init_db(self):
         """Initialize the user database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        with connection(self.db_path) as conn:
+            cursor = conn.cursor()
+
+            cursor.execute('''
             CREATE TABLE IF NOT EXISTS users (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 username TEXT UNIQUE NOT NULL,
@@ -22,9 +80,6 @@ class AuthManager:
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
-        
-        conn.commit()
-        conn.close()
     
     def hash_password(self, password: str) -> str:
         """Hash password using SHA-256"""
@@ -33,18 +88,14 @@ class AuthManager:
     def register_user(self, username: str, password: str, email: str = "") -> bool:
         """Register a new user"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             password_hash = self.hash_password(password)
-            
-            cursor.execute(
-                "INSERT INTO users (username, password_hash, email) VALUES (?, ?, ?)",
-                (username, password_hash, email)
-            )
-            
-            conn.commit()
-            conn.close()
+
+            with connection(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "INSERT INTO users (username, password_hash, email) VALUES (?, ?, ?)",
+                    (username, password_hash, email)
+                )
             return True
             
         except sqlite3.IntegrityError:
@@ -56,18 +107,15 @@ class AuthManager:
     def authenticate_user(self, username: str, password: str) -> bool:
         """Authenticate user login"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             password_hash = self.hash_password(password)
-            
-            cursor.execute(
-                "SELECT id FROM users WHERE username = ? AND password_hash = ?",
-                (username, password_hash)
-            )
-            
-            result = cursor.fetchone()
-            conn.close()
+
+            with connection(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT id FROM users WHERE username = ? AND password_hash = ?",
+                    (username, password_hash)
+                )
+                result = cursor.fetchone()
             
             return result is not None
             
@@ -78,16 +126,13 @@ class AuthManager:
     def get_user_info(self, username: str) -> Optional[dict]:
         """Get user information"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                "SELECT id, username, email, created_at FROM users WHERE username = ?",
-                (username,)
-            )
-            
-            result = cursor.fetchone()
-            conn.close()
+            with connection(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT id, username, email, created_at FROM users WHERE username = ?",
+                    (username,)
+                )
+                result = cursor.fetchone()
             
             if result:
                 return {
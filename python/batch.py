@@ -0,0 +1,190 @@
+import contextlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, CPU seconds are not reported
+    resource = None
+
+import config
+from database import completed_sources, init_database, record_processing
+from workspace import cleanup_stale_workspaces
+
+# Scheduler user of batch jobs; they wait for admission rather than count
+# against the per-user limit meant for interactive uploads
+BATCH_USER = "batch"
+
+# One VideoProcessor (and Whisper model) per pool worker, created lazily
+_processor = None
+
+
+def collect_inputs(source: str, recursive: bool = False) -> List[Dict[str, Any]]:
+    """
+    Build the work list from a directory of videos or a manifest file.
+
+    A manifest is either plain text with one path per line, or JSON lines with
+    a ``path`` key and optional ``reel_count`` / ``reel_duration`` overrides.
+    Relative paths in a manifest are resolved against the manifest's folder.
+    """
+    source_path = Path(source)
+    items = []
+
+    if source_path.is_dir():
+        pattern = "**/*" if recursive else "*"
+        for path in sorted(source_path.glob(pattern)):
+            if path.is_file() and path.suffix.lower() in config.ALLOWED_VIDEO_EXTENSIONS:
+                items.append({'path': str(path.resolve())})
+        return items
+
+    base = source_path.parent
+    with open(source_path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            item = json.loads(line) if line.startswith("{") else {'path': line}
+            item['path'] = str((base / item['path']).resolve())
+            items.append(item)
+    return items
+
+
+def _init_worker(torch_threads: int):
+    # stdout carries the JSON progress stream, keep worker chatter off it
+    sys.stdout = sys.stderr
+
+    # Split the cores between workers instead of letting every torch runtime
+    # grab all of them; picked up by whisper_backend when the model loads
+    config.WHISPER_THREADS = torch_threads
+
+
+def _cpu_time() -> Optional[float]:
+    """User plus system seconds of this worker and its ffmpeg children, or None without getrusage."""
+    if resource is None:
+        return None
+    return sum(usage.ru_utime + usage.ru_stime
+               for usage in (resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)))
+
+
+def _process_one(item: Dict[str, Any], reel_count: int, reel_duration: int,
+                 submitted_at: float, db_path: str) -> Dict[str, Any]:
+    global _processor
+    from video_processor import VideoProcessor, probe_duration
+
+    if _processor is None:
+        _processor = VideoProcessor()
+
+    cpu_before = _cpu_time()
+    started = time.time()
+
+    result = _processor.process_video(
+        item['path'],
+        reel_count=item.get('reel_count', reel_count),
+        reel_duration=item.get('reel_duration', reel_duration),
+        submitted_at=submitted_at,
+        db_path=db_path,
+        user=BATCH_USER,
+        headless=True
+    )
+
+    cpu_after = _cpu_time()
+    cpu_seconds = cpu_after - cpu_before if cpu_before is not None else None
+
+    return {
+        'path': item['path'],
+        'success': result['success'],
+        'error': result.get('error'),
+        'reels': result.get('reel_details', []),
+        'trace': result.get('trace'),
+        'wall_seconds': time.time() - started,
+        'cpu_seconds': cpu_seconds,
+        'audio_seconds': probe_duration(item['path'])
+    }
+
+
+def _emit(event: Dict[str, Any], stream=None):
+    stream = stream or sys.stdout
+    stream.write(json.dumps(event) + "\n")
+    stream.flush()
+
+
+def run_batch(source: str, jobs: Optional[int] = None, reel_count: int = 2, reel_duration: int = 30,
+              recursive: bool = False, db_path: str = config.DATABASE_PATH,
+              user_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Process every video in ``source`` across a process pool.
+
+    Videos already recorded as completed in the database are skipped, so an
+    interrupted batch can simply be started again. Progress is written to
+    stdout as JSON lines, followed by a throughput summary.
+    """
+    with contextlib.redirect_stdout(sys.stderr):
+        init_database(db_path)
+    cleanup_stale_workspaces()
+
+    jobs = jobs or config.BATCH_JOBS or max(1, (os.cpu_count() or 1) // 2)
+    torch_threads = max(1, (os.cpu_count() or 1) // jobs)
+
+    items = collect_inputs(source, recursive=recursive)
+    done = completed_sources(db_path)
+    pending = [item for item in items if item['path'] not in done]
+    _emit({'event': 'batch_start', 'total': len(items), 'skipped': len(items) - len(pending), 'jobs': jobs})
+
+    started = time.time()
+    succeeded = failed = 0
+    audio_seconds = cpu_seconds = 0.0
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(torch_threads,)) as pool:
+        futures = {
+            pool.submit(_process_one, item, reel_count, reel_duration, time.time(), db_path): item
+            for item in pending
+        }
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                outcome = future.result()
+            except Exception as e:
+                outcome = {'path': item['path'], 'success': False, 'error': str(e), 'reels': [], 'trace': None,
+                           'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'audio_seconds': 0.0}
+
+            status = 'completed' if outcome['success'] else 'failed'
+            record_processing(os.path.basename(outcome['path']), status, outcome['reels'], user_id=user_id,
+                              trace=outcome['trace'], source_path=outcome['path'], db_path=db_path)
+
+            if outcome['success']:
+                succeeded += 1
+                audio_seconds += outcome['audio_seconds']
+                cpu_seconds += outcome['cpu_seconds'] or 0.0
+            else:
+                failed += 1
+
+            _emit({
+                'event': 'video_done',
+                'path': outcome['path'],
+                'status': status,
+                'error': outcome['error'],
+                'reels': [reel['reel_path'] for reel in outcome['reels']],
+                'wall_seconds': round(outcome['wall_seconds'], 3),
+                'cpu_seconds': round(outcome['cpu_seconds'], 3) if outcome['cpu_seconds'] is not None else None,
+                'audio_seconds': round(outcome['audio_seconds'], 3),
+                'completed': succeeded + failed,
+                'remaining': len(pending) - succeeded - failed
+            })
+
+    wall = time.time() - started
+    summary = {
+        'event': 'batch_summary',
+        'succeeded': succeeded,
+        'failed': failed,
+        'skipped': len(items) - len(pending),
+        'wall_seconds': round(wall, 3),
+        'videos_per_hour': round(succeeded / wall * 3600, 2) if wall > 0 else 0.0,
+        'audio_seconds_per_cpu_second': round(audio_seconds / cpu_seconds, 3) if cpu_seconds > 0 else 0.0
+    }
+    _emit(summary)
+    return summary
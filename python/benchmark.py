@@ -0,0 +1,191 @@
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import config
+
+BENCH_DIR = config.TEMP_DIR / "bench"
+DEFAULT_DURATIONS = [10, 60]
+DEFAULT_RESOLUTIONS = ["640x360", "1280x720"]
+DEFAULT_THRESHOLD = 0.20  # allowed relative slowdown before a stage counts as regressed
+NOISE_FLOOR_SECONDS = 0.05  # ignore absolute differences below this
+STAGES = ["extract_audio", "audio_to_text", "analyze_text_segments", "create_reels"]
+
+
+def generate_media(duration: int, resolution: str, out_dir: Optional[Path] = None) -> str:
+    """
+    Render a deterministic synthetic test video with ffmpeg lavfi sources.
+
+    Video is ``testsrc2``; audio is seeded pink noise mixed with a low tone and
+    amplitude-modulated at a syllable-like 4 Hz, which keeps Whisper busy
+    without needing a TTS engine or network access. Files are cached by name.
+    """
+    out_dir = Path(out_dir or BENCH_DIR)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    output_path = out_dir / f"synthetic_{resolution}_{duration}s.mp4"
+    if output_path.exists():
+        return str(output_path)
+
+    subprocess.run([
+        "ffmpeg", "-y",
+        "-f", "lavfi", "-i", f"testsrc2=size={resolution}:rate=25:duration={duration}",
+        "-f", "lavfi", "-i", f"anoisesrc=color=pink:amplitude=0.4:seed=42:duration={duration}",
+        "-f", "lavfi", "-i", f"sine=frequency=180:duration={duration}",
+        "-filter_complex", "[1:a][2:a]amix=inputs=2,tremolo=f=4:d=0.8,lowpass=f=3400[a]",
+        "-map", "0:v", "-map", "[a]",
+        "-c:v", "libx264", "-preset", "veryfast", "-threads", "1",
+        "-c:a", "aac", "-ar", "44100",
+        "-fflags", "+bitexact", "-flags:v", "+bitexact", "-flags:a", "+bitexact",
+        str(output_path)
+    ], check=True, capture_output=True)
+    return str(output_path)
+
+
+def _measure(fn: Callable[[], Any]) -> Tuple[Any, Dict[str, float]]:
+    self_before = resource.getrusage(resource.RUSAGE_SELF)
+    children_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    started = time.perf_counter()
+
+    value = fn()
+
+    wall = time.perf_counter() - started
+    self_after = resource.getrusage(resource.RUSAGE_SELF)
+    children_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = sum(
+        after.ru_utime - before.ru_utime + after.ru_stime - before.ru_stime
+        for before, after in ((self_before, self_after), (children_before, children_after))
+    )
+    # ru_maxrss is in KB on Linux; take the larger of this process and ffmpeg children
+    peak_rss_mb = max(self_after.ru_maxrss, children_after.ru_maxrss) / 1024
+    return value, {
+        'wall_seconds': round(wall, 4),
+        'cpu_seconds': round(cpu, 4),
+        'peak_rss_mb': round(peak_rss_mb, 1)
+    }
+
+
+def _offline_completion(**kwargs):
+    raise ConnectionError("benchmarks never call the OpenAI API")
+
+
+def _run_stage(stage: str, video_path: str, inputs: Dict[str, Any], model_name: str,
+               out_dir: str) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """Run a single stage in a fresh process so peak RSS belongs to that stage alone."""
+    from video_processor import VideoProcessor
+
+    # Model load happens before timing starts but still counts toward peak RSS;
+    # the other stages never touch the Whisper model. Selection stays offline
+    # so analyze_text_segments always takes its deterministic fallback path.
+    processor = VideoProcessor(model_name=model_name, load_models=stage == "audio_to_text",
+                               chat_completion=_offline_completion)
+
+    if stage == "extract_audio":
+        def fn():
+            return {'audio_path': processor.extract_audio(video_path)}
+    elif stage == "audio_to_text":
+        def fn():
+            return processor.audio_to_text(inputs['audio_path'])
+    elif stage == "analyze_text_segments":
+        def fn():
+            return {'important_segments': processor.analyze_text_segments(
+                inputs['text'], inputs['segments'], 2)}
+    else:
+        def fn():
+            return {'reels': processor.create_reels(
+                video_path, inputs['important_segments'], 10, output_dir=os.path.join(out_dir, "reels"))}
+
+    return _measure(fn)
+
+
+def benchmark_media(video_path: str, model_name: str = "tiny") -> Dict[str, Dict[str, float]]:
+    """Time every pipeline stage on one input, each in its own process."""
+    out_dir = os.path.splitext(video_path)[0] + "_work"
+    os.makedirs(out_dir, exist_ok=True)
+
+    results = {}
+    inputs: Dict[str, Any] = {}
+    ctx = multiprocessing.get_context("spawn")
+    for stage in STAGES:
+        with ctx.Pool(1) as pool:
+            outputs, stats = pool.apply(_run_stage, (stage, video_path, inputs, model_name, out_dir))
+        if stage == "audio_to_text":
+            # Whisper segments carry token lists that are not needed downstream
+            outputs = {
+                'text': outputs['text'],
+                'segments': [{k: seg[k] for k in ('text', 'start', 'end')} for seg in outputs['segments']]
+            }
+        inputs.update(outputs)
+        results[stage] = stats
+    return results
+
+
+def run_benchmarks(durations: Optional[List[int]] = None, resolutions: Optional[List[str]] = None,
+                   model_name: str = "tiny") -> Dict[str, Any]:
+    """Generate the synthetic media matrix and benchmark every stage on each file."""
+    durations = durations or DEFAULT_DURATIONS
+    resolutions = resolutions or DEFAULT_RESOLUTIONS
+
+    results = {}
+    for resolution in resolutions:
+        for duration in durations:
+            video_path = generate_media(duration, resolution)
+            for stage, stats in benchmark_media(video_path, model_name=model_name).items():
+                results[f"{resolution}/{duration}s/{stage}"] = stats
+
+    return {
+        'meta': {
+            'created': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'host': platform.node(),
+            'python': platform.python_version(),
+            'cpu_count': os.cpu_count(),
+            'model': model_name
+        },
+        'results': results
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any],
+            threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Compare a run against a stored baseline.
+
+    Returns one entry per metric that grew by more than ``threshold`` (relative)
+    and, for timings, by more than NOISE_FLOOR_SECONDS in absolute terms.
+    """
+    regressions = []
+    for key, stats in current['results'].items():
+        reference = baseline.get('results', {}).get(key)
+        if not reference:
+            continue
+        for metric, value in stats.items():
+            old = reference.get(metric)
+            if not old:
+                continue
+            if metric.endswith('_seconds') and value - old < NOISE_FLOOR_SECONDS:
+                continue
+            change = (value - old) / old
+            if change > threshold:
+                regressions.append({
+                    'benchmark': key,
+                    'metric': metric,
+                    'baseline': old,
+                    'current': value,
+                    'change': round(change, 3)
+                })
+    return regressions
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_results(results: Dict[str, Any], path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
@@ -0,0 +1,84 @@
+import re
+from typing import Dict, List
+
+CAPTION_MODES = ("burn", "soft")
+
+# libass scales everything from PlayResX/PlayResY to the real frame size, so
+# these numbers only fix proportions: a ~6% tall font with a thick outline,
+# bottom-centred above the platform UI.
+ASS_HEADER = """[Script Info]
+ScriptType: v4.00+
+PlayResX: 384
+PlayResY: 288
+WrapStyle: 0
+ScaledBorderAndShadow: yes
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Default,Arial,18,&H00FFFFFF,&H000000FF,&H00000000,&H80000000,1,0,0,0,100,100,0,0,1,2,0,2,16,16,28,1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+
+def rebase_segments(segments: List[Dict], start: float, end: float) -> List[Dict]:
+    """
+    Transcript segments overlapping [start, end), clipped to the window and
+    shifted so the window starts at 0 (the timeline of the cut reel).
+    """
+    rebased = []
+    for segment in segments:
+        if segment['end'] <= start or segment['start'] >= end:
+            continue
+        text = segment['text'].strip()
+        if not text:
+            continue
+        rebased.append({
+            'start': max(segment['start'], start) - start,
+            'end': min(segment['end'], end) - start,
+            'text': text
+        })
+    return rebased
+
+
+def _srt_time(seconds: float) -> str:
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+
+def _ass_time(seconds: float) -> str:
+    centis = int(round(seconds * 100))
+    hours, centis = divmod(centis, 360000)
+    minutes, centis = divmod(centis, 6000)
+    secs, centis = divmod(centis, 100)
+    return f"{hours:d}:{minutes:02d}:{secs:02d}.{centis:02d}"
+
+
+def write_srt(cues: List[Dict], path: str) -> str:
+    with open(path, 'w', encoding='utf-8') as f:
+        for i, cue in enumerate(cues, 1):
+            f.write(f"{i}\n{_srt_time(cue['start'])} --> {_srt_time(cue['end'])}\n{cue['text']}\n\n")
+    return path
+
+
+def write_ass(cues: List[Dict], path: str) -> str:
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(ASS_HEADER)
+        for cue in cues:
+            # Braces start ASS override blocks and newlines must be \N
+            text = cue['text'].replace('{', '(').replace('}', ')').replace('\n', '\\N')
+            f.write(f"Dialogue: 0,{_ass_time(cue['start'])},{_ass_time(cue['end'])},Default,,0,0,0,,{text}\n")
+    return path
+
+
+def subtitles_filter(path: str) -> str:
+    """
+    ``subtitles`` filter expression for a caption file, escaped for both the
+    option-value and the filtergraph level so any path is safe.
+    """
+    value = re.sub(r"([\\:'])", r"\\\1", path)
+    return "subtitles=filename=" + re.sub(r"([\\'\[\],;])", r"\\\1", value)
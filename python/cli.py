@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Command line entry point for Reelify.
+
+Usage: python cli.py <command> [options]
+"""
+
+import argparse
+import sys
+
+import config
+
+
+def cmd_batch(args):
+    from batch import run_batch
+
+    summary = run_batch(
+        args.source,
+        jobs=args.jobs,
+        reel_count=args.reel_count,
+        reel_duration=args.reel_duration,
+        recursive=args.recursive,
+        db_path=args.db
+    )
+    return 0 if summary['failed'] == 0 else 1
+
+
+def cmd_bench(args):
+    import json
+    from benchmark import compare, load_results, run_benchmarks, save_results
+
+    results = run_benchmarks(
+        durations=[int(d) for d in args.durations.split(",")],
+        resolutions=args.resolutions.split(","),
+        model_name=args.model
+    )
+    save_results(results, args.output)
+    print(json.dumps(results['results'], indent=2))
+
+    if args.update_baseline:
+        save_results(results, args.baseline)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    try:
+        baseline = load_results(args.baseline)
+    except FileNotFoundError:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0
+
+    regressions = compare(results, baseline, threshold=args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression['benchmark']} {regression['metric']}: "
+              f"{regression['baseline']} -> {regression['current']} (+{regression['change']:.0%})")
+    return 1 if regressions else 0
+
+
+def cmd_whisper_report(args):
+    import json
+    from pathlib import Path
+    from whisper_backend import quantization_report
+
+    source = Path(args.samples)
+    if source.is_dir():
+        samples = [{'audio': str(path)} for path in sorted(source.iterdir())
+                   if path.suffix.lower() in ('.wav', '.mp3', '.flac', '.m4a')]
+        for sample in samples:
+            reference = Path(sample['audio']).with_suffix('.txt')
+            if reference.exists():
+                sample['reference'] = reference.read_text(encoding="utf-8")
+    else:
+        with open(source, encoding="utf-8") as f:
+            samples = [json.loads(line) for line in f if line.strip()]
+
+    if not samples:
+        print(f"No audio samples found in {args.samples}")
+        return 1
+
+    report = quantization_report(samples, name=args.model, threads=args.threads)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    for row in report['samples']:
+        print(f"{row['audio']}: fp32 {row['fp32_seconds']}s WER {row['fp32_wer']:.2%} | "
+              f"int8 {row['int8_seconds']}s WER {row['int8_wer']:.2%} (delta {row['wer_delta']:+.2%})")
+    print(f"Speedup {report['speedup']}x, mean WER delta {report['mean_wer_delta']:+.2%} -> {args.output}")
+    return 0 if report['mean_wer_delta'] <= args.max_wer_delta else 1
+
+
+def cmd_submit(args):
+    from distributed import submit
+
+    job_id = submit(args.video, reel_count=args.reel_count, reel_duration=args.reel_duration,
+                    captions=args.captions, cluster_dir=args.cluster_dir, shard_seconds=args.shard_seconds)
+    print(job_id)
+    return 0
+
+
+def cmd_coordinator(args):
+    from distributed import run_coordinator
+
+    run_coordinator(cluster_dir=args.cluster_dir, poll_seconds=args.poll, once=args.once, db_path=args.db)
+    return 0
+
+
+def cmd_worker(args):
+    from distributed import run_worker
+
+    completed = run_worker(cluster_dir=args.cluster_dir, worker_id=args.worker_id,
+                           kinds=args.kinds.split(","), poll_seconds=args.poll, once=args.once)
+    print(f"Completed {completed} task(s)")
+    return 0
+
+
+def cmd_cluster_status(args):
+    import json
+    from distributed import cluster_status
+
+    print(json.dumps(cluster_status(args.cluster_dir), indent=2))
+    return 0
+
+
+def cmd_convert_models(args):
+    from model_store import convert_models
+
+    names = args.models or [config.WHISPER_MODEL, config.WHISPER_DRAFT_MODEL]
+    for path in convert_models(names, force=args.force):
+        print(f"{path} ({path.stat().st_size / (1024 * 1024):.0f} MB)")
+    return 0
+
+
+def cmd_tune(args):
+    import json
+    from pathlib import Path
+    from settings import GB, detect_hardware, profile_path, read_profile, recommend_profile, write_profile
+
+    hardware = detect_hardware()
+    cores = args.cores or hardware['cores']
+    memory = int(args.memory_gb * GB) if args.memory_gb else hardware['memory_bytes']
+    profile = recommend_profile(cores, memory)
+    print(f"{cores} cores, {memory / GB:.1f} GB RAM")
+    print(json.dumps(profile, indent=2))
+    if args.dry_run:
+        return 0
+
+    # Keep hand-set values the recommendation does not cover
+    output = Path(args.output) if args.output else profile_path()
+    existing = read_profile(output) if output.exists() else {}
+    write_profile({**existing, **profile}, output)
+    print(f"Profile written to {output}; set REELIFY_PROFILE to use it from elsewhere")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="reelify", description=config.APP_NAME)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    batch = subparsers.add_parser("batch", help="Process a directory or manifest of videos")
+    batch.add_argument("source", help="Directory of videos, or a manifest (.txt paths or .jsonl objects)")
+    batch.add_argument("-j", "--jobs", type=int, default=None, help="Parallel worker processes")
+    batch.add_argument("--reel-count", type=int, default=2)
+    batch.add_argument("--reel-duration", type=int, default=config.DEFAULT_REEL_DURATION)
+    batch.add_argument("-r", "--recursive", action="store_true", help="Search directories recursively")
+    batch.add_argument("--db", default=config.DATABASE_PATH, help="Database used to skip completed videos")
+    batch.set_defaults(func=cmd_batch)
+
+    bench = subparsers.add_parser("bench", help="Benchmark each pipeline stage on synthetic media")
+    bench.add_argument("--durations", default="10,60", help="Comma-separated clip durations in seconds")
+    bench.add_argument("--resolutions", default="640x360,1280x720", help="Comma-separated WxH sizes")
+    bench.add_argument("--model", default="tiny", help="Whisper model used for the transcription stage")
+    bench.add_argument("--output", default="bench_results.json", help="Where to write this run's results")
+    bench.add_argument("--baseline", default="bench_baseline.json", help="Stored results to compare against")
+    bench.add_argument("--update-baseline", action="store_true", help="Store this run as the new baseline")
+    bench.add_argument("--threshold", type=float, default=0.20, help="Allowed relative slowdown per metric")
+    bench.set_defaults(func=cmd_bench)
+
+    report = subparsers.add_parser("whisper-report", help="Compare int8 and fp32 Whisper speed and accuracy")
+    report.add_argument("samples", help="Folder of audio files (optional .txt references alongside) "
+                                        "or .jsonl of {\"audio\", \"reference\"}")
+    report.add_argument("--model", default=config.WHISPER_MODEL)
+    report.add_argument("--threads", type=int, default=None, help="torch intra-op threads")
+    report.add_argument("--output", default="whisper_report.json")
+    report.add_argument("--max-wer-delta", type=float, default=0.02,
+                        help="Fail if int8 WER exceeds fp32 WER by more than this (absolute)")
+    report.set_defaults(func=cmd_whisper_report)
+
+    convert = subparsers.add_parser("convert-models",
+                                    help="Convert Whisper checkpoints for memory-mapped loading")
+    convert.add_argument("models", nargs="*", help="Model names or checkpoint paths (default: configured models)")
+    convert.add_argument("--force", action="store_true", help="Convert again even if a converted file exists")
+    convert.set_defaults(func=cmd_convert_models)
+
+    tune = subparsers.add_parser("tune", help="Detect cores and RAM and write a recommended settings profile")
+    tune.add_argument("--output", default=None, help="Profile to write (default: $REELIFY_PROFILE or reelify.json)")
+    tune.add_argument("--cores", type=int, default=None, help="Tune for this many cores instead of this host's")
+    tune.add_argument("--memory-gb", type=float, default=None, help="Tune for this much RAM instead of this host's")
+    tune.add_argument("--dry-run", action="store_true", help="Print the recommendation without writing it")
+    tune.set_defaults(func=cmd_tune)
+
+    submit = subparsers.add_parser("submit", help="Queue a long video for sharded processing on the cluster")
+    submit.add_argument("video", help="Source video on storage shared by all hosts")
+    submit.add_argument("--reel-count", type=int, default=2)
+    submit.add_argument("--reel-duration", type=int, default=config.DEFAULT_REEL_DURATION)
+    submit.add_argument("--captions", choices=("burn", "soft"), default=None)
+    submit.add_argument("--shard-seconds", type=float, default=None, help="Source seconds per transcription task")
+    submit.set_defaults(func=cmd_submit)
+
+    coordinator = subparsers.add_parser("coordinator", help="Merge shard transcripts and dispatch reel renders")
+    coordinator.add_argument("--poll", type=float, default=2.0, help="Seconds between queue scans")
+    coordinator.add_argument("--once", action="store_true", help="Exit when no job is in progress")
+    coordinator.add_argument("--db", default=config.DATABASE_PATH, help="Database finished jobs are recorded in")
+    coordinator.set_defaults(func=cmd_coordinator)
+
+    worker = subparsers.add_parser("worker", help="Run transcription and render tasks from the cluster queue")
+    worker.add_argument("--worker-id", default=None, help="Defaults to <hostname>-<pid>")
+    worker.add_argument("--kinds", default="transcribe,render", help="Task kinds this worker accepts")
+    worker.add_argument("--poll", type=float, default=2.0, help="Seconds to wait when the queue is empty")
+    worker.add_argument("--once", action="store_true", help="Exit when the queue is empty")
+    worker.set_defaults(func=cmd_worker)
+
+    status = subparsers.add_parser("cluster-status", help="Show cluster jobs, task counts and worker heartbeats")
+    status.set_defaults(func=cmd_cluster_status)
+
+    for command in (submit, coordinator, worker, status):
+        command.add_argument("--cluster-dir", default=str(config.CLUSTER_DIR),
+                             help="Queue and job directory shared by all hosts")
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
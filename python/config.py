@@ -1,5 +1,8 @@
 import os
 from pathlib import Path
+from typing import List, Optional
+
+from settings import load_settings
 
 # Application settings
 APP_NAME = "Video to Reels Converter"
@@ -8,30 +11,110 @@ VERSION = "1.0.0"
 # File settings
 MAX_FILE_SIZE = 500 * 1024 * 1024  # 500MB
 ALLOWED_VIDEO_EXTENSIONS = ['.mp4', '.avi', '.mov', '.mkv', '.wmv']
-TEMP_DIR = Path("temp")
-OUTPUT_DIR = Path("output")
 
-# Create directories if they don't exist
-TEMP_DIR.mkdir(exist_ok=True)
-OUTPUT_DIR.mkdir(exist_ok=True)
+# Tunable settings (workers, threads, models, caches, scratch locations) are
+# declared with their types and defaults in settings.py and overridden by the
+# profile file (REELIFY_PROFILE, see `reelify tune`) or REELIFY_* environment
+# variables. Each is assigned to a constant of this module below. Directories
+# are created by the code that writes into them, not on import.
+SETTINGS = load_settings()
+
+# Files and scratch space
+TEMP_DIR: Path = SETTINGS["TEMP_DIR"]
+OUTPUT_DIR: Path = SETTINGS["OUTPUT_DIR"]
+SCRATCH_DIR: Optional[Path] = SETTINGS["SCRATCH_DIR"]
+TMPFS_DIR: str = SETTINGS["TMPFS_DIR"]
+TMPFS_MAX_FILE_SIZE: int = SETTINGS["TMPFS_MAX_FILE_SIZE"]
+JOB_DISK_QUOTA: int = SETTINGS["JOB_DISK_QUOTA"]
+WORKSPACE_MAX_AGE: int = SETTINGS["WORKSPACE_MAX_AGE"]
+THUMBNAIL_DIR: Optional[Path] = SETTINGS["THUMBNAIL_DIR"]
+THUMBNAIL_CACHE_MAX_BYTES: int = SETTINGS["THUMBNAIL_CACHE_MAX_BYTES"]
+THUMBNAIL_URL_PREFIXES: List[str] = SETTINGS["THUMBNAIL_URL_PREFIXES"]
+MODEL_DIR: Path = SETTINGS["MODEL_DIR"]
+DATABASE_PATH: str = SETTINGS["DATABASE_PATH"]
+SQLITE_CACHE_KB: int = SETTINGS["SQLITE_CACHE_KB"]
+
+# Whisper
+WHISPER_MODEL: str = SETTINGS["WHISPER_MODEL"]
+WHISPER_PRECISION: str = SETTINGS["WHISPER_PRECISION"]
+WHISPER_THREADS: int = SETTINGS["WHISPER_THREADS"]
+WHISPER_INTEROP_THREADS: int = SETTINGS["WHISPER_INTEROP_THREADS"]
+WHISPER_MMAP: bool = SETTINGS["WHISPER_MMAP"]
+WHISPER_CASCADE: bool = SETTINGS["WHISPER_CASCADE"]
+WHISPER_DRAFT_MODEL: str = SETTINGS["WHISPER_DRAFT_MODEL"]
+TRANSCRIBE_WINDOW_SECONDS: int = SETTINGS["TRANSCRIBE_WINDOW_SECONDS"]
+TRANSCRIBE_PROMPT_CHARS: int = SETTINGS["TRANSCRIBE_PROMPT_CHARS"]
+TRANSCRIBE_OVERLAP_SECONDS: int = SETTINGS["TRANSCRIBE_OVERLAP_SECONDS"]
+CASCADE_PADDING_SECONDS: int = SETTINGS["CASCADE_PADDING_SECONDS"]
+AUDIO_HIGHLIGHTS: bool = SETTINGS["AUDIO_HIGHLIGHTS"]
+
+# Reels and encoding
+DEFAULT_REEL_DURATION: int = SETTINGS["DEFAULT_REEL_DURATION"]
+CAPTIONS: str = SETTINGS["CAPTIONS"]
+REEL_RENDITIONS: List[str] = SETTINGS["REEL_RENDITIONS"]
+REEL_PACKAGING: str = SETTINGS["REEL_PACKAGING"]
+FFMPEG_VIDEO_CODEC: str = SETTINGS["FFMPEG_VIDEO_CODEC"]
+FFMPEG_VIDEO_CRF: int = SETTINGS["FFMPEG_VIDEO_CRF"]
+FFMPEG_VIDEO_PRESET: str = SETTINGS["FFMPEG_VIDEO_PRESET"]
+REFRAME: bool = SETTINGS["REFRAME"]
+SCENE_INDEX: bool = SETTINGS["SCENE_INDEX"]
+SCENE_THRESHOLD: float = SETTINGS["SCENE_THRESHOLD"]
+SCENE_SNAP_TOLERANCE: float = SETTINGS["SCENE_SNAP_TOLERANCE"]
+
+# Workers and CPU scheduling (0 = derive from cores)
+BATCH_JOBS: int = SETTINGS["BATCH_JOBS"]
+PARALLEL_ENCODE_WORKERS: int = SETTINGS["PARALLEL_ENCODE_WORKERS"]
+SCHED_MAX_THREADS: int = SETTINGS["SCHED_MAX_THREADS"]
+SCHED_ASR_THREADS: int = SETTINGS["SCHED_ASR_THREADS"]
+SCHED_ENCODE_THREADS: int = SETTINGS["SCHED_ENCODE_THREADS"]
+SCHED_MAX_CONCURRENT_ASR: int = SETTINGS["SCHED_MAX_CONCURRENT_ASR"]
+SCHED_MAX_CONCURRENT_ENCODES: int = SETTINGS["SCHED_MAX_CONCURRENT_ENCODES"]
+SCHED_MAX_PENDING_JOBS: int = SETTINGS["SCHED_MAX_PENDING_JOBS"]
+SCHED_MAX_JOBS_PER_USER: int = SETTINGS["SCHED_MAX_JOBS_PER_USER"]
+SCHED_NODE_LOCKS: bool = SETTINGS["SCHED_NODE_LOCKS"]
+SCHED_NODE_LOCK_DIR: Optional[Path] = SETTINGS["SCHED_NODE_LOCK_DIR"]
+
+# API
+API_HOST: str = SETTINGS["API_HOST"]
+API_PORT: int = SETTINGS["API_PORT"]
+API_PUBLIC_URL: str = SETTINGS["API_PUBLIC_URL"]
+API_SECRET: str = SETTINGS["API_SECRET"]
+API_TOKEN_TTL: int = SETTINGS["API_TOKEN_TTL"]
+SUPABASE_JWT_SECRET: str = SETTINGS["SUPABASE_JWT_SECRET"]
+
+# Cluster (see distributed.py)
+CLUSTER_DIR: Optional[Path] = SETTINGS["CLUSTER_DIR"]
+SHARD_SECONDS: int = SETTINGS["SHARD_SECONDS"]
+SHARD_OVERLAP_SECONDS: int = SETTINGS["SHARD_OVERLAP_SECONDS"]
+TASK_LEASE_SECONDS: int = SETTINGS["TASK_LEASE_SECONDS"]
+HEARTBEAT_SECONDS: int = SETTINGS["HEARTBEAT_SECONDS"]
+TASK_MAX_ATTEMPTS: int = SETTINGS["TASK_MAX_ATTEMPTS"]
+
+# Duplicate detection (see fingerprint.py)
+FINGERPRINT_ENABLED: bool = SETTINGS["FINGERPRINT_ENABLED"]
+FINGERPRINT_MIN_COVERAGE: float = SETTINGS["FINGERPRINT_MIN_COVERAGE"]
+FINGERPRINT_MIN_SCORE: float = SETTINGS["FINGERPRINT_MIN_SCORE"]
+FINGERPRINT_MIN_CHROMA: float = SETTINGS["FINGERPRINT_MIN_CHROMA"]
+
+_unassigned = set(SETTINGS) - set(globals())
+if _unassigned:
+    raise RuntimeError(f"Settings missing from config.py: {', '.join(sorted(_unassigned))}")
+
+# Scratch locations that default to folders under TEMP_DIR
+SCRATCH_DIR = SCRATCH_DIR or TEMP_DIR / "jobs"
+THUMBNAIL_DIR = THUMBNAIL_DIR or TEMP_DIR / "thumbnails"
+CLUSTER_DIR = CLUSTER_DIR or TEMP_DIR / "cluster"
+SCHED_NODE_LOCK_DIR = (SCHED_NODE_LOCK_DIR or TEMP_DIR / "slots") if SCHED_NODE_LOCKS else None
 
 # OpenAI settings
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
-WHISPER_MODEL = "base"  # Options: tiny, base, small, medium, large
 
-# Video processing settings
-DEFAULT_REEL_DURATION = 30  # seconds
+# Video processing limits
 MAX_REEL_COUNT = 5
 MIN_REEL_DURATION = 15
 MAX_REEL_DURATION = 60
 
-# Database settings
-DATABASE_PATH = "app_database.db"
-
-# FFmpeg settings
+# FFmpeg settings (audio handed to Whisper)
 FFMPEG_AUDIO_CODEC = "pcm_s16le"
 FFMPEG_AUDIO_CHANNELS = 1
 FFMPEG_AUDIO_RATE = "16000"
-FFMPEG_VIDEO_CODEC = "libx264"
-FFMPEG_VIDEO_CRF = "23"
-FFMPEG_VIDEO_PRESET = "medium"
@@ -1,9 +1,43 @@
 import sqlite3
 import os
+import json
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
-def init_database(db_path: str = "app_database.db"):
+import config
+
+# One shared connection per database file and process, reused across Streamlit
+# reruns, sessions and API requests instead of reconnecting on every call. Keyed
+# by pid too: a forked worker must open its own handle, not use its parent's
+_pool: Dict[Tuple[int, str], sqlite3.Connection] = {}
+_pool_locks: Dict[Tuple[int, str], threading.RLock] = {}
+_pool_guard = threading.Lock()
+
+@contextmanager
+def connection(db_path: Optional[str] = None) -> Iterator[sqlite3.Connection]:
+    """Borrow the pooled connection (config.DATABASE_PATH by default); commits on success, rolls back on error"""
+    db_path = db_path or config.DATABASE_PATH
+    key = (os.getpid(), os.path.abspath(db_path))
+    with _pool_guard:
+        if key not in _pool:
+            _pool[key] = sqlite3.connect(db_path, check_same_thread=False)
+            if config.SQLITE_CACHE_KB:
+                # Negative cache_size is in KiB rather than pages
+                _pool[key].execute(f"PRAGMA cache_size = -{int(config.SQLITE_CACHE_KB)}")
+            _pool_locks[key] = threading.RLock()
+        conn, lock = _pool[key], _pool_locks[key]
+    with lock:
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+def init_database(db_path: Optional[str] = None):
     """Initialize the application database"""
-    conn = sqlite3.connect(db_path)
+    conn = sqlite3.connect(db_path or config.DATABASE_PATH)
     cursor = conn.cursor()
     
     # Users table
@@ -44,9 +78,123 @@ def init_database(db_path: str = "app_database.db"):
         )
     ''')
     
+    # Perceptual fingerprints of processed videos, see fingerprint.py
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS fingerprints (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source TEXT,
+            duration REAL,
+            energy BLOB,
+            chroma BLOB,
+            transcript_json TEXT,
+            segments_json TEXT,
+            reel_count INTEGER,
+            created_at REAL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS fingerprint_hashes (
+            fingerprint_id INTEGER,
+            band INTEGER,
+            value INTEGER,
+            time REAL,
+            FOREIGN KEY (fingerprint_id) REFERENCES fingerprints (id)
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fingerprint_hashes_band ON fingerprint_hashes (band, value)")
+
+    # Columns added after the initial schema
+    _add_column_if_missing(cursor, "processing_history", "trace_json", "TEXT")
+    # Full path of the input for headless runs (original_filename is the name the user saw)
+    if _add_column_if_missing(cursor, "processing_history", "source_path", "TEXT"):
+        # Batch runs used to store their absolute input path as the filename
+        cursor.execute("SELECT id, original_filename FROM processing_history")
+        cursor.executemany(
+            "UPDATE processing_history SET source_path = ?, original_filename = ? WHERE id = ?",
+            [(name, os.path.basename(name), row_id) for row_id, name in cursor.fetchall()
+             if name and os.path.isabs(name)]
+        )
+    _add_column_if_missing(cursor, "fingerprints", "scene_cuts", "BLOB")
+
     conn.commit()
     conn.close()
     print("Database initialized successfully!")
 
+def _add_column_if_missing(cursor, table: str, column: str, definition: str) -> bool:
+    """Add a column to an existing table unless it is already there; returns whether it was added"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    if column not in {row[1] for row in cursor.fetchall()}:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        return True
+    return False
+
+def record_processing(original_filename: str, status: str, reels: Optional[List[dict]] = None,
+                      user_id: Optional[int] = None, trace: Optional[dict] = None,
+                      source_path: Optional[str] = None, db_path: Optional[str] = None) -> int:
+    """Store a processing run, its reels and its span tree, returning the processing_history id"""
+    reels = reels or []
+    trace_json = json.dumps(trace) if trace is not None else None
+    with connection(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO processing_history (user_id, original_filename, reels_generated, status, trace_json, source_path) VALUES (?, ?, ?, ?, ?, ?)",
+            (user_id, original_filename, len(reels), status, trace_json, source_path)
+        )
+        processing_id = cursor.lastrowid
+        cursor.executemany(
+            "INSERT INTO reels (processing_id, reel_path, duration, segment_text, start_time, end_time) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (processing_id, reel['reel_path'], reel.get('duration'), reel.get('segment_text'),
+                 reel.get('start_time'), reel.get('end_time'))
+                for reel in reels
+            ]
+        )
+        return processing_id
+
+def get_processing_trace(processing_id: int, user_id: str, db_path: Optional[str] = None) -> Optional[dict]:
+    """Return the stored span tree of one of the user's processing runs, if any"""
+    with connection(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT trace_json FROM processing_history WHERE id = ? AND user_id = ?",
+                       (processing_id, user_id))
+        row = cursor.fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+def get_reel_path(reel_id: int, user_id: str, db_path: Optional[str] = None) -> Optional[str]:
+    """Return the file of a reel generated for the user, if any"""
+    with connection(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT r.reel_path FROM reels r JOIN processing_history h ON h.id = r.processing_id "
+            "WHERE r.id = ? AND h.user_id = ?",
+            (reel_id, user_id)
+        )
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+def get_job_reels(processing_ids: List[int], user_id: str,
+                  db_path: Optional[str] = None) -> List[Tuple[int, str, str]]:
+    """Return (processing_id, original_filename, reel_path) of the reels of the user's given runs, in order"""
+    if not processing_ids:
+        return []
+    placeholders = ",".join("?" * len(processing_ids))
+    with connection(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT r.processing_id, h.original_filename, r.reel_path FROM reels r "
+            f"JOIN processing_history h ON h.id = r.processing_id "
+            f"WHERE r.processing_id IN ({placeholders}) AND h.user_id = ? ORDER BY r.processing_id, r.id",
+            list(processing_ids) + [user_id]
+        )
+        return cursor.fetchall()
+
+def completed_sources(db_path: Optional[str] = None) -> Set[str]:
+    """Return the source paths of all successfully processed videos that were recorded with one"""
+    with connection(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT DISTINCT source_path FROM processing_history "
+                       "WHERE status = 'completed' AND source_path IS NOT NULL")
+        return {row[0] for row in cursor.fetchall()}
+
 if __name__ == "__main__":
     init_database()
@@ -0,0 +1,494 @@
+"""
+Coordinator/worker mode for sharding long videos across machines.
+
+All hosts mount the same cluster directory (config.CLUSTER_DIR) at the same
+path, and source videos must live on shared storage too. The directory holds
+``queue.db``, a SQLite task queue, plus per-job shard transcripts and reels.
+
+* ``submit`` splits a video into time shards and queues one transcribe task per shard.
+* Workers claim tasks, extract and transcribe their shard (or render a reel)
+  and heartbeat while they work; the heartbeat extends the task's lease.
+* The coordinator re-queues tasks whose lease expired (lost worker), merges
+  finished shard transcripts with offset correction, selects the segments,
+  queues one render task per reel and records the finished job.
+"""
+
+import json
+import os
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import config
+from ffmpeg_runner import run_ffmpeg
+from metrics import REGISTRY
+from workspace import JobWorkspace
+
+
+def _connect(cluster_dir: str) -> sqlite3.Connection:
+    os.makedirs(cluster_dir, exist_ok=True)
+    # Autocommit mode so claims can use explicit BEGIN IMMEDIATE transactions;
+    # rollback journal rather than WAL, which needs shared memory on one host
+    conn = sqlite3.connect(os.path.join(cluster_dir, "queue.db"), timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=DELETE")
+    conn.executescript('''
+        CREATE TABLE IF NOT EXISTS cluster_jobs (
+            id TEXT PRIMARY KEY,
+            source TEXT NOT NULL,
+            reel_count INTEGER,
+            reel_duration INTEGER,
+            captions TEXT,
+            status TEXT,
+            error TEXT,
+            created_at REAL,
+            finished_at REAL
+        );
+        CREATE TABLE IF NOT EXISTS cluster_tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            worker TEXT,
+            attempts INTEGER DEFAULT 0,
+            lease_until REAL,
+            result TEXT,
+            error TEXT,
+            FOREIGN KEY (job_id) REFERENCES cluster_jobs (id)
+        );
+        CREATE TABLE IF NOT EXISTS cluster_workers (
+            id TEXT PRIMARY KEY,
+            host TEXT,
+            pid INTEGER,
+            task_id INTEGER,
+            last_seen REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_cluster_tasks_status ON cluster_tasks (status, id);
+    ''')
+    return conn
+
+
+def _job_dir(cluster_dir: str, job_id: str) -> str:
+    path = os.path.join(cluster_dir, "jobs", job_id)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _write_json(path: str, data: Any):
+    # Write-then-rename so readers on other hosts never see a partial file
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def plan_shards(duration: float, shard_seconds: Optional[float] = None,
+                overlap: Optional[float] = None) -> List[Dict[str, float]]:
+    """
+    Split ``duration`` seconds into transcription shards.
+
+    Every shard but the first starts ``overlap`` seconds early so words cut by
+    a boundary are heard whole; ``keep_from``/``keep_until`` mark the part of
+    the timeline whose segments the shard owns when transcripts are merged.
+    """
+    shard_seconds = shard_seconds or config.SHARD_SECONDS
+    overlap = config.SHARD_OVERLAP_SECONDS if overlap is None else overlap
+    shards = []
+    start = 0.0
+    while start < duration:
+        end = min(duration, start + shard_seconds)
+        read_from = max(0.0, start - overlap)
+        shards.append({
+            'index': len(shards),
+            'start': read_from,
+            'duration': end - read_from,
+            'keep_from': start,
+            'keep_until': end
+        })
+        start = end
+    return shards
+
+
+def merge_shard_transcripts(shards: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge per-shard transcripts onto the source timeline.
+
+    Segment times are shifted by each shard's start, and a segment is kept
+    only by the shard that owns its midpoint, which drops the duplicates
+    transcribed twice in the overlaps.
+    """
+    from transcription import shift_segments
+
+    segments: List[Dict] = []
+    language = None
+    for shard in sorted(shards, key=lambda s: s['index']):
+        language = language or shard.get('language')
+        for segment in shift_segments(shard['segments'], shard['start'], 0):
+            middle = (segment['start'] + segment['end']) / 2
+            if shard['keep_from'] <= middle < shard['keep_until']:
+                segments.append(segment)
+
+    for i, segment in enumerate(segments):
+        segment['id'] = i
+    return {
+        'text': ''.join(segment['text'] for segment in segments),
+        'segments': segments,
+        'language': language
+    }
+
+
+def submit(source: str, reel_count: int = 2, reel_duration: int = 30, captions: Optional[str] = None,
+           cluster_dir: Optional[str] = None, shard_seconds: Optional[float] = None) -> str:
+    """Queue a video (on shared storage) for sharded processing; returns the cluster job id."""
+    from video_processor import probe_duration
+
+    cluster_dir = str(cluster_dir or config.CLUSTER_DIR)
+    source = os.path.abspath(source)
+    duration = probe_duration(source)
+    if duration <= 0:
+        raise Exception(f"Could not determine the duration of {source}")
+
+    job_id = uuid.uuid4().hex[:12]
+    conn = _connect(cluster_dir)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute('''
+            INSERT INTO cluster_jobs (id, source, reel_count, reel_duration, captions, status, created_at)
+            VALUES (?, ?, ?, ?, ?, 'transcribing', ?)
+        ''', (job_id, source, reel_count, reel_duration, captions, time.time()))
+        for shard in plan_shards(duration, shard_seconds):
+            conn.execute("INSERT INTO cluster_tasks (job_id, kind, payload) VALUES (?, 'transcribe', ?)",
+                         (job_id, json.dumps(dict(shard, source=source))))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    return job_id
+
+
+def _claim(conn: sqlite3.Connection, worker_id: str, kinds: Sequence[str]) -> Optional[sqlite3.Row]:
+    placeholders = ",".join("?" for _ in kinds)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        task = conn.execute(f'''
+            SELECT * FROM cluster_tasks WHERE status = 'pending' AND kind IN ({placeholders})
+            ORDER BY id LIMIT 1
+        ''', tuple(kinds)).fetchone()
+        if task is not None:
+            conn.execute('''
+                UPDATE cluster_tasks SET status = 'running', worker = ?, attempts = attempts + 1, lease_until = ?
+                WHERE id = ?
+            ''', (worker_id, time.time() + config.TASK_LEASE_SECONDS, task['id']))
+        conn.execute("COMMIT")
+        return task
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _finish_task(conn: sqlite3.Connection, task_id: int, worker_id: str, result: Any = None,
+                 error: Optional[str] = None) -> bool:
+    """Record a task outcome; False when the lease was lost and the task re-queued meanwhile."""
+    if error is None:
+        cursor = conn.execute('''
+            UPDATE cluster_tasks SET status = 'done', result = ?, lease_until = NULL
+            WHERE id = ? AND worker = ? AND status = 'running'
+        ''', (json.dumps(result), task_id, worker_id))
+    else:
+        # Failed attempts go back to the queue until they run out of retries
+        cursor = conn.execute('''
+            UPDATE cluster_tasks
+            SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                error = ?, worker = NULL, lease_until = NULL
+            WHERE id = ? AND worker = ? AND status = 'running'
+        ''', (config.TASK_MAX_ATTEMPTS, error, task_id, worker_id))
+    return cursor.rowcount == 1
+
+
+class _Heartbeat:
+    """Background thread that keeps a worker's registration and current lease fresh."""
+
+    def __init__(self, cluster_dir: str, worker_id: str):
+        self.cluster_dir = cluster_dir
+        self.worker_id = worker_id
+        self.task_id: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="reelify-heartbeat", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        conn = _connect(self.cluster_dir)
+        try:
+            while True:
+                now = time.time()
+                conn.execute('''
+                    INSERT INTO cluster_workers (id, host, pid, task_id, last_seen) VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(id) DO UPDATE SET task_id = excluded.task_id, last_seen = excluded.last_seen
+                ''', (self.worker_id, socket.gethostname(), os.getpid(), self.task_id, now))
+                if self.task_id is not None:
+                    conn.execute('''
+                        UPDATE cluster_tasks SET lease_until = ?
+                        WHERE id = ? AND worker = ? AND status = 'running'
+                    ''', (now + config.TASK_LEASE_SECONDS, self.task_id, self.worker_id))
+                if self._stop.wait(config.HEARTBEAT_SECONDS):
+                    break
+        finally:
+            conn.close()
+
+
+def _transcribe_shard(payload: Dict[str, Any], job_dir: str, workspace: JobWorkspace) -> str:
+    from scheduler import get_scheduler
+    from transcription import transcribe_windowed
+    from whisper_backend import configure_torch_threads, get_whisper_model, model_lock
+
+    audio_path = workspace.path(f"shard_{payload['index']}.wav", hot=True)
+    with get_scheduler().acquire('encode') as grant:
+        # Accurate seek on the shared source: only this shard's bytes are read
+        run_ffmpeg([
+            "ffmpeg",
+            "-y",
+            "-threads", str(grant.threads),
+            "-ss", str(payload['start']),
+            "-t", str(payload['duration']),
+            "-i", payload['source'],
+            "-vn",
+            "-acodec", "pcm_s16le",
+            "-ar", "16000",
+            "-ac", "1",
+            audio_path
+        ], op="extract_shard", outputs=[audio_path])
+
+    model = get_whisper_model()
+    with model_lock(model), get_scheduler().acquire('asr') as grant:
+        configure_torch_threads(grant.threads)
+        result = transcribe_windowed(model, audio_path)
+
+    shard_path = os.path.join(job_dir, f"shard_{payload['index']:04d}.json")
+    _write_json(shard_path, dict(payload, segments=result['segments'], language=result.get('language')))
+    return shard_path
+
+
+def _render_reel(payload: Dict[str, Any], job_dir: str, workspace: JobWorkspace) -> str:
+    from video_processor import VideoProcessor
+
+    # Rendering needs no Whisper model
+    processor = VideoProcessor(load_models=False)
+    reels = processor.create_reels(payload['source'], [payload['segment']], payload['reel_duration'],
+                                   output_dir=workspace.path("render"), captions=payload.get('captions'),
+                                   transcript_segments=payload.get('transcript_segments'), workspace=workspace)
+    if not reels:
+        raise Exception(f"Rendering reel {payload['index']} failed")
+
+    reels_dir = os.path.join(job_dir, "reels")
+    os.makedirs(reels_dir, exist_ok=True)
+    reel_path = os.path.join(reels_dir, f"reel_{payload['index']}.mp4")
+    shutil.move(reels[0], reel_path + ".part")
+    os.replace(reel_path + ".part", reel_path)
+    return reel_path
+
+
+def run_worker(cluster_dir: Optional[str] = None, worker_id: Optional[str] = None,
+               kinds: Sequence[str] = ("transcribe", "render"), poll_seconds: float = 2.0,
+               once: bool = False) -> int:
+    """
+    Claim and execute tasks until stopped (or until the queue is empty with
+    ``once``). Returns the number of tasks completed.
+    """
+    cluster_dir = str(cluster_dir or config.CLUSTER_DIR)
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    conn = _connect(cluster_dir)
+    heartbeat = _Heartbeat(cluster_dir, worker_id)
+    heartbeat.start()
+    completed = 0
+
+    try:
+        while True:
+            task = _claim(conn, worker_id, kinds)
+            if task is None:
+                if once:
+                    break
+                time.sleep(poll_seconds)
+                continue
+
+            heartbeat.task_id = task['id']
+            payload = json.loads(task['payload'])
+            job_dir = _job_dir(cluster_dir, task['job_id'])
+            print(f"[{worker_id}] {task['kind']} task {task['id']} of job {task['job_id']}")
+            try:
+                with JobWorkspace() as workspace:
+                    if task['kind'] == 'transcribe':
+                        result = _transcribe_shard(payload, job_dir, workspace)
+                    else:
+                        result = _render_reel(payload, job_dir, workspace)
+                if _finish_task(conn, task['id'], worker_id, result=result):
+                    completed += 1
+                    REGISTRY.inc("reelify_cluster_tasks_total", labels={'kind': task['kind'], 'status': 'done'})
+            except Exception as e:
+                print(f"[{worker_id}] task {task['id']} failed: {e}")
+                _finish_task(conn, task['id'], worker_id, error=str(e))
+                REGISTRY.inc("reelify_cluster_tasks_total", labels={'kind': task['kind'], 'status': 'failed'})
+            finally:
+                heartbeat.task_id = None
+    finally:
+        heartbeat.stop()
+        conn.close()
+    return completed
+
+
+def _requeue_expired(conn: sqlite3.Connection) -> int:
+    """Return tasks held by workers that stopped heartbeating to the queue."""
+    cursor = conn.execute('''
+        UPDATE cluster_tasks
+        SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+            error = 'lease expired on ' || worker, worker = NULL, lease_until = NULL
+        WHERE status = 'running' AND lease_until < ?
+    ''', (config.TASK_MAX_ATTEMPTS, time.time()))
+    return cursor.rowcount
+
+
+def _finish_job(conn: sqlite3.Connection, job: sqlite3.Row, status: str, error: Optional[str] = None,
+                reel_details: Optional[List[Dict]] = None, db_path: str = config.DATABASE_PATH):
+    from database import record_processing
+
+    conn.execute("UPDATE cluster_jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                 (status, error, time.time(), job['id']))
+    record_processing(os.path.basename(job['source']), status, reel_details, source_path=job['source'],
+                      db_path=db_path)
+    REGISTRY.inc("reelify_jobs_total", labels={'status': status})
+    print(f"Job {job['id']} {status}" + (f": {error}" if error else ""))
+
+
+def _start_rendering(conn: sqlite3.Connection, cluster_dir: str, job: sqlite3.Row, shard_paths: List[str]):
+    from video_processor import VideoProcessor, reel_window
+
+    shards = []
+    for path in shard_paths:
+        with open(path, encoding="utf-8") as f:
+            shards.append(json.load(f))
+    transcript = merge_shard_transcripts(shards)
+    job_dir = _job_dir(cluster_dir, job['id'])
+    _write_json(os.path.join(job_dir, "transcript.json"), transcript)
+
+    processor = VideoProcessor(load_models=False)
+    important_segments = processor.analyze_text_segments(transcript['text'], transcript['segments'],
+                                                         job['reel_count'])
+    _write_json(os.path.join(job_dir, "segments.json"), important_segments)
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for i, segment in enumerate(important_segments, 1):
+            start, end = reel_window(segment, job['reel_duration'])
+            payload = {
+                'source': job['source'],
+                'index': i,
+                'segment': segment,
+                'reel_duration': job['reel_duration'],
+                'captions': job['captions'],
+                # Only the captions this reel can show travel with the task
+                'transcript_segments': [seg for seg in transcript['segments']
+                                        if seg['end'] > start and seg['start'] < end]
+            }
+            conn.execute("INSERT INTO cluster_tasks (job_id, kind, payload) VALUES (?, 'render', ?)",
+                         (job['id'], json.dumps(payload)))
+        conn.execute("UPDATE cluster_jobs SET status = 'rendering' WHERE id = ?", (job['id'],))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def coordinator_step(conn: sqlite3.Connection, cluster_dir: str, db_path: str = config.DATABASE_PATH):
+    """One pass: re-queue lost tasks and advance every job whose current phase is complete."""
+    from video_processor import describe_reels
+
+    requeued = _requeue_expired(conn)
+    if requeued:
+        print(f"Re-queued {requeued} task(s) from lost workers")
+
+    jobs = conn.execute("SELECT * FROM cluster_jobs WHERE status IN ('transcribing', 'rendering')").fetchall()
+    for job in jobs:
+        kind = 'transcribe' if job['status'] == 'transcribing' else 'render'
+        tasks = conn.execute("SELECT * FROM cluster_tasks WHERE job_id = ? AND kind = ? ORDER BY id",
+                             (job['id'], kind)).fetchall()
+
+        failed = [task for task in tasks if task['status'] == 'failed']
+        if failed:
+            _finish_job(conn, job, 'failed', error=failed[0]['error'], db_path=db_path)
+            continue
+        if any(task['status'] != 'done' for task in tasks):
+            continue
+
+        results = [json.loads(task['result']) for task in tasks]
+        try:
+            if kind == 'transcribe':
+                _start_rendering(conn, cluster_dir, job, results)
+            else:
+                with open(os.path.join(_job_dir(cluster_dir, job['id']), "segments.json"), encoding="utf-8") as f:
+                    important_segments = json.load(f)
+                # describe_reels pairs reel_N.mp4 with the N-th selected segment
+                reel_details = describe_reels(results, important_segments, job['reel_duration'])
+                _finish_job(conn, job, 'completed', reel_details=reel_details, db_path=db_path)
+        except Exception as e:
+            _finish_job(conn, job, 'failed', error=str(e), db_path=db_path)
+
+
+def run_coordinator(cluster_dir: Optional[str] = None, poll_seconds: float = 2.0, once: bool = False,
+                    db_path: str = config.DATABASE_PATH):
+    """Drive queued jobs to completion; with ``once`` return when none are in progress."""
+    from database import init_database
+
+    cluster_dir = str(cluster_dir or config.CLUSTER_DIR)
+    init_database(db_path)
+    conn = _connect(cluster_dir)
+    try:
+        while True:
+            coordinator_step(conn, cluster_dir, db_path=db_path)
+            active = conn.execute(
+                "SELECT COUNT(*) FROM cluster_jobs WHERE status IN ('transcribing', 'rendering')"
+            ).fetchone()[0]
+            if once and not active:
+                break
+            time.sleep(poll_seconds)
+    finally:
+        conn.close()
+
+
+def cluster_status(cluster_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Jobs with per-kind task counts, and workers with their last heartbeat age."""
+    conn = _connect(str(cluster_dir or config.CLUSTER_DIR))
+    try:
+        now = time.time()
+        jobs = []
+        for job in conn.execute("SELECT * FROM cluster_jobs ORDER BY created_at DESC LIMIT 20"):
+            counts = conn.execute('''
+                SELECT kind, status, COUNT(*) AS n FROM cluster_tasks WHERE job_id = ? GROUP BY kind, status
+            ''', (job['id'],)).fetchall()
+            jobs.append({
+                'id': job['id'],
+                'source': Path(job['source']).name,
+                'status': job['status'],
+                'error': job['error'],
+                'tasks': {f"{row['kind']}_{row['status']}": row['n'] for row in counts}
+            })
+        workers = [
+            {'id': row['id'], 'host': row['host'], 'task_id': row['task_id'],
+             'last_seen_seconds': round(now - row['last_seen'], 1)}
+            for row in conn.execute("SELECT * FROM cluster_workers ORDER BY last_seen DESC")
+        ]
+        return {'jobs': jobs, 'workers': workers}
+    finally:
+        conn.close()
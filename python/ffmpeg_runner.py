@@ -0,0 +1,84 @@
+import os
+import subprocess
+import threading
+from typing import List, Optional, Sequence, Tuple
+
+from metrics import REGISTRY, span
+from progress import JobCancelled, current_job
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except (OSError, TypeError):
+        return 0
+
+
+def _run_with_progress(args: List[str], job, stage: str, duration: float,
+                       fraction_range: Tuple[float, float]) -> subprocess.CompletedProcess:
+    """Run ffmpeg with ``-progress pipe:1`` and forward out_time to the job."""
+    low, high = fraction_range
+    cmd = [args[0], "-progress", "pipe:1", "-nostats"] + args[1:]
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    job.register_process(process)
+
+    # Drain stderr on the side so a chatty ffmpeg never blocks on a full pipe
+    stderr_chunks: List[bytes] = []
+    reader = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+    reader.start()
+
+    try:
+        for raw_line in process.stdout:
+            key, _, value = raw_line.decode(errors="replace").strip().partition("=")
+            if key == "out_time_us" and duration > 0:
+                try:
+                    done = min(int(value) / 1e6 / duration, 1.0)
+                    job.update(stage, low + (high - low) * done)
+                except ValueError:
+                    pass
+            elif key == "progress" and value == "end":
+                job.update(stage, high)
+        process.wait()
+    finally:
+        # Also reached when the caller is interrupted, e.g. a Streamlit rerun
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        job.unregister_process(process)
+        reader.join(timeout=5)
+
+    stderr = b"".join(stderr_chunks)
+    if job.cancelled:
+        raise JobCancelled(f"Job {job.job_id} was cancelled")
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, cmd, output=b"", stderr=stderr)
+    return subprocess.CompletedProcess(cmd, process.returncode, b"", stderr)
+
+
+def run_ffmpeg(args: List[str], op: str, inputs: Sequence[str] = (), outputs: Sequence[str] = (),
+               stage: Optional[str] = None, duration: float = 0.0,
+               fraction_range: Tuple[float, float] = (0.0, 1.0)) -> subprocess.CompletedProcess:
+    """
+    Run an ffmpeg/ffprobe command as a traced span.
+
+    ``op`` names the invocation in traces and metrics. Sizes of ``inputs`` and
+    ``outputs`` are counted as bytes read and written. When a job is active and
+    ``stage`` is given, progress over ``duration`` seconds of media is reported
+    to it (mapped into ``fraction_range`` of the stage) and the process is
+    killed if the job is cancelled. Raises
+    ``subprocess.CalledProcessError`` on failure, like ``subprocess.run(check=True)``.
+    """
+    job = current_job()
+    with span(f"ffmpeg:{op}", metric="reelify_ffmpeg_seconds", op=op) as s:
+        if job is not None and stage:
+            job.check_cancelled()
+            result = _run_with_progress(args, job, stage, duration, fraction_range)
+        else:
+            result = subprocess.run(args, check=True, capture_output=True)
+
+        bytes_read = sum(_file_size(path) for path in inputs)
+        bytes_written = sum(_file_size(path) for path in outputs)
+        s.set(bytes_read=bytes_read, bytes_written=bytes_written)
+        REGISTRY.inc("reelify_bytes_read_total", bytes_read, {'op': op})
+        REGISTRY.inc("reelify_bytes_written_total", bytes_written, {'op': op})
+        return result
@@ -0,0 +1,265 @@
+import json
+import re
+import subprocess
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import config
+from database import connection
+from transcription import SAMPLE_RATE, PcmReader
+
+FRAME_SECONDS = 0.5  # one audio feature frame per half second
+FFT_SIZE = 4096
+HASH_SIZE = 32  # keyframes are hashed from a 32x32 grayscale thumbnail
+BANDS = 4  # 64-bit hashes are indexed as four 16-bit bands for candidate lookup
+
+
+class Fingerprint:
+    """
+    Cheap perceptual signature of a video.
+
+    ``energy`` is the log energy of every FRAME_SECONDS of audio, ``chroma``
+    the matching 12-bin pitch-class profile (uint8), and ``hashes`` the
+    (time, 64-bit pHash) pairs of the video's keyframes. None of these survive
+    a byte-exact comparison, but all survive re-encoding and remuxing.
+    """
+
+    def __init__(self, energy: np.ndarray, chroma: np.ndarray, hashes: List[Tuple[float, int]]):
+        self.energy = energy
+        self.chroma = chroma
+        self.hashes = hashes
+
+    @property
+    def duration(self) -> float:
+        return len(self.energy) * FRAME_SECONDS
+
+
+def _chroma_matrix() -> Tuple[np.ndarray, np.ndarray]:
+    freqs = np.fft.rfftfreq(FFT_SIZE, 1.0 / SAMPLE_RATE)
+    valid = (freqs >= 55) & (freqs <= 4000)
+    pitch_class = np.round(12 * np.log2(freqs[valid] / 440.0)).astype(int) % 12
+    matrix = np.zeros((valid.sum(), 12), dtype=np.float32)
+    matrix[np.arange(valid.sum()), pitch_class] = 1.0
+    return valid, matrix
+
+
+def audio_features(audio_path: str, block_frames: int = 120) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-frame log energy and chroma of a PCM file, read a block at a time."""
+    hop = int(FRAME_SECONDS * SAMPLE_RATE)
+    valid, matrix = _chroma_matrix()
+    window = np.hanning(FFT_SIZE).astype(np.float32)
+    energies, chromas = [], []
+
+    with PcmReader(audio_path) as audio:
+        total_frames = len(audio) // hop
+        for first in range(0, total_frames, block_frames):
+            count = min(block_frames, total_frames - first)
+            pcm = audio.read(first * hop, (first + count - 1) * hop + FFT_SIZE)
+            if len(pcm) < (count - 1) * hop + FFT_SIZE:
+                pcm = np.pad(pcm, (0, (count - 1) * hop + FFT_SIZE - len(pcm)))
+            frames = np.lib.stride_tricks.sliding_window_view(pcm, FFT_SIZE)[::hop][:count]
+
+            energies.append(np.log10(np.mean(frames ** 2, axis=1) + 1e-10).astype(np.float32))
+            power = np.abs(np.fft.rfft(frames * window, axis=1)) ** 2
+            chroma = power[:, valid] @ matrix
+            chroma /= chroma.max(axis=1, keepdims=True) + 1e-10
+            chromas.append((chroma * 255).astype(np.uint8))
+
+    if not energies:
+        return np.zeros(0, dtype=np.float32), np.zeros((0, 12), dtype=np.uint8)
+    return np.concatenate(energies), np.concatenate(chromas)
+
+
+def keyframe_hashes(video_path: str) -> List[Tuple[float, int]]:
+    """
+    pHash of every keyframe. ffmpeg decodes keyframes only and hands over
+    32x32 gray thumbnails; the DCT is done with cv2. Returns [] without cv2.
+    """
+    try:
+        import cv2
+    except ImportError:
+        return []
+
+    try:
+        result = subprocess.run([
+            "ffmpeg",
+            "-skip_frame", "nokey",
+            "-i", video_path,
+            "-an",
+            "-vf", f"scale={HASH_SIZE}:{HASH_SIZE},format=gray,showinfo",
+            "-vsync", "0",
+            "-f", "rawvideo",
+            "-"
+        ], check=True, capture_output=True)
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return []
+
+    times = [float(t) for t in re.findall(rb"pts_time:\s*([-\d.]+)", result.stderr)]
+    frame_bytes = HASH_SIZE * HASH_SIZE
+    frames = np.frombuffer(result.stdout, dtype=np.uint8)
+    frames = frames[:len(frames) // frame_bytes * frame_bytes].reshape(-1, HASH_SIZE, HASH_SIZE)
+
+    hashes = []
+    for t, frame in zip(times, frames):
+        low = cv2.dct(frame.astype(np.float32))[:8, :8].flatten()
+        bits = low > np.median(low[1:])
+        hashes.append((t, int(np.packbits(bits).view('>u8')[0])))
+    return hashes
+
+
+def compute_fingerprint(video_path: str, audio_path: str) -> Fingerprint:
+    energy, chroma = audio_features(audio_path)
+    return Fingerprint(energy, chroma, keyframe_hashes(video_path))
+
+
+def _bands(value: int) -> List[int]:
+    return [(value >> (16 * i)) & 0xFFFF for i in range(BANDS)]
+
+
+def _normalize(energy: np.ndarray) -> np.ndarray:
+    # Level changes rather than absolute level, so gain differences don't matter
+    delta = np.diff(energy, prepend=energy[:1])
+    return (delta - delta.mean()) / (delta.std() + 1e-6)
+
+
+def _best_offset(query: np.ndarray, candidate: np.ndarray, min_overlap: int) -> Tuple[int, float]:
+    """
+    Lag L maximizing the mean of query[i] * candidate[i + L] over their
+    overlap, computed for every L at once with an FFT cross-correlation.
+    """
+    m, n = len(query), len(candidate)
+    size = 1 << (m + n).bit_length()
+    corr = np.fft.irfft(np.fft.rfft(candidate, size) * np.conj(np.fft.rfft(query, size)), size)
+
+    best_lag, best_score = 0, -1.0
+    for lag in range(-(m - min_overlap), n - min_overlap + 1):
+        overlap = min(m, n - lag) - max(0, -lag)
+        if overlap < min_overlap:
+            continue
+        score = corr[lag % size] / overlap
+        if score > best_score:
+            best_lag, best_score = lag, score
+    return best_lag, float(best_score)
+
+
+def _chroma_similarity(query: np.ndarray, candidate: np.ndarray, lag: int) -> float:
+    start = max(0, -lag)
+    stop = min(len(query), len(candidate) - lag)
+    a = query[start:stop].astype(np.float32)
+    b = candidate[start + lag:stop + lag].astype(np.float32)
+    dot = (a * b).sum(axis=1)
+    norms = np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1) + 1e-6
+    return float(np.mean(dot / norms)) if len(a) else 0.0
+
+
+def _candidates(conn, fingerprint: Fingerprint, limit: int = 10) -> List[int]:
+    cursor = conn.cursor()
+    if fingerprint.hashes:
+        votes: Dict[int, int] = {}
+        for _, value in fingerprint.hashes:
+            for band, band_value in enumerate(_bands(value)):
+                cursor.execute("SELECT DISTINCT fingerprint_id FROM fingerprint_hashes WHERE band = ? AND value = ?",
+                               (band, band_value))
+                for (fingerprint_id,) in cursor.fetchall():
+                    votes[fingerprint_id] = votes.get(fingerprint_id, 0) + 1
+        if votes:
+            return sorted(votes, key=votes.get, reverse=True)[:limit]
+
+    # No visual evidence: fall back to sources long enough to contain this one
+    cursor.execute("SELECT id FROM fingerprints WHERE duration >= ? ORDER BY ABS(duration - ?) LIMIT ?",
+                   (fingerprint.duration * config.FINGERPRINT_MIN_COVERAGE, fingerprint.duration, limit))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def find_duplicate(fingerprint: Fingerprint, db_path: str = config.DATABASE_PATH) -> Optional[Dict[str, Any]]:
+    """
+    Look up an indexed video containing (at least FINGERPRINT_MIN_COVERAGE of)
+    this one. Returns its stored transcript, selections and shot boundaries
+    (``scene_cuts``, None if it was indexed without them) plus ``offset``,
+    the source time at which this video starts, or None.
+    """
+    if len(fingerprint.energy) < 2:
+        return None
+    query = _normalize(fingerprint.energy)
+    min_overlap = max(2, int(len(query) * config.FINGERPRINT_MIN_COVERAGE))
+
+    with connection(db_path) as conn:
+        cursor = conn.cursor()
+        best = None
+        for fingerprint_id in _candidates(conn, fingerprint):
+            cursor.execute("SELECT energy, chroma FROM fingerprints WHERE id = ?", (fingerprint_id,))
+            energy_blob, chroma_blob = cursor.fetchone()
+            energy = np.frombuffer(energy_blob, dtype=np.float16).astype(np.float32)
+            if len(energy) < min_overlap:
+                continue
+            lag, score = _best_offset(query, _normalize(energy), min_overlap)
+            if score < config.FINGERPRINT_MIN_SCORE:
+                continue
+            chroma = np.frombuffer(chroma_blob, dtype=np.uint8).reshape(-1, 12)
+            if _chroma_similarity(fingerprint.chroma, chroma, lag) < config.FINGERPRINT_MIN_CHROMA:
+                continue
+            if best is None or score > best['score']:
+                best = {'fingerprint_id': fingerprint_id, 'offset': lag * FRAME_SECONDS, 'score': score}
+
+        if best is None:
+            return None
+        cursor.execute("SELECT source, transcript_json, segments_json, reel_count, scene_cuts FROM fingerprints "
+                       "WHERE id = ?", (best['fingerprint_id'],))
+        source, transcript_json, segments_json, reel_count, scene_cuts = cursor.fetchone()
+
+    best.update({
+        'source': source,
+        'transcript': json.loads(transcript_json),
+        'important_segments': json.loads(segments_json),
+        'reel_count': reel_count,
+        'scene_cuts': np.frombuffer(scene_cuts, dtype=np.float32) if scene_cuts is not None else None
+    })
+    return best
+
+
+def shift_to_query(segments: List[Dict], offset: float, duration: float) -> List[Dict]:
+    """Move source-timeline segments onto the duplicate's timeline, dropping those outside it."""
+    shifted = []
+    for segment in segments:
+        start, end = segment['start'] - offset, segment['end'] - offset
+        if start < 0 or end > duration + FRAME_SECONDS:
+            continue
+        shifted.append(dict(segment, start=start, end=end))
+    return shifted
+
+
+def shift_cuts(cuts: np.ndarray, offset: float, duration: float) -> np.ndarray:
+    """Move source-timeline shot boundaries onto the duplicate's timeline."""
+    shifted = cuts - np.float32(offset)
+    return shifted[(shifted > 0) & (shifted < duration)]
+
+
+def store_fingerprint(fingerprint: Fingerprint, source: str, transcript: Dict[str, Any],
+                      important_segments: List[Dict], reel_count: int, scene_cuts: Optional[np.ndarray] = None,
+                      db_path: str = config.DATABASE_PATH) -> int:
+    """
+    Index a processed video with the transcript, selections and shot
+    boundaries (float32 seconds) to hand to future duplicates.
+    """
+    cuts_blob = scene_cuts.astype(np.float32).tobytes() if scene_cuts is not None else None
+    with connection(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO fingerprints (source, duration, energy, chroma, transcript_json, segments_json,
+                                      reel_count, scene_cuts, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (source, fingerprint.duration, fingerprint.energy.astype(np.float16).tobytes(),
+              fingerprint.chroma.tobytes(), json.dumps({'text': transcript['text'], 'segments': transcript['segments']}),
+              json.dumps(important_segments), reel_count, cuts_blob, time.time()))
+        fingerprint_id = cursor.lastrowid
+        cursor.executemany(
+            "INSERT INTO fingerprint_hashes (fingerprint_id, band, value, time) VALUES (?, ?, ?, ?)",
+            [
+                (fingerprint_id, band, band_value, t)
+                for t, value in fingerprint.hashes
+                for band, band_value in enumerate(_bands(value))
+            ]
+        )
+        return fingerprint_id
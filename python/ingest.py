@@ -0,0 +1,177 @@
+"""
+Audio-first ingest of videos from URLs.
+
+Transcription only needs the audio, so UrlIngest fetches the audio-only stream
+(16 kHz mono WAV, ready for Whisper) before anything else and then downloads
+the video in a background thread. Callers transcribe and select segments while
+the video is still arriving and only wait for it when they need frames.
+
+URLs are resolved with yt_dlp when it is installed. Anything it does not
+recognise, or any URL when it is missing, is treated as a direct media URL,
+which ffmpeg reads over HTTP (a plain local HTTP server works as a stand-in).
+HTTPS is verified against the certifi CA bundle when certifi is installed, by
+yt_dlp and by ffmpeg alike.
+"""
+
+import os
+import subprocess
+import threading
+import time
+from typing import Dict, List, Optional
+
+USER_AGENT = "Mozilla/5.0"
+
+try:
+    import certifi
+    CA_BUNDLE: Optional[str] = certifi.where()
+except ImportError:
+    CA_BUNDLE = None
+
+
+def _header_args(headers: Dict[str, str]) -> List[str]:
+    if not headers:
+        return []
+    return ["-headers", "".join(f"{key}: {value}\r\n" for key, value in headers.items())]
+
+
+def _input_args(url: str, headers: Dict[str, str]) -> List[str]:
+    """ffmpeg options for reading ``url``: request headers and, over HTTPS, certificate checks."""
+    args = _header_args(headers)
+    if CA_BUNDLE and url.startswith("https://"):
+        # ffmpeg does not verify peers unless asked to
+        args += ["-tls_verify", "1", "-ca_file", CA_BUNDLE]
+    return args + ["-i", url]
+
+
+def _pick(formats: List[Dict], audio_only: bool) -> Optional[Dict]:
+    if audio_only:
+        candidates = [f for f in formats if f.get('vcodec') == 'none' and f.get('acodec') != 'none']
+        key = lambda f: (f.get('abr') or f.get('tbr') or 0)
+    else:
+        candidates = [f for f in formats if f.get('vcodec') != 'none']
+        # Prefer MP4 so the download can be stream-copied into an .mp4
+        key = lambda f: (f.get('ext') == 'mp4', f.get('height') or 0, f.get('tbr') or 0)
+    candidates = [f for f in candidates if f.get('url')]
+    return max(candidates, key=key) if candidates else None
+
+
+def resolve_streams(url: str) -> Dict:
+    """
+    Media URLs behind ``url``: ``audio_url`` (audio-only when the site offers
+    it), ``video_url``, whether the video stream carries audio itself, the
+    HTTP headers to send, and the title.
+    """
+    direct = {'audio_url': url, 'video_url': url, 'video_has_audio': True,
+              'headers': {'User-Agent': USER_AGENT}, 'title': os.path.basename(url.split('?')[0])}
+    try:
+        import yt_dlp
+    except ImportError:
+        return direct
+
+    ydl_opts = {
+        "noplaylist": True,
+        "quiet": True,
+        "http_headers": {"User-Agent": USER_AGENT},
+    }
+    if CA_BUNDLE:
+        ydl_opts["ca_certificates"] = CA_BUNDLE
+    try:
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(url, download=False)
+    except yt_dlp.utils.DownloadError as e:
+        # Unsupported site or a bare file server: let ffmpeg read the URL as is
+        print(f"yt_dlp could not resolve {url}, reading it directly: {e}")
+        return direct
+
+    formats = info.get('formats') or [info]
+    video = _pick(formats, audio_only=False)
+    if video is None:
+        return direct
+    audio = _pick(formats, audio_only=True) or video
+    return {
+        'audio_url': audio['url'],
+        'video_url': video['url'],
+        'video_has_audio': video.get('acodec') != 'none',
+        'headers': video.get('http_headers') or info.get('http_headers') or direct['headers'],
+        'title': info.get('title') or direct['title']
+    }
+
+
+class UrlIngest:
+    """
+    One URL download: ``fetch_audio`` blocks until the WAV is written,
+    ``start_video`` continues with the video in the background and
+    ``wait_video`` returns its path once it is complete.
+    """
+
+    def __init__(self, url: str, out_dir: str, ffmpeg: str = "ffmpeg"):
+        self.url = url
+        self.ffmpeg = ffmpeg
+        self.streams = resolve_streams(url)
+        stem = os.path.join(out_dir, f"video_{int(time.time())}")
+        self.audio_path = stem + "_audio.wav"
+        self.video_path = stem + ".mp4"
+        self.audio_seconds = 0.0
+        self.video_seconds = 0.0
+        self._video_done = threading.Event()
+        self._video_error: Optional[BaseException] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self, cmd: List[str]):
+        result = subprocess.run(cmd, capture_output=True, text=True, errors='replace')
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip())
+
+    def fetch_audio(self) -> str:
+        """Download and decode only the audio to 16 kHz mono WAV."""
+        started = time.time()
+        self._run([self.ffmpeg, "-y"] + _input_args(self.streams['audio_url'], self.streams['headers']) +
+                  ["-vn", "-ar", "16000", "-ac", "1", self.audio_path])
+        self.audio_seconds = time.time() - started
+        return self.audio_path
+
+    def _download_video(self):
+        started = time.time()
+        headers = self.streams['headers']
+        cmd = [self.ffmpeg, "-y"] + _input_args(self.streams['video_url'], headers)
+        if self.streams['video_has_audio']:
+            cmd += ["-map", "0:v:0", "-map", "0:a?"]
+        else:
+            # Video-only stream: mux the audio stream back in
+            cmd += _input_args(self.streams['audio_url'], headers) + ["-map", "0:v:0", "-map", "1:a:0"]
+        partial = self.video_path + ".partial.mp4"
+        try:
+            self._run(cmd + ["-c", "copy", "-movflags", "+faststart", partial])
+            os.replace(partial, self.video_path)
+        except BaseException as e:
+            self._video_error = e
+            if os.path.exists(partial):
+                os.remove(partial)
+        finally:
+            self.video_seconds = time.time() - started
+            self._video_done.set()
+
+    def start_video(self):
+        """Download the video in a background thread (once)."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._download_video, daemon=True)
+            self._thread.start()
+
+    def start(self) -> str:
+        """Audio first, then the video in the background; returns the audio path."""
+        audio_path = self.fetch_audio()
+        self.start_video()
+        return audio_path
+
+    @property
+    def video_ready(self) -> bool:
+        return self._video_done.is_set() and self._video_error is None
+
+    def wait_video(self, timeout: Optional[float] = None) -> str:
+        """Block until the background video download finishes; re-raises its error."""
+        self.start_video()
+        if not self._video_done.wait(timeout):
+            raise TimeoutError(f"Video download of {self.url} still running after {timeout}s")
+        if self._video_error is not None:
+            raise RuntimeError(f"Video download failed: {self._video_error}")
+        return self.video_path
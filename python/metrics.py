@@ -0,0 +1,194 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds (seconds) for the duration histograms
+DEFAULT_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+RTF_BUCKETS = (0.05, 0.1, 0.25, 0.5, 0.75, 1, 1.5, 2, 4)
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("reelify_current_span", default=None)
+
+
+class Span:
+    """A timed unit of work inside a job, with optional attributes and children."""
+
+    def __init__(self, name: str, attrs: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.attrs = dict(attrs or {})
+        self.start = time.time()
+        self.end: Optional[float] = None
+        self.children: List["Span"] = []
+        self.error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.time()) - self.start
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            'name': self.name,
+            'start': round(self.start, 6),
+            'duration': round(self.duration, 6),
+            'attrs': self.attrs,
+            'children': [child.to_dict() for child in self.children]
+        }
+        if self.error:
+            data['error'] = self.error
+        return data
+
+
+class Tracer:
+    """
+    Collects the span tree of one job.
+
+    Spans nest through a context variable, so helpers such as ``run_ffmpeg``
+    attach to whatever stage is active without the tracer being passed around.
+    """
+
+    def __init__(self, name: str = "job", **attrs):
+        self.root = Span(name, attrs)
+
+    @contextmanager
+    def activate(self) -> Iterator[Span]:
+        token = _current_span.set(self.root)
+        try:
+            yield self.root
+        finally:
+            self.root.end = time.time()
+            _current_span.reset(token)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self.root.to_dict()
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, metric: Optional[str] = None, **attrs) -> Iterator[Span]:
+    """
+    Time a block as a child of the active span.
+
+    If ``metric`` is given, the duration is also observed in that histogram
+    with the span's ``stage``/``op`` attribute as a label. Works without an
+    active tracer, in which case only the metric is recorded.
+    """
+    parent = _current_span.get()
+    child = Span(name, attrs)
+    if parent is not None:
+        parent.children.append(child)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.error = str(e) or e.__class__.__name__
+        raise
+    finally:
+        child.end = time.time()
+        _current_span.reset(token)
+        if metric:
+            labels = {k: attrs[k] for k in ('stage', 'op') if k in attrs}
+            if child.error:
+                labels['status'] = 'error'
+            REGISTRY.observe(metric, child.duration, labels)
+
+
+class MetricsRegistry:
+    """Process-wide counters and histograms rendered in Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Tuple], float] = {}
+        self._histograms: Dict[Tuple[str, Tuple], Dict[str, Any]] = {}
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._buckets: Dict[str, Tuple[float, ...]] = {}
+
+    def describe(self, name: str, kind: str, help_text: str, buckets: Optional[Tuple[float, ...]] = None):
+        self._help[name] = (kind, help_text)
+        if buckets:
+            self._buckets[name] = buckets
+
+    def inc(self, name: str, value: float = 1.0, labels: Optional[Dict[str, Any]] = None):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None):
+        key = (name, tuple(sorted((labels or {}).items())))
+        buckets = self._buckets.get(name, DEFAULT_BUCKETS)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = {'buckets': [0] * len(buckets), 'sum': 0.0, 'count': 0}
+                self._histograms[key] = hist
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    hist['buckets'][i] += 1
+            hist['sum'] += value
+            hist['count'] += 1
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items())
+
+        seen = set()
+
+        def header(name):
+            if name in seen:
+                return
+            seen.add(name)
+            kind, help_text = self._help.get(name, ('untyped', ''))
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            header(name)
+            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+
+        for (name, labels), hist in histograms:
+            header(name)
+            buckets = self._buckets.get(name, DEFAULT_BUCKETS)
+            for bound, count in zip(buckets, hist['buckets']):
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', f'{bound:g}'),))} {count}")
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {hist['count']}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {hist['sum']:g}")
+            lines.append(f"{name}_count{_format_labels(labels)} {hist['count']}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Tuple) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+REGISTRY = MetricsRegistry()
+REGISTRY.describe("reelify_jobs_total", "counter", "Processed jobs by final status")
+REGISTRY.describe("reelify_stage_seconds", "histogram", "Wall time per pipeline stage")
+REGISTRY.describe("reelify_ffmpeg_seconds", "histogram", "Wall time per ffmpeg invocation")
+REGISTRY.describe("reelify_queue_wait_seconds", "histogram", "Time between job submission and start")
+REGISTRY.describe("reelify_asr_real_time_factor", "histogram",
+                  "Transcription wall time divided by audio duration", RTF_BUCKETS)
+REGISTRY.describe("reelify_bytes_read_total", "counter", "Bytes of media read by pipeline steps")
+REGISTRY.describe("reelify_bytes_written_total", "counter", "Bytes of media written by pipeline steps")
+REGISTRY.describe("reelify_reel_failures_total", "counter", "Reels that failed to render")
+REGISTRY.describe("reelify_slot_wait_seconds", "histogram", "Time a stage waited for a scheduler slot")
+REGISTRY.describe("reelify_transcripts_reused_total", "counter", "Jobs that reused a near-duplicate's transcript")
+REGISTRY.describe("reelify_cluster_tasks_total", "counter", "Cluster worker tasks by kind and outcome")
+REGISTRY.describe("reelify_scene_index_realtime_factor", "histogram",
+                  "Seconds of video indexed for shot changes per second of wall time", (10, 25, 50, 100, 200, 500))
+REGISTRY.describe("reelify_jobs_rejected_total", "counter", "Jobs refused at submission because the node was saturated")
@@ -0,0 +1,113 @@
+"""
+Memory-mappable Whisper checkpoints.
+
+Stock checkpoints hold fp16 weights that ``whisper.load_model`` casts into a
+freshly allocated fp32 model, so every process pays the full deserialization
+and keeps a private copy. ``convert`` writes the ready-to-run fp32 weights once
+per model; ``load_mapped`` then builds the module on the meta device and
+assigns tensors that are memory-mapped straight from that file. Load time is
+dominated by page faults on first use, and since the mapping is never written
+all worker processes on a host share the same page-cache pages.
+"""
+
+import os
+from pathlib import Path
+from typing import Iterable, List
+
+import config
+
+FORMAT_VERSION = 1
+
+
+def converted_path(name: str) -> Path:
+    """Where the converted checkpoint of a model name (or checkpoint path) lives."""
+    stem = Path(name).stem if os.path.sep in name or name.endswith(".pt") else name
+    return Path(config.MODEL_DIR) / f"whisper-{stem}.mapped.pt"
+
+
+def convert(name: str, force: bool = False) -> Path:
+    """
+    Write ``name`` as a memory-mappable checkpoint: every tensor contiguous
+    fp32 in torch's zipfile format, plus the non-persistent buffers (causal
+    mask, alignment heads) the meta-device model cannot rebuild itself.
+    Concurrent callers wait for the one doing the work where flock exists;
+    elsewhere (Windows) they may convert in parallel, each into its own
+    partial file, and the last rename wins.
+    """
+    import torch
+    import whisper
+
+    try:
+        import fcntl
+    except ImportError:
+        fcntl = None
+
+    target = converted_path(name)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with open(f"{target}.lock", "w") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        if target.exists() and not force:
+            return target
+
+        model = whisper.load_model(name, device="cpu")
+        state_dict = {key: value.detach().contiguous() for key, value in model.state_dict().items()}
+        buffers, sparse_buffers = {}, []
+        for key, value in model.named_buffers():
+            if key in state_dict:
+                continue
+            if value.is_sparse:
+                sparse_buffers.append(key)
+                value = value.to_dense()
+            buffers[key] = value.contiguous()
+
+        partial = target.with_name(f"{target.name}.{os.getpid()}.partial")
+        torch.save({
+            'format': FORMAT_VERSION,
+            'dims': dict(vars(model.dims)),
+            'state_dict': state_dict,
+            'buffers': buffers,
+            'sparse_buffers': sparse_buffers
+        }, partial)
+        os.replace(partial, target)
+        return target
+
+
+def load_mapped(name: str, convert_missing: bool = True):
+    """
+    Whisper model whose weights are memory-mapped from the converted
+    checkpoint, converting it first if needed. Returns None when there is no
+    converted file and ``convert_missing`` is False, or when this torch
+    cannot memory-map checkpoints (``torch.load(mmap=...)`` needs torch 2.1).
+    """
+    import torch
+    from whisper.model import ModelDimensions, Whisper
+
+    path = converted_path(name)
+    if not path.exists():
+        if not convert_missing:
+            return None
+        convert(name)
+
+    try:
+        checkpoint = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+    except TypeError:
+        return None
+    if checkpoint.get('format') != FORMAT_VERSION:
+        raise Exception(f"Converted checkpoint {path} has format {checkpoint.get('format')}, "
+                        f"expected {FORMAT_VERSION}; run `reelify convert-models --force`")
+
+    # Parameters are created without storage and replaced by the mapped tensors
+    with torch.device("meta"):
+        model = Whisper(ModelDimensions(**checkpoint['dims']))
+    model.load_state_dict(checkpoint['state_dict'], assign=True)
+    for key, value in checkpoint['buffers'].items():
+        module_name, _, buffer_name = key.rpartition(".")
+        module = model.get_submodule(module_name)
+        module._buffers[buffer_name] = value.to_sparse() if key in checkpoint['sparse_buffers'] else value
+    return model
+
+
+def convert_models(names: Iterable[str], force: bool = False) -> List[Path]:
+    """Convert every named model, e.g. the configured WHISPER_MODEL and WHISPER_DRAFT_MODEL."""
+    return [convert(name, force=force) for name in dict.fromkeys(names)]
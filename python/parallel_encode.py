@@ -0,0 +1,183 @@
+"""
+Parallel segmented encoding of a full-length video.
+
+The source's video stream is split at keyframes by stream copy, every piece
+is encoded concurrently with the same filter chain and encoder settings, and
+the encoded pieces are joined with the concat demuxer (no re-encode) while
+the source audio is copied alongside. Each piece starts on a source keyframe,
+so no frame is decoded twice or lost at a join; verify_seams() checks that.
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import config
+
+MIN_SEGMENT_SECONDS = 10.0  # shorter pieces cost more in encoder start-up than they save
+
+
+def _run(cmd: List[str]) -> subprocess.CompletedProcess:
+    result = subprocess.run(cmd, capture_output=True, text=True, errors='replace')
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip())
+    return result
+
+
+def default_workers() -> int:
+    """Concurrent encodes: config.PARALLEL_ENCODE_WORKERS, or half the cores with two threads per encoder."""
+    return getattr(config, "PARALLEL_ENCODE_WORKERS", 0) or max(2, (os.cpu_count() or 2) // 2)
+
+
+def probe_packets(video_path: str, ffprobe: str = "ffprobe") -> Tuple[List[str], List[float]]:
+    """
+    Keyframe timestamps (as ffprobe prints them) and all packet timestamps of
+    the first video stream, sorted. Reads packet headers only, nothing is decoded.
+    """
+    result = _run([
+        ffprobe,
+        "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,flags",
+        "-of", "csv=p=0",
+        video_path
+    ])
+    keyframes, pts = [], []
+    for line in result.stdout.splitlines():
+        time_text, _, flags = line.strip().partition(",")
+        try:
+            t = float(time_text)
+        except ValueError:
+            continue
+        pts.append(t)
+        if flags.startswith("K"):
+            keyframes.append(time_text)
+    keyframes.sort(key=float)
+    pts.sort()
+    return keyframes, pts
+
+
+def plan_cuts(keyframes: Sequence[str], duration: float, segments: int,
+              min_segment_seconds: float = MIN_SEGMENT_SECONDS) -> List[str]:
+    """Keyframes closest to ``duration * i / segments``, at least min_segment_seconds apart."""
+    cuts: List[str] = []
+    last = 0.0
+    for i in range(1, segments):
+        target = duration * i / segments
+        candidates = [k for k in keyframes
+                      if float(k) - last >= min_segment_seconds and duration - float(k) >= min_segment_seconds]
+        if not candidates:
+            break
+        best = min(candidates, key=lambda k: abs(float(k) - target))
+        if float(best) <= last:
+            continue
+        cuts.append(best)
+        last = float(best)
+    return cuts
+
+
+def verify_seams(output_path: str, source_pts: Sequence[float], seams: Sequence[float],
+                 ffprobe: str = "ffprobe") -> Dict:
+    """
+    Compare the joined output with the source: every source frame must be
+    present exactly once, and the timestamp step across each join must match
+    the regular frame step (no gap, overlap or duplicated frame).
+    """
+    _, pts = probe_packets(output_path, ffprobe)
+    steps = [b - a for a, b in zip(pts, pts[1:])]
+    frame_step = sorted(steps)[len(steps) // 2] if steps else 0.0
+
+    worst = 0.0
+    for seam in seams:
+        # First output frame at or after the join, and the one before it
+        index = next((i for i, t in enumerate(pts) if t >= seam - frame_step / 2), None)
+        if index is None or index == 0:
+            continue
+        worst = max(worst, pts[index] - pts[index - 1])
+
+    duplicates = sum(1 for step in steps if step <= 0)
+    seamless = (len(pts) == len(source_pts) and duplicates == 0
+                and worst <= frame_step * 1.5 + 1e-3)
+    return {
+        'frames': len(pts),
+        'source_frames': len(source_pts),
+        'frame_step': round(frame_step, 6),
+        'max_seam_step': round(worst, 6),
+        'duplicate_timestamps': duplicates,
+        'seamless': seamless
+    }
+
+
+def encode_parallel(input_path: str, output_path: str, video_filter: Optional[str],
+                    video_args: Sequence[str] = ("-c:v", "libx264"), workers: Optional[int] = None,
+                    segments: Optional[int] = None, ffmpeg: str = "ffmpeg", ffprobe: str = "ffprobe") -> Dict:
+    """
+    Encode the video stream of ``input_path`` in keyframe-aligned pieces on
+    ``workers`` concurrent ffmpeg processes and join them into
+    ``output_path`` with the source audio copied unchanged.
+
+    Returns the verify_seams() report plus the number of pieces. Raises
+    RuntimeError if any step fails or the joins are not seamless; the
+    output is then removed so callers can fall back to a single encode.
+    """
+    workers = workers or default_workers()
+    segments = segments or workers
+    keyframes, source_pts = probe_packets(input_path, ffprobe)
+    duration = source_pts[-1] if source_pts else 0.0
+    cuts = plan_cuts(keyframes, duration, segments)
+    threads = max(1, (os.cpu_count() or workers) // workers)
+
+    scratch = tempfile.mkdtemp(prefix="parallel_encode_", dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        # 1. Split the video stream at the chosen keyframes, no re-encode
+        split_cmd = [ffmpeg, "-y", "-i", input_path, "-map", "0:v:0", "-c", "copy", "-an", "-sn", "-dn"]
+        if cuts:
+            split_cmd += ["-f", "segment", "-segment_times", ",".join(cuts), "-reset_timestamps", "1",
+                          os.path.join(scratch, "piece_%03d.mkv")]
+        else:
+            split_cmd += [os.path.join(scratch, "piece_000.mkv")]
+        _run(split_cmd)
+        pieces = sorted(name for name in os.listdir(scratch) if name.startswith("piece_"))
+
+        # 2. Encode every piece with identical settings
+        def encode(piece: str) -> str:
+            encoded = os.path.join(scratch, "encoded_" + piece[len("piece_"):-len(".mkv")] + ".mp4")
+            cmd = [ffmpeg, "-y", "-i", os.path.join(scratch, piece)]
+            if video_filter:
+                cmd += ["-vf", video_filter]
+            _run(cmd + list(video_args) + ["-threads", str(threads), "-an", encoded])
+            return encoded
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            encoded = list(pool.map(encode, pieces))
+
+        # 3. Join with the concat demuxer and mux the source audio back in
+        list_path = os.path.join(scratch, "pieces.txt")
+        with open(list_path, "w", encoding="utf-8") as f:
+            for path in encoded:
+                f.write(f"file '{os.path.basename(path)}'\n")
+        _run([
+            ffmpeg, "-y",
+            "-f", "concat", "-safe", "0", "-i", list_path,
+            "-i", input_path,
+            "-map", "0:v:0", "-map", "1:a?",
+            "-c", "copy",
+            "-movflags", "+faststart",
+            output_path
+        ])
+
+        first_pts = source_pts[0] if source_pts else 0.0
+        report = verify_seams(output_path, source_pts, [float(c) - first_pts for c in cuts], ffprobe)
+        report['segments'] = len(pieces)
+        if not report['seamless']:
+            raise RuntimeError(f"Segment joins are not seamless: {report}")
+        return report
+    except Exception:
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        raise
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
@@ -0,0 +1,174 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Overall-progress range (start, end) covered by each pipeline stage. Stage
+# keys match ProcessingStatus.stage in the React frontend.
+STAGE_RANGES = {
+    'upload': (0, 2),
+    'audio_extraction': (2, 10),
+    'transcription': (10, 60),
+    'analysis': (60, 65),
+    'reel_generation': (65, 100),
+    'completed': (100, 100),
+}
+
+_current_job: contextvars.ContextVar = contextvars.ContextVar("reelify_current_job", default=None)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job once it has been cancelled."""
+
+
+class JobProgress:
+    """
+    Live progress and cancellation handle for one processing job.
+
+    Stages report fractional progress through ``update``; listeners receive a
+    snapshot dict on every change. ``cancel`` kills any registered child
+    processes immediately, and long-running Python work stops at the next
+    ``check_cancelled`` call. ``owner`` is the id of the user the API lets
+    cancel it, None for jobs nobody may cancel over the API.
+    """
+
+    def __init__(self, job_id: str, owner: Optional[str] = None):
+        self.job_id = job_id
+        self.owner = owner
+        self.stage = 'upload'
+        self.progress = 0.0
+        self.message = ''
+        self.updated_at = time.time()
+        self.finished = False
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._processes: List[Any] = []
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'video_id': self.job_id,
+            'stage': self.stage,
+            'progress': int(self.progress),
+            'message': self.message,
+            'cancelled': self.cancelled,
+            'finished': self.finished,
+            'updated_at': self.updated_at
+        }
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def update(self, stage: str, fraction: float = 0.0, message: str = ''):
+        """Report ``fraction`` (0..1) of ``stage`` done."""
+        start, end = STAGE_RANGES.get(stage, (self.progress, self.progress))
+        fraction = min(max(fraction, 0.0), 1.0)
+        with self._lock:
+            self.stage = stage
+            self.progress = max(self.progress, start + (end - start) * fraction)
+            self.message = message or self.message
+            self.updated_at = time.time()
+            listeners = list(self._listeners)
+        snapshot = self.snapshot()
+        for listener in listeners:
+            listener(snapshot)
+
+    def finish(self, stage: str, message: str = ''):
+        """Mark the job as done with a final stage such as completed, failed or cancelled."""
+        with self._lock:
+            self.stage = stage
+            if stage == 'completed':
+                self.progress = 100.0
+            self.message = message or self.message
+            self.finished = True
+            self.updated_at = time.time()
+            listeners = list(self._listeners)
+        snapshot = self.snapshot()
+        for listener in listeners:
+            listener(snapshot)
+
+    def register_process(self, process):
+        with self._lock:
+            self._processes.append(process)
+        if self.cancelled:
+            process.kill()
+
+    def unregister_process(self, process):
+        with self._lock:
+            if process in self._processes:
+                self._processes.remove(process)
+
+    def cancel(self):
+        """Stop the job: kill child processes and flag Python stages to stop."""
+        self._cancelled.set()
+        with self._lock:
+            processes = list(self._processes)
+            self.message = 'Cancelling...'
+            self.updated_at = time.time()
+        for process in processes:
+            try:
+                process.kill()
+            except OSError:
+                pass
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled(f"Job {self.job_id} was cancelled")
+
+    @contextmanager
+    def activate(self) -> Iterator["JobProgress"]:
+        """Make this the job that ffmpeg runs and transcription windows report to."""
+        token = _current_job.set(self)
+        try:
+            yield self
+        finally:
+            _current_job.reset(token)
+
+
+def current_job() -> Optional[JobProgress]:
+    return _current_job.get()
+
+
+# Jobs of this process, so the API can report progress and cancel by id.
+# Finished jobs stay visible for FINISHED_JOB_TTL seconds so pollers see the outcome.
+FINISHED_JOB_TTL = 600
+_jobs: Dict[str, JobProgress] = {}
+_jobs_lock = threading.Lock()
+
+
+def register_job(job_id: str, owner: Optional[str] = None) -> JobProgress:
+    now = time.time()
+    with _jobs_lock:
+        for stale_id in [jid for jid, j in _jobs.items() if j.finished and now - j.updated_at > FINISHED_JOB_TTL]:
+            del _jobs[stale_id]
+        job = _jobs.get(job_id)
+        if job is None or job.finished:
+            job = JobProgress(job_id, owner)
+            _jobs[job_id] = job
+        elif job.owner is None:
+            job.owner = owner
+        return job
+
+
+def get_job(job_id: str) -> Optional[JobProgress]:
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+
+def cancel_job(job_id: str) -> bool:
+    job = get_job(job_id)
+    if job is None:
+        return False
+    job.cancel()
+    return True
@@ -0,0 +1,154 @@
+"""
+Subject-tracking crop for reframing reels to a narrower aspect (e.g. 9:16).
+
+Only the reel window is analysed, as ANALYSIS_WIDTH-wide gray frames sampled
+at SAMPLE_FPS from an ffmpeg pipe. Each sample's subject position is the
+largest face found by the cv2 Haar cascade, or the centroid of a spectral
+residual saliency map computed for the whole batch at once when there is no
+face. The positions are smoothed with NumPy into a pan trajectory that
+crop_filter() turns into a piecewise-linear ``crop`` expression, so the crop
+runs inside the reel's single encode.
+"""
+
+import subprocess
+from typing import Optional, Tuple
+
+import numpy as np
+
+VERTICAL_ASPECT = 9 / 16
+ANALYSIS_WIDTH = 320
+SAMPLE_FPS = 4
+SALIENCY_STRIDE = 5  # saliency runs on every 5th pixel of the analysis frames
+SMOOTHING_SECONDS = 1.0  # standard deviation of the Gaussian applied to the trajectory
+MAX_PAN_PER_SECOND = 0.25  # fraction of the frame width the crop may travel per second
+KNOT_SECONDS = 0.5  # spacing of the crop expression's linear pieces
+FACE_WEIGHT = 1.0
+SALIENCY_WEIGHT = 0.2
+
+_face_cascade = None
+
+
+def _cascade():
+    global _face_cascade
+    if _face_cascade is None:
+        import cv2
+        _face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+    return _face_cascade
+
+
+def _probe_size(video_path: str, ffprobe: str) -> Tuple[int, int]:
+    result = subprocess.run([
+        ffprobe,
+        "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "stream=width,height",
+        "-of", "csv=p=0",
+        video_path
+    ], check=True, capture_output=True, text=True)
+    width, height = result.stdout.strip().splitlines()[0].split(",")[:2]
+    return int(width), int(height)
+
+
+def sample_frames(video_path: str, start: float, duration: float, size: Tuple[int, int],
+                  ffmpeg: str = "ffmpeg") -> np.ndarray:
+    """Gray ANALYSIS_WIDTH-wide frames of ``[start, start + duration)`` at SAMPLE_FPS, shape (n, h, w)."""
+    source_width, source_height = size
+    height = max(2, int(round(ANALYSIS_WIDTH * source_height / source_width / 2)) * 2)
+    result = subprocess.run([
+        ffmpeg,
+        "-hide_banner", "-loglevel", "error",
+        "-skip_loop_filter", "all",
+        "-ss", str(start), "-t", str(duration),
+        "-i", video_path,
+        "-an", "-sn", "-dn",
+        "-vf", f"fps={SAMPLE_FPS},scale={ANALYSIS_WIDTH}:{height}:flags=area,format=gray",
+        "-f", "rawvideo",
+        "-"
+    ], check=True, capture_output=True)
+    frame_bytes = ANALYSIS_WIDTH * height
+    count = len(result.stdout) // frame_bytes
+    return np.frombuffer(result.stdout[:count * frame_bytes], dtype=np.uint8).reshape(count, height, ANALYSIS_WIDTH)
+
+
+def saliency_centers(frames: np.ndarray) -> np.ndarray:
+    """
+    Horizontal saliency centroid (0-1) of every frame, from the spectral
+    residual of the whole batch in one FFT.
+    """
+    small = frames[:, ::SALIENCY_STRIDE, ::SALIENCY_STRIDE].astype(np.float32)
+    spectrum = np.fft.fft2(small, axes=(1, 2))
+    log_amplitude = np.log(np.abs(spectrum) + 1e-6)
+    # 3x3 box average of the log spectrum, the "expected" part the residual removes
+    average = sum(np.roll(log_amplitude, (dy, dx), axis=(1, 2)) for dy in (-1, 0, 1) for dx in (-1, 0, 1)) / 9
+    saliency = np.abs(np.fft.ifft2(np.exp(log_amplitude - average + 1j * np.angle(spectrum)), axes=(1, 2))) ** 2
+    columns = saliency.sum(axis=1)
+    positions = (np.arange(columns.shape[1]) + 0.5) / columns.shape[1]
+    return (columns * positions).sum(axis=1) / np.maximum(columns.sum(axis=1), 1e-12)
+
+
+def face_centers(frames: np.ndarray) -> np.ndarray:
+    """Horizontal center (0-1) of the largest face in every frame, NaN where none is found."""
+    cascade = _cascade()
+    height, width = frames.shape[1:]
+    min_size = max(12, height // 10)
+    centers = np.full(len(frames), np.nan)
+    for i, frame in enumerate(frames):
+        faces = cascade.detectMultiScale(frame, scaleFactor=1.15, minNeighbors=4, minSize=(min_size, min_size))
+        if len(faces):
+            x, _, w, _ = max(faces, key=lambda face: face[2] * face[3])
+            centers[i] = (x + w / 2) / width
+    return centers
+
+
+def smooth_trajectory(centers: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Confidence-weighted Gaussian smoothing, then a cap on pan speed."""
+    sigma = SMOOTHING_SECONDS * SAMPLE_FPS
+    offsets = np.arange(-int(3 * sigma), int(3 * sigma) + 1)
+    kernel = np.exp(-0.5 * (offsets / sigma) ** 2)
+    pad = len(offsets) // 2
+    weighted = np.convolve(np.pad(centers * weights, pad, mode='edge'), kernel, mode='valid')
+    total = np.convolve(np.pad(weights, pad, mode='edge'), kernel, mode='valid')
+    smoothed = weighted / np.maximum(total, 1e-12)
+
+    max_step = MAX_PAN_PER_SECOND / SAMPLE_FPS
+    for i in range(1, len(smoothed)):
+        smoothed[i] = smoothed[i - 1] + np.clip(smoothed[i] - smoothed[i - 1], -max_step, max_step)
+    return smoothed
+
+
+def track_subject(video_path: str, start: float, duration: float,
+                  ffmpeg: str = "ffmpeg", ffprobe: str = "ffprobe") -> Optional[np.ndarray]:
+    """
+    Smoothed horizontal subject position (0-1 of the frame width) at every
+    SAMPLE_FPS sample of the window, or None if nothing could be sampled.
+    """
+    frames = sample_frames(video_path, start, duration, _probe_size(video_path, ffprobe), ffmpeg)
+    if len(frames) == 0:
+        return None
+    faces = face_centers(frames)
+    found = ~np.isnan(faces)
+    centers = np.where(found, faces, saliency_centers(frames))
+    weights = np.where(found, FACE_WEIGHT, SALIENCY_WEIGHT)
+    return smooth_trajectory(centers, weights)
+
+
+def crop_filter(trajectory: np.ndarray, aspect: float) -> str:
+    """
+    ``crop`` filter keeping the full height and a ``aspect`` (width/height)
+    wide slice that follows ``trajectory``. ``t`` must start at 0 at the
+    window start, as it does after input seeking.
+    """
+    step = max(1, int(round(KNOT_SECONDS * SAMPLE_FPS)))
+    knots = trajectory[::step]
+    times = np.arange(len(knots)) * step / SAMPLE_FPS
+
+    # A flat sum of pieces rather than nested if()s, which ffmpeg limits in depth
+    pieces = []
+    for i in range(len(knots) - 1):
+        t0, t1, c0, c1 = times[i], times[i + 1], knots[i], knots[i + 1]
+        pieces.append(f"gte(t,{t0:.3f})*lt(t,{t1:.3f})*({c0:.4f}{(c1 - c0) / (t1 - t0):+.5f}*(t-{t0:.3f}))")
+    pieces.append(f"gte(t,{times[-1]:.3f})*{knots[-1]:.4f}")
+    center = "+".join(pieces)
+
+    width = f"trunc(min(iw,ih*{aspect:.6f})/2)*2"
+    return f"crop=w='{width}':h=ih:x='clip(({center})*iw-ow/2,0,iw-ow)':y=0"
@@ -0,0 +1,146 @@
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import config
+from reframe import crop_filter
+
+PACKAGINGS = ("mp4", "hls")
+HLS_SEGMENT_SECONDS = 4
+
+
+class Rendition:
+    """
+    One output variant of a reel.
+
+    ``fit`` is "crop" (fill the frame, cutting the overflow) or "pad"
+    (letterbox the whole picture). ``max_bitrate`` caps the CRF encode so the
+    sizes form a usable bitrate ladder.
+    """
+
+    def __init__(self, name: str, width: int, height: int, fit: str = "crop",
+                 max_bitrate: Optional[str] = None, audio_bitrate: str = "128k"):
+        if fit not in ("crop", "pad"):
+            raise ValueError(f"Unknown fit '{fit}', expected 'crop' or 'pad'")
+        self.name = name
+        self.width = width
+        self.height = height
+        self.fit = fit
+        self.max_bitrate = max_bitrate
+        self.audio_bitrate = audio_bitrate
+
+    def filter_chain(self, trajectory: Optional[np.ndarray] = None) -> str:
+        """Scale/crop/pad chain; a crop follows ``trajectory`` (see reframe.py) instead of the center if given."""
+        w, h = self.width, self.height
+        if self.fit == "crop" and trajectory is not None:
+            # The tracked crop keeps the source height, so a source narrower than
+            # the rendition is still too tall: fill and center-crop as without it
+            return (f"{crop_filter(trajectory, w / h)},"
+                    f"scale={w}:{h}:force_original_aspect_ratio=increase,crop={w}:{h},setsar=1")
+        if self.fit == "crop":
+            return f"scale={w}:{h}:force_original_aspect_ratio=increase,crop={w}:{h},setsar=1"
+        return f"scale={w}:{h}:force_original_aspect_ratio=decrease,pad={w}:{h}:(ow-iw)/2:(oh-ih)/2,setsar=1"
+
+    def rate_args(self, stream: str = "v") -> List[str]:
+        if not self.max_bitrate:
+            return []
+        bufsize = f"{2 * float(self.max_bitrate[:-1]):g}{self.max_bitrate[-1]}"
+        return [f"-maxrate:{stream}", self.max_bitrate, f"-bufsize:{stream}", bufsize]
+
+
+RENDITION_PRESETS: Dict[str, Rendition] = {
+    'vertical_1080': Rendition('vertical_1080', 1080, 1920, max_bitrate="6M"),
+    'vertical_720': Rendition('vertical_720', 720, 1280, max_bitrate="3M"),
+    'vertical_540': Rendition('vertical_540', 540, 960, max_bitrate="1.5M", audio_bitrate="96k"),
+    'square_1080': Rendition('square_1080', 1080, 1080, max_bitrate="5M"),
+    'landscape_1080': Rendition('landscape_1080', 1920, 1080, fit="pad", max_bitrate="6M"),
+}
+
+
+def resolve_renditions(names: Sequence[str]) -> List[Rendition]:
+    renditions = []
+    for name in names:
+        if name not in RENDITION_PRESETS:
+            raise ValueError(f"Unknown rendition '{name}', expected one of {sorted(RENDITION_PRESETS)}")
+        renditions.append(RENDITION_PRESETS[name])
+    return renditions
+
+
+def filter_graph(renditions: List[Rendition], overlay: Optional[str] = None,
+                 trajectory: Optional[np.ndarray] = None) -> Tuple[str, List[str]]:
+    """
+    ``-filter_complex`` graph that splits the decoded video once into one
+    scale/crop/pad chain per rendition. ``overlay`` (e.g. a subtitles filter)
+    is applied after scaling so captions are laid out for each frame size.
+    ``trajectory`` makes the cropping renditions track the subject.
+    Returns the graph and the output labels in rendition order.
+    """
+    labels = [f"[v{i}]" for i in range(len(renditions))]
+    branches = "".join(f"[s{i}]" for i in range(len(renditions)))
+    chains = [f"[0:v]split={len(renditions)}{branches}"]
+    for i, rendition in enumerate(renditions):
+        chain = rendition.filter_chain(trajectory)
+        if overlay:
+            chain += "," + overlay
+        chains.append(f"[s{i}]{chain}{labels[i]}")
+    return ";".join(chains), labels
+
+
+def video_codec_args() -> List[str]:
+    """Encoder, preset and CRF of every reel encode, from config."""
+    return ["-c:v", config.FFMPEG_VIDEO_CODEC, "-preset", config.FFMPEG_VIDEO_PRESET,
+            "-crf", str(config.FFMPEG_VIDEO_CRF)]
+
+
+def rendition_paths(output_stem: str, renditions: List[Rendition]) -> List[str]:
+    """The first rendition keeps the plain ``<stem>.mp4`` name, the rest get a suffix."""
+    return [f"{output_stem}.mp4" if i == 0 else f"{output_stem}_{r.name}.mp4" for i, r in enumerate(renditions)]
+
+
+def mp4_outputs(renditions: List[Rendition], labels: List[str], output_stem: str,
+                subtitle_input: Optional[int] = None) -> Tuple[List[str], List[str]]:
+    """Output arguments writing one MP4 per rendition; returns (args, paths)."""
+    args: List[str] = []
+    paths = rendition_paths(output_stem, renditions)
+    for rendition, label, path in zip(renditions, labels, paths):
+        args += ["-map", label, "-map", "0:a?"]
+        if subtitle_input is not None:
+            args += ["-map", f"{subtitle_input}:s", "-c:s", "mov_text"]
+        args += video_codec_args() + rendition.rate_args()
+        args += ["-c:a", "aac", "-b:a", rendition.audio_bitrate, "-movflags", "+faststart", path]
+    return args, paths
+
+
+def hls_output(renditions: List[Rendition], labels: List[str], hls_dir: str,
+               has_audio: bool = True) -> Tuple[List[str], str]:
+    """
+    Output arguments packaging every rendition as one fMP4 HLS variant with
+    aligned keyframes, plus a master playlist. Returns (args, master path).
+    """
+    args: List[str] = []
+    stream_map = []
+    for i, (rendition, label) in enumerate(zip(renditions, labels)):
+        args += ["-map", label]
+        if has_audio:
+            args += ["-map", "0:a"]
+            args += [f"-b:a:{i}", rendition.audio_bitrate]
+        args += rendition.rate_args(f"v:{i}")
+        stream_map.append(f"v:{i},a:{i},name:{rendition.name}" if has_audio else f"v:{i},name:{rendition.name}")
+
+    args += video_codec_args() + [
+        "-c:a", "aac",
+        # Every variant must switch at the same instants
+        "-force_key_frames", f"expr:gte(t,n_forced*{HLS_SEGMENT_SECONDS})",
+        "-sc_threshold", "0",
+        "-f", "hls",
+        "-hls_time", str(HLS_SEGMENT_SECONDS),
+        "-hls_playlist_type", "vod",
+        "-hls_segment_type", "fmp4",
+        "-hls_flags", "independent_segments",
+        "-master_pl_name", "master.m3u8",
+        "-var_stream_map", " ".join(stream_map),
+        "-hls_segment_filename", os.path.join(hls_dir, "%v", "segment_%03d.m4s"),
+        os.path.join(hls_dir, "%v", "index.m3u8")
+    ]
+    return args, os.path.join(hls_dir, "master.m3u8")
@@ -14,6 +14,12 @@ pages = {
 
 choice = st.radio("Navigation", list(pages.keys()))
 
+@st.cache_resource(show_spinner=False)
+def load_page(path: str, mtime: float):
+    """Read and compile a page once; the mtime key recompiles it after an edit."""
+    with open(path, encoding="utf-8") as f:
+        return compile(f.read(), path, "exec")
+
 # Debug: show file path being loaded
 selected_file = pages[choice]
 st.caption(f"Loading: `{selected_file}`")
@@ -22,5 +28,5 @@ st.caption(f"Loading: `{selected_file}`")
 if not os.path.exists(selected_file):
     st.error(f"❌ File not found: `{selected_file}`")
 else:
-    with open(selected_file, encoding="utf-8") as f:
-        exec(f.read())
+    page = load_page(selected_file, os.path.getmtime(selected_file))
+    exec(page, {"__name__": "__main__", "__file__": selected_file})
@@ -0,0 +1,151 @@
+import subprocess
+import threading
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+import config
+from metrics import REGISTRY
+
+WIDTH, HEIGHT = 64, 36
+FPS = 5  # frames sampled per second of video
+HIST_BINS = 16
+BLOCK_FRAMES = 600  # two minutes of samples per read
+
+
+def frame_scores(frames: np.ndarray, previous: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Change score in [0, 1] between each frame and the one before it (the
+    first against ``previous``, or 0 without one): the mean of the L1
+    gray-histogram distance, which ignores motion, and the mean absolute
+    pixel difference, which catches cuts between similarly lit shots.
+    """
+    if previous is not None:
+        frames = np.concatenate([previous[None], frames])
+    flat = frames.reshape(len(frames), -1)
+
+    # Histograms of every frame at once: offset each frame's bin indices into its own range
+    bins = (flat >> 4).astype(np.int64) + (np.arange(len(flat)) * HIST_BINS)[:, None]
+    hist = np.bincount(bins.ravel(), minlength=len(flat) * HIST_BINS).reshape(len(flat), HIST_BINS)
+    hist = hist / flat.shape[1]
+
+    hist_diff = np.abs(np.diff(hist, axis=0)).sum(axis=1) / 2
+    pixel_diff = np.abs(np.diff(flat.astype(np.int16), axis=0)).mean(axis=1) / 255
+    scores = (hist_diff + pixel_diff) / 2
+    return scores if previous is not None else np.concatenate([[0.0], scores])
+
+
+def detect_cuts(scores: np.ndarray, threshold: Optional[float] = None) -> np.ndarray:
+    """Sample indices whose score clears ``threshold`` and is a local maximum (one cut per transition)."""
+    threshold = config.SCENE_THRESHOLD if threshold is None else threshold
+    if len(scores) < 2:
+        return np.zeros(0, dtype=np.int64)
+    padded = np.pad(scores, 1)
+    peak = (scores >= padded[:-2]) & (scores > padded[2:])
+    return np.flatnonzero(peak & (scores >= threshold))
+
+
+class SceneIndexBuild:
+    """
+    Shot boundaries of a video, computed in a background thread.
+
+    ffmpeg decodes only reference frames, skips the loop filter and hands over
+    WIDTH x HEIGHT gray frames at FPS, so the index builds far faster than
+    realtime; ``result()`` waits for it and returns the cut times (seconds,
+    float32). ``cancel()`` kills ffmpeg.
+    """
+
+    def __init__(self, video_path: str, threads: int = 2):
+        self.video_path = video_path
+        self.threads = threads
+        self._cuts = np.zeros(0, dtype=np.float32)
+        self._error: Optional[BaseException] = None
+        self._process: Optional[subprocess.Popen] = None
+        self._cancelled = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        started = time.time()
+        frame_bytes = WIDTH * HEIGHT
+        try:
+            self._process = subprocess.Popen([
+                "ffmpeg",
+                "-hide_banner", "-loglevel", "error",
+                "-skip_frame", "nonref",
+                "-skip_loop_filter", "all",
+                "-threads", str(self.threads),
+                "-i", self.video_path,
+                "-an", "-sn", "-dn",
+                "-vf", f"fps={FPS},scale={WIDTH}:{HEIGHT}:flags=area,format=gray",
+                "-f", "rawvideo",
+                "-"
+            ], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+            if self._cancelled:
+                self._process.kill()
+
+            cuts, previous, offset = [], None, 0
+            while True:
+                data = self._process.stdout.read(frame_bytes * BLOCK_FRAMES)
+                count = len(data) // frame_bytes
+                if count == 0:
+                    break
+                frames = np.frombuffer(data[:count * frame_bytes], dtype=np.uint8).reshape(count, HEIGHT, WIDTH)
+                scores = frame_scores(frames, previous)
+                # Each block's first score compares against the previous block's last frame
+                cuts.append(detect_cuts(scores) + offset)
+                previous, offset = frames[-1], offset + count
+            self._process.wait()
+
+            if self._process.returncode != 0 and not self._cancelled:
+                raise Exception(f"Scene index of {self.video_path} failed with exit code {self._process.returncode}")
+            if cuts:
+                indices = np.concatenate(cuts)
+                # A transition straddling two blocks can peak on both sides of the edge
+                keep = np.concatenate([[True], np.diff(indices) > 2]) if len(indices) else indices.astype(bool)
+                self._cuts = (indices[keep] / FPS).astype(np.float32)
+            elapsed = time.time() - started
+            REGISTRY.observe("reelify_stage_seconds", elapsed, {'stage': 'scene_index'})
+            if elapsed > 0 and offset:
+                REGISTRY.observe("reelify_scene_index_realtime_factor", offset / FPS / elapsed)
+        except BaseException as e:
+            self._error = e
+
+    def result(self, timeout: Optional[float] = None) -> np.ndarray:
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            raise TimeoutError(f"Scene index of {self.video_path} still running after {timeout}s")
+        if self._error is not None:
+            raise self._error
+        return self._cuts
+
+    def cancel(self):
+        self._cancelled = True
+        if self._process is not None and self._process.poll() is None:
+            self._process.kill()
+
+
+def snap_window(start: float, end: float, cuts: np.ndarray, max_duration: float,
+                tolerance: Optional[float] = None) -> Tuple[float, float]:
+    """
+    Move a reel's start and end to the nearest shot boundary within
+    ``tolerance`` seconds, never making it longer than ``max_duration``.
+    Boundaries without a cut nearby stay where they are.
+    """
+    tolerance = config.SCENE_SNAP_TOLERANCE if tolerance is None else tolerance
+    if cuts is None or len(cuts) == 0 or tolerance <= 0:
+        return start, end
+
+    def nearest(t: float, upper: float) -> Optional[float]:
+        near = cuts[(np.abs(cuts - t) <= tolerance) & (cuts <= upper)]
+        return float(near[np.argmin(np.abs(near - t))]) if len(near) else None
+
+    snapped_start = nearest(start, end)
+    if snapped_start is not None:
+        start = max(0.0, snapped_start)
+        end = min(end, start + max_duration)
+    snapped_end = nearest(end, start + max_duration)
+    if snapped_end is not None and snapped_end > start:
+        end = snapped_end
+    return start, end
@@ -0,0 +1,398 @@
+import contextvars
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, slots and admission are shared within the process only
+    fcntl = None
+
+import config
+from metrics import REGISTRY, current_span
+from progress import current_job
+
+RESOURCES = ("asr", "encode")
+
+_job_context: contextvars.ContextVar = contextvars.ContextVar("reelify_scheduler_job", default=("anonymous", 0))
+_file_seq = itertools.count()
+
+# Node-level waits poll lock files, backing off from the first interval to the last
+POLL_INITIAL_SECONDS = 0.05
+POLL_MAX_SECONDS = 1.0
+
+
+class SchedulerBusy(Exception):
+    """Raised at submission time when the node is already saturated (backpressure)."""
+
+
+class Grant:
+    """A granted slot: which resource and how many CPU threads the holder may use."""
+
+    def __init__(self, resource: str, threads: int, waited: float):
+        self.resource = resource
+        self.threads = threads
+        self.waited = waited
+
+
+class _Waiter:
+    def __init__(self, resource: str, user: str, priority: int, threads: int, seq: int):
+        self.resource = resource
+        self.user = user
+        self.priority = priority
+        self.threads = threads
+        self.seq = seq
+
+
+def _hold_file(directory: str, content: str) -> Tuple[int, str]:
+    """
+    Create a file in ``directory`` holding ``content`` and keep it flock'ed;
+    the lock marks its owner as alive. Returns the descriptor and path.
+    """
+    name = f"{os.getpid()}.{next(_file_seq)}"
+    temp = os.path.join(directory, f".{name}")
+    fd = os.open(temp, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    os.write(fd, content.encode())
+    # Appears under its final name only once locked, so it is never mistaken for stale
+    path = os.path.join(directory, name)
+    os.replace(temp, path)
+    return fd, path
+
+
+def _drop_file(fd: int, path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    os.close(fd)
+
+
+def _held_files(directory: str) -> List[Tuple[str, str]]:
+    """``(name, content)`` of the files in ``directory`` whose owner is alive; the others are removed."""
+    held = []
+    for name in os.listdir(directory):
+        if name.startswith("."):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except FileNotFoundError:
+            continue
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+            except BlockingIOError:
+                held.append((name, os.pread(fd, 4096, 0).decode(errors="replace")))
+                continue
+            # Nobody holds it: its owner exited without cleaning up
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        finally:
+            os.close(fd)
+    return held
+
+
+class _NodeSlots:
+    """
+    Node-wide counting semaphore built from ``count`` flock'ed files.
+
+    Every process on the host that uses the same directory shares the cap, and
+    the kernel drops a slot automatically if its holder dies. Waiters queue as
+    ticket files served by priority, then by slots their user already holds on
+    the node, then arrival; only the first ``count`` tickets try for a slot.
+    """
+
+    def __init__(self, directory: str, resource: str, count: int):
+        os.makedirs(directory, exist_ok=True)
+        self.count = count
+        self.paths = [os.path.join(directory, f"{resource}.{i}.lock") for i in range(count)]
+        self.queue_dir = os.path.join(directory, f"{resource}.queue")
+        os.makedirs(self.queue_dir, exist_ok=True)
+
+    def _slots_by_user(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for path in self.paths:
+            try:
+                with open(path) as f:
+                    user = f.read().strip()
+            except OSError:
+                continue
+            if user:
+                counts[user] = counts.get(user, 0) + 1
+        return counts
+
+    def _front(self) -> List[str]:
+        """Names of the tickets currently allowed to try for a slot."""
+        running = self._slots_by_user()
+        tickets = []
+        for name, content in _held_files(self.queue_dir):
+            try:
+                priority, arrived, user = content.split(" ", 2)
+                tickets.append(((-int(priority), running.get(user, 0), float(arrived)), name))
+            except ValueError:
+                continue
+        return [name for _, name in sorted(tickets)[:self.count]]
+
+    def _try_slot(self, user: str) -> Optional[int]:
+        for path in self.paths:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue
+            # The holder's user, read by waiters for fair share
+            os.ftruncate(fd, 0)
+            os.pwrite(fd, user.encode(), 0)
+            return fd
+        return None
+
+    def acquire(self, user: str = "anonymous", priority: int = 0, should_stop=None) -> int:
+        ticket_fd, ticket = _hold_file(self.queue_dir, f"{priority} {time.time()} {user}")
+        try:
+            delay = POLL_INITIAL_SECONDS
+            while True:
+                if os.path.basename(ticket) in self._front():
+                    fd = self._try_slot(user)
+                    if fd is not None:
+                        return fd
+                if should_stop is not None:
+                    should_stop()
+                time.sleep(delay)
+                delay = min(delay * 2, POLL_MAX_SECONDS)
+        finally:
+            _drop_file(ticket_fd, ticket)
+
+    @staticmethod
+    def release(fd: int):
+        os.ftruncate(fd, 0)
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+class _NodeJobs:
+    """Jobs admitted by every process on the host: one flock'ed file per job, naming its user."""
+
+    def __init__(self, directory: str):
+        self.directory = os.path.join(directory, "jobs")
+        os.makedirs(self.directory, exist_ok=True)
+        self.guard_path = os.path.join(directory, "admit.lock")
+
+    @contextmanager
+    def guarded(self) -> Iterator[None]:
+        """Serialise count-then-register across processes."""
+        fd = os.open(self.guard_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for _, user in _held_files(self.directory):
+            counts[user] = counts.get(user, 0) + 1
+        return counts
+
+    def register(self, user: str) -> Tuple[int, str]:
+        return _hold_file(self.directory, user)
+
+
+class ResourceScheduler:
+    """
+    Admission control for the CPU-heavy parts of process_video.
+
+    Stages take an ``asr`` or ``encode`` slot before running. The scheduler caps
+    concurrent transcriptions, concurrent encodes and the total number of CPU
+    threads handed out, so parallel jobs queue instead of thrashing each other.
+    Waiting stages are served by priority, then by fair share (the user with the
+    fewest running, then fewest already served, stages goes first), then in
+    arrival order. ``admit`` applies
+    backpressure when too many jobs are already queued. With a node lock
+    directory (not available on Windows), slots and admission limits are shared
+    by every process on the host.
+    """
+
+    def __init__(self, max_asr: int, max_encodes: int, max_threads: int, asr_threads: int,
+                 encode_threads: int, max_pending_jobs: int, max_jobs_per_user: int,
+                 node_lock_dir: Optional[str] = None):
+        self.capacity = {'asr': max(1, max_asr), 'encode': max(1, max_encodes)}
+        self.thread_cost = {'asr': max(1, asr_threads), 'encode': max(1, encode_threads)}
+        self.max_threads = max(1, max_threads)
+        self.max_pending_jobs = max_pending_jobs
+        self.max_jobs_per_user = max_jobs_per_user
+
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._waiting: List[_Waiter] = []
+        self._running = {resource: 0 for resource in RESOURCES}
+        self._threads_in_use = 0
+        self._user_running: Dict[str, int] = {}
+        self._user_served: Dict[str, int] = {}
+        self._jobs_by_user: Dict[str, int] = {}
+
+        self._node_slots = None
+        self._node_jobs = None
+        if node_lock_dir and fcntl is not None:
+            self._node_slots = {
+                resource: _NodeSlots(node_lock_dir, resource, self.capacity[resource])
+                for resource in RESOURCES
+            }
+            self._node_jobs = _NodeJobs(node_lock_dir)
+
+    @contextmanager
+    def admit(self, user: str = "anonymous", priority: int = 0, headless: bool = False) -> Iterator[None]:
+        """
+        Register a job for ``user``; its stages then acquire slots under that
+        user and priority. Raises SchedulerBusy instead of queueing unboundedly.
+        ``headless`` callers (batch workers) are not held to the per-user limit
+        and wait for admission instead of being refused, since nobody is there
+        to retry.
+        """
+        node_job = None
+        delay = POLL_INITIAL_SECONDS
+        while True:
+            with self._cond:
+                if self._node_jobs is not None:
+                    # Limits count the jobs of every process on the host
+                    with self._node_jobs.guarded():
+                        refusal = self._refusal(user, self._node_jobs.counts(), headless)
+                        if refusal is None:
+                            node_job = self._node_jobs.register(user)
+                else:
+                    refusal = self._refusal(user, self._jobs_by_user, headless)
+                if refusal is None:
+                    self._jobs_by_user[user] = self._jobs_by_user.get(user, 0) + 1
+                    break
+            reason, message = refusal
+            if not headless:
+                REGISTRY.inc("reelify_jobs_rejected_total", labels={'reason': reason})
+                raise SchedulerBusy(message)
+            time.sleep(delay)
+            delay = min(delay * 2, POLL_MAX_SECONDS)
+
+        token = _job_context.set((user, priority))
+        try:
+            yield
+        finally:
+            _job_context.reset(token)
+            if node_job is not None:
+                _drop_file(*node_job)
+            with self._cond:
+                self._jobs_by_user[user] -= 1
+                if not self._jobs_by_user[user]:
+                    del self._jobs_by_user[user]
+                    self._user_served.pop(user, None)
+
+    def _refusal(self, user: str, jobs_by_user: Dict[str, int], headless: bool) -> Optional[Tuple[str, str]]:
+        """``(reason, message)`` when a job of ``user`` cannot be admitted now, else None."""
+        total_jobs = sum(jobs_by_user.values())
+        if self.max_pending_jobs and total_jobs >= self.max_pending_jobs:
+            return 'node_busy', f"Server is busy ({total_jobs} jobs in progress), please retry later"
+        if not headless and self.max_jobs_per_user and jobs_by_user.get(user, 0) >= self.max_jobs_per_user:
+            return 'user_limit', f"You already have {jobs_by_user[user]} jobs running, wait for one to finish"
+        return None
+
+    def _next_for(self, resource: str) -> Optional[_Waiter]:
+        candidates = [w for w in self._waiting if w.resource == resource]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda w: (-w.priority, self._user_running.get(w.user, 0),
+                                              self._user_served.get(w.user, 0), w.seq))
+
+    def _can_run(self, waiter: _Waiter) -> bool:
+        if self._running[waiter.resource] >= self.capacity[waiter.resource]:
+            return False
+        # An oversized request still runs when the node is otherwise idle
+        if self._threads_in_use and self._threads_in_use + waiter.threads > self.max_threads:
+            return False
+        return self._next_for(waiter.resource) is waiter
+
+    @contextmanager
+    def acquire(self, resource: str) -> Iterator[Grant]:
+        """Block until a slot for ``resource`` is free; yields the Grant."""
+        user, priority = _job_context.get()
+        job = current_job()
+        waiter = _Waiter(resource, user, priority, self.thread_cost[resource], next(self._seq))
+        started = time.time()
+
+        with self._cond:
+            self._waiting.append(waiter)
+            try:
+                while not self._can_run(waiter):
+                    if job is not None:
+                        job.check_cancelled()
+                    self._cond.wait(timeout=0.5)
+            except BaseException:
+                self._waiting.remove(waiter)
+                self._cond.notify_all()
+                raise
+            self._waiting.remove(waiter)
+            self._running[resource] += 1
+            self._threads_in_use += waiter.threads
+            self._user_running[user] = self._user_running.get(user, 0) + 1
+            self._user_served[user] = self._user_served.get(user, 0) + 1
+
+        node_fd = None
+        try:
+            if self._node_slots is not None:
+                node_fd = self._node_slots[resource].acquire(user, priority,
+                                                             job.check_cancelled if job is not None else None)
+
+            waited = time.time() - started
+            REGISTRY.observe("reelify_slot_wait_seconds", waited, {'resource': resource})
+            active = current_span()
+            if active is not None:
+                active.set(**{f"{resource}_wait_seconds": round(waited, 3)})
+            yield Grant(resource, waiter.threads, waited)
+        finally:
+            if node_fd is not None:
+                _NodeSlots.release(node_fd)
+            with self._cond:
+                self._running[resource] -= 1
+                self._threads_in_use -= waiter.threads
+                self._user_running[user] -= 1
+                if not self._user_running[user]:
+                    del self._user_running[user]
+                self._cond.notify_all()
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._cond:
+            return {
+                'running': dict(self._running),
+                'waiting': len(self._waiting),
+                'threads_in_use': self._threads_in_use,
+                'jobs': sum(self._jobs_by_user.values())
+            }
+
+
+_scheduler: Optional[ResourceScheduler] = None
+_scheduler_guard = threading.Lock()
+
+
+def get_scheduler() -> ResourceScheduler:
+    """The process-wide scheduler, built from config on first use."""
+    global _scheduler
+    with _scheduler_guard:
+        if _scheduler is None:
+            max_threads = config.SCHED_MAX_THREADS or os.cpu_count() or 1
+            asr_threads = config.SCHED_ASR_THREADS or config.WHISPER_THREADS or min(4, max_threads)
+            encode_threads = config.SCHED_ENCODE_THREADS
+            _scheduler = ResourceScheduler(
+                max_asr=config.SCHED_MAX_CONCURRENT_ASR or max_threads // asr_threads,
+                max_encodes=config.SCHED_MAX_CONCURRENT_ENCODES or max_threads // encode_threads,
+                max_threads=max_threads,
+                asr_threads=asr_threads,
+                encode_threads=encode_threads,
+                max_pending_jobs=config.SCHED_MAX_PENDING_JOBS,
+                max_jobs_per_user=config.SCHED_MAX_JOBS_PER_USER,
+                node_lock_dir=str(config.SCHED_NODE_LOCK_DIR) if config.SCHED_NODE_LOCK_DIR else None
+            )
+        return _scheduler
@@ -0,0 +1,239 @@
+"""
+Typed runtime settings.
+
+Every tunable value is declared once in SETTINGS with its type, default and
+environment variable. ``load_settings`` starts from the defaults, applies a
+JSON profile (REELIFY_PROFILE, default ``reelify.json`` in the working
+directory, as written by ``reelify tune``) and then the environment, so each
+node type can be tuned without touching code. config.py exposes the result as
+module constants, which is how the rest of the code reads them.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+PROFILE_ENV = "REELIFY_PROFILE"
+DEFAULT_PROFILE = "reelify.json"
+
+MB = 1024 * 1024
+GB = 1024 * MB
+
+
+class Setting:
+    """One tunable value: ``kind`` is int, float, bool, str, Path or list (comma-separated in the environment)."""
+
+    def __init__(self, name: str, kind: type, default: Any, help: str, env: Optional[str] = None):
+        self.name = name
+        self.kind = kind
+        self.default = default
+        self.help = help
+        self.env = env or f"REELIFY_{name}"
+
+    def parse(self, value: Any) -> Any:
+        """Convert a profile or environment value; None and "" mean the default for optional paths."""
+        if self.kind is bool:
+            if isinstance(value, bool):
+                return value
+            text = str(value).strip().lower()
+            if text in ("1", "true", "yes", "on"):
+                return True
+            if text in ("0", "false", "no", "off", ""):
+                return False
+            raise ValueError(f"Setting {self.name} expects a boolean, got '{value}'")
+        if self.kind is list:
+            if isinstance(value, list):
+                return [str(item) for item in value]
+            return [item.strip() for item in str(value).split(",") if item.strip()]
+        if self.kind is Path:
+            return Path(value) if value not in (None, "") else None
+        try:
+            return self.kind(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Setting {self.name} expects {self.kind.__name__}, got '{value}'")
+
+
+SETTINGS: List[Setting] = [
+    # Files and scratch space
+    Setting("TEMP_DIR", Path, Path("temp"), "Root of scratch data"),
+    Setting("OUTPUT_DIR", Path, Path("output"), "Generated reels, one folder per job"),
+    Setting("SCRATCH_DIR", Path, None, "Job workspaces (default TEMP_DIR/jobs)"),
+    Setting("TMPFS_DIR", str, "/dev/shm", "RAM-backed dir for hot intermediates, empty to disable"),
+    Setting("TMPFS_MAX_FILE_SIZE", int, 256 * MB, "Larger hot files fall back to disk"),
+    Setting("JOB_DISK_QUOTA", int, 4 * GB, "Bytes a job may write (scratch, tmpfs and its reels), 0 to disable"),
+    Setting("WORKSPACE_MAX_AGE", int, 24 * 60 * 60, "Seconds before an abandoned workspace is swept"),
+    Setting("THUMBNAIL_DIR", Path, None, "Keyframe sprite cache (default TEMP_DIR/thumbnails)"),
+    Setting("THUMBNAIL_CACHE_MAX_BYTES", int, 1 * GB, "Oldest sprite sheets are evicted beyond this, 0 = unbounded"),
+    Setting("THUMBNAIL_URL_PREFIXES", list, [],
+            "Reel URL prefixes /api/thumbnails may fetch (e.g. the Supabase storage URL); empty disables it"),
+    Setting("MODEL_DIR", Path, Path("models"), "Converted, memory-mappable Whisper checkpoints"),
+    Setting("DATABASE_PATH", str, "app_database.db", "SQLite database"),
+    Setting("SQLITE_CACHE_KB", int, 0, "SQLite page cache per pooled connection, 0 = SQLite default"),
+
+    # Whisper
+    Setting("WHISPER_MODEL", str, "base", "tiny, base, small, medium or large"),
+    Setting("WHISPER_PRECISION", str, "fp32", "fp32, or int8 for quantized CPU inference"),
+    Setting("WHISPER_THREADS", int, 0, "torch intra-op threads, 0 = all cores"),
+    Setting("WHISPER_INTEROP_THREADS", int, 1, "torch inter-op threads"),
+    Setting("WHISPER_MMAP", bool, True, "Load converted checkpoints memory-mapped, see model_store.py"),
+    Setting("WHISPER_CASCADE", bool, False, "Draft-transcribe everything, refine reel windows only"),
+    Setting("WHISPER_DRAFT_MODEL", str, "tiny", "Full-file model used for segment selection in cascade mode"),
+    Setting("TRANSCRIBE_WINDOW_SECONDS", int, 120, "Audio per Whisper call; progress and cancellation happen between windows"),
+    Setting("TRANSCRIBE_PROMPT_CHARS", int, 200, "Trailing transcript text carried into the next window"),
+    Setting("TRANSCRIBE_OVERLAP_SECONDS", int, 4, "Audio shared by consecutive windows"),
+    Setting("CASCADE_PADDING_SECONDS", int, 5, "Extra audio decoded around each reel window when refining"),
+    Setting("AUDIO_HIGHLIGHTS", bool, True, "Score segments by loudness, flux and onsets"),
+
+    # Reels and encoding
+    Setting("DEFAULT_REEL_DURATION", int, 30, "Seconds"),
+    Setting("CAPTIONS", str, "", "burn, soft or empty for none"),
+    Setting("REEL_RENDITIONS", list, [], "e.g. vertical_1080,square_1080; empty = source size only",
+            env="REELIFY_RENDITIONS"),
+    Setting("REEL_PACKAGING", str, "mp4", "mp4 or hls", env="REELIFY_PACKAGING"),
+    Setting("FFMPEG_VIDEO_CODEC", str, "libx264", "Video encoder for reels"),
+    Setting("FFMPEG_VIDEO_CRF", int, 23, "Encoder quality (constant rate factor)"),
+    Setting("FFMPEG_VIDEO_PRESET", str, "medium", "Encoder speed/size trade-off"),
+    Setting("REFRAME", bool, False, "Crop reels around the tracked subject instead of the frame center"),
+    Setting("SCENE_INDEX", bool, True, "Snap reel boundaries to shot changes, see scene_index.py"),
+    Setting("SCENE_THRESHOLD", float, 0.3, "Change score (0-1) above which consecutive samples are a cut"),
+    Setting("SCENE_SNAP_TOLERANCE", float, 1.5, "Seconds a reel boundary may move to reach a cut"),
+
+    # Workers and CPU scheduling (0 = derive from cores)
+    Setting("BATCH_JOBS", int, 0, "Worker processes of `reelify batch`, 0 = half the cores"),
+    Setting("PARALLEL_ENCODE_WORKERS", int, 0, "Concurrent pieces in parallel_encode, 0 = half the cores"),
+    Setting("SCHED_MAX_THREADS", int, 0, "CPU threads handed out at once, 0 = all cores", env="REELIFY_MAX_THREADS"),
+    Setting("SCHED_ASR_THREADS", int, 0, "Threads per transcription, 0 = WHISPER_THREADS or 4",
+            env="REELIFY_ASR_THREADS"),
+    Setting("SCHED_ENCODE_THREADS", int, 2, "ffmpeg -threads per encode", env="REELIFY_ENCODE_THREADS"),
+    Setting("SCHED_MAX_CONCURRENT_ASR", int, 0, "0 = MAX_THREADS / ASR_THREADS", env="REELIFY_MAX_CONCURRENT_ASR"),
+    Setting("SCHED_MAX_CONCURRENT_ENCODES", int, 0, "0 = MAX_THREADS / ENCODE_THREADS",
+            env="REELIFY_MAX_CONCURRENT_ENCODES"),
+    Setting("SCHED_MAX_PENDING_JOBS", int, 16, "Admitted jobs before new ones are refused",
+            env="REELIFY_MAX_PENDING_JOBS"),
+    Setting("SCHED_MAX_JOBS_PER_USER", int, 2, "Admitted jobs per user", env="REELIFY_MAX_JOBS_PER_USER"),
+    Setting("SCHED_NODE_LOCKS", bool, True, "Share slots between all processes on the host"),
+    Setting("SCHED_NODE_LOCK_DIR", Path, None, "Slot lock files (default TEMP_DIR/slots)"),
+
+    # API
+    Setting("API_HOST", str, "127.0.0.1", "Flask API bind address"),
+    Setting("API_PORT", int, 5000, "0 disables the background server"),
+    Setting("API_PUBLIC_URL", str, "", "API address used in browser links; empty = http://API_HOST:API_PORT"),
+    Setting("API_SECRET", str, "", "Bearer secret of server-to-server calls (job submission); empty disables them"),
+    Setting("API_TOKEN_TTL", int, 3600, "Seconds a user's signed API link (ZIP export, thumbnails) stays valid"),
+    Setting("SUPABASE_JWT_SECRET", str, "", "Lets the API accept the React frontend's Supabase session tokens"),
+
+    # Cluster (see distributed.py)
+    Setting("CLUSTER_DIR", Path, None, "Shared by every host, same mount path (default TEMP_DIR/cluster)"),
+    Setting("SHARD_SECONDS", int, 600, "Source length transcribed per worker task"),
+    Setting("SHARD_OVERLAP_SECONDS", int, 2, "Audio re-read before each shard"),
+    Setting("TASK_LEASE_SECONDS", int, 60, "A task whose worker stops heartbeating this long is re-queued"),
+    Setting("HEARTBEAT_SECONDS", int, 15, "Worker heartbeat interval"),
+    Setting("TASK_MAX_ATTEMPTS", int, 3, "Attempts before a task fails its job"),
+
+    # Duplicate detection (see fingerprint.py)
+    Setting("FINGERPRINT_ENABLED", bool, True, "Reuse transcripts of re-encoded duplicates", env="REELIFY_FINGERPRINT"),
+    Setting("FINGERPRINT_MIN_COVERAGE", float, 0.9, "Share of the upload that must line up with the indexed video"),
+    Setting("FINGERPRINT_MIN_SCORE", float, 0.6, "Audio energy correlation at the best offset"),
+    Setting("FINGERPRINT_MIN_CHROMA", float, 0.8, "Mean chroma cosine similarity at that offset"),
+]
+
+_BY_NAME = {setting.name: setting for setting in SETTINGS}
+
+
+def profile_path() -> Path:
+    return Path(os.getenv(PROFILE_ENV, DEFAULT_PROFILE))
+
+
+def read_profile(path: Path) -> Dict[str, Any]:
+    """Parsed values of a JSON profile; unknown names are an error so typos don't go unnoticed."""
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    unknown = sorted(set(raw) - set(_BY_NAME))
+    if unknown:
+        raise ValueError(f"Unknown settings in {path}: {', '.join(unknown)}")
+    return {name: _BY_NAME[name].parse(value) for name, value in raw.items()}
+
+
+def load_settings(path: Optional[Path] = None) -> Dict[str, Any]:
+    """Defaults, overridden by the profile file (if it exists), overridden by the environment."""
+    values = {setting.name: setting.default for setting in SETTINGS}
+    path = path or profile_path()
+    if path.exists():
+        values.update(read_profile(path))
+    for setting in SETTINGS:
+        if setting.env in os.environ:
+            values[setting.name] = setting.parse(os.environ[setting.env])
+    return values
+
+
+def write_profile(values: Dict[str, Any], path: Path):
+    """Store settings as a JSON profile, validating names and types first."""
+    serializable = {}
+    for name, value in values.items():
+        if name not in _BY_NAME:
+            raise ValueError(f"Unknown setting {name}")
+        value = _BY_NAME[name].parse(value)
+        serializable[name] = str(value) if isinstance(value, Path) else value
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(serializable, f, indent=2)
+        f.write("\n")
+
+
+def detect_hardware() -> Dict[str, Any]:
+    """Usable cores (respecting CPU affinity) and physical memory of this host."""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    try:
+        memory = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        memory = 0
+    return {'cores': cores, 'memory_bytes': memory}
+
+
+# Rough resident size of one transcription (weights are shared when memory-mapped,
+# activations and decoding state are not), by model
+_ASR_MEMORY = {'tiny': 0.5 * GB, 'base': 0.8 * GB, 'small': 1.5 * GB, 'medium': 3 * GB, 'large': 6 * GB}
+
+
+def recommend_profile(cores: int, memory_bytes: int) -> Dict[str, Any]:
+    """
+    Settings for a host with ``cores`` CPUs and ``memory_bytes`` of RAM.
+
+    Transcriptions get 4 threads each (Whisper on CPU stops scaling beyond
+    that) and as many run at once as both cores and memory allow, keeping a
+    quarter of the memory for ffmpeg and the page cache. Encoders get 2
+    threads each. Small hosts use int8 Whisper; larger ones afford a bigger
+    model.
+    """
+    memory_gb = memory_bytes / GB if memory_bytes else 4.0
+    if memory_gb >= 32 and cores >= 16:
+        model = "small"
+    elif memory_gb >= 4:
+        model = "base"
+    else:
+        model = "tiny"
+
+    asr_threads = max(1, min(4, cores))
+    by_memory = int(memory_gb * GB * 0.75 // _ASR_MEMORY[model])
+    concurrent_asr = max(1, min(cores // asr_threads, by_memory))
+    encode_threads = 2 if cores >= 4 else 1
+
+    return {
+        'WHISPER_MODEL': model,
+        'WHISPER_PRECISION': "int8" if cores <= 4 else "fp32",
+        'WHISPER_THREADS': asr_threads,
+        'WHISPER_INTEROP_THREADS': 1,
+        'SCHED_MAX_THREADS': cores,
+        'SCHED_ASR_THREADS': asr_threads,
+        'SCHED_MAX_CONCURRENT_ASR': concurrent_asr,
+        'SCHED_ENCODE_THREADS': encode_threads,
+        'SCHED_MAX_CONCURRENT_ENCODES': max(1, cores // encode_threads // 2),
+        'BATCH_JOBS': concurrent_asr,
+        'PARALLEL_ENCODE_WORKERS': max(2, cores // 2),
+        'TMPFS_MAX_FILE_SIZE': 256 * MB if memory_gb >= 8 else 64 * MB,
+        'THUMBNAIL_CACHE_MAX_BYTES': 1 * GB,
+        'SQLITE_CACHE_KB': 16384 if memory_gb >= 8 else 4096,
+    }
@@ -3,6 +3,11 @@ import streamlit as st
 import subprocess
 from pathlib import Path
 
+import config
+from parallel_encode import encode_parallel
+from renditions import video_codec_args
+from workspace import JobWorkspace
+
 st.set_page_config(page_title="Video Processor", layout="centered")
 st.title("Video Processing & Audio Extractor")
 
@@ -11,11 +16,17 @@ uploaded_file = st.file_uploader(
     type=["mp4", "mov", "avi", "mkv", "mpeg4"]
 )
 
+# Each session gets its own workspace so concurrent users never share files;
+# abandoned ones are swept by cleanup_stale_workspaces() after WORKSPACE_MAX_AGE.
+if "workspace" not in st.session_state:
+    st.session_state.workspace = JobWorkspace(keep=True)
+workspace = st.session_state.workspace
+
 if uploaded_file:
     # Save the uploaded video
-    input_path = "input_video.mp4"
+    input_path = workspace.path("input_video.mp4")
     with open(input_path, "wb") as f:
-        f.write(uploaded_file.read())
+        f.write(uploaded_file.getbuffer())
 
     st.success("Video uploaded successfully!")
 
@@ -25,29 +36,45 @@ if uploaded_file:
         st.stop()
 
     
-    audio_output = "audio.wav"
+    audio_output = workspace.path("audio.wav", hot=True, size_hint=uploaded_file.size * 2)
     st.subheader("🎧 Step 1: Extracting Audio")
-    audio_cmd = f'ffmpeg -i {input_path} -q:a 0 -map a {audio_output} -y'
-    result = subprocess.run(audio_cmd, shell=True, capture_output=True, text=True)
+    audio_cmd = ["ffmpeg", "-i", input_path, "-q:a", "0", "-map", "a", audio_output, "-y"]
+    try:
+        result = subprocess.run(audio_cmd, capture_output=True, text=True)
 
-    if result.returncode != 0:
-        st.error("Audio extraction failed:")
-        st.code(result.stderr)
-    else:
-        st.audio(audio_output)
-        st.success("Audio extracted successfully.")
+        if result.returncode != 0:
+            st.error("Audio extraction failed:")
+            st.code(result.stderr)
+        else:
+            with open(audio_output, "rb") as f:
+                st.audio(f.read(), format="audio/wav")
+            st.success("Audio extracted successfully.")
+    finally:
+        # The player holds its own copy; don't leave the hot file in tmpfs
+        # until the kept workspace is swept
+        Path(audio_output).unlink(missing_ok=True)
 
 
-    resized_video = "resized_video.mp4"
+    resized_video = workspace.path("resized_video.mp4")
     st.subheader("Step 2: Resizing to 1080x1920 (Reel format)")
-    resize_cmd = (
-        f'ffmpeg -i {input_path} '
-        f'-vf "scale=1080:-2,pad=1080:1920:(ow-iw)/2:(oh-ih)/2" '
-        f'{resized_video} -y'
-    )
-    result = subprocess.run(resize_cmd, shell=True, capture_output=True, text=True)
-
-    if result.returncode != 0:
+    vf = "scale=1080:-2,pad=1080:1920:(ow-iw)/2:(oh-ih)/2"
+    resize_cmd = [
+        "ffmpeg", "-i", input_path,
+        "-vf", vf,
+        *video_codec_args(), "-threads", str(config.SCHED_ENCODE_THREADS),
+        resized_video, "-y"
+    ]
+    result = None
+    if st.checkbox("⚡ Parallel encode (splits the video at keyframes across all cores)"):
+        try:
+            encode_parallel(input_path, resized_video, vf, video_codec_args())
+        except Exception as e:
+            st.warning(f"Parallel encode failed, falling back to a single encode: {e}")
+            result = subprocess.run(resize_cmd, capture_output=True, text=True)
+    else:
+        result = subprocess.run(resize_cmd, capture_output=True, text=True)
+
+    if result is not None and result.returncode != 0:
         st.error("Video resizing failed:")
         st.code(result.stderr)
     else:
@@ -57,14 +84,14 @@ if uploaded_file:
 
     st.subheader("Step 3: Optional - Chunk Video into 5-minute segments")
     if st.button("Chunk Video"):
-        chunk_dir = Path("chunks")
+        chunk_dir = Path(workspace.path("chunks"))
         chunk_dir.mkdir(exist_ok=True)
 
-        chunk_cmd = (
-            f'ffmpeg -i {input_path} -c copy -map 0 -segment_time 300 '
-            f'-f segment chunks/output%03d.mp4 -y'
-        )
-        result = subprocess.run(chunk_cmd, shell=True, capture_output=True, text=True)
+        chunk_cmd = [
+            "ffmpeg", "-i", input_path, "-c", "copy", "-map", "0", "-segment_time", "300",
+            "-f", "segment", str(chunk_dir / "output%03d.mp4"), "-y"
+        ]
+        result = subprocess.run(chunk_cmd, capture_output=True, text=True)
 
         if result.returncode != 0:
             st.error("Chunking failed:")
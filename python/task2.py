@@ -1,15 +1,17 @@
-from moviepy.video.io.VideoFileClip import VideoFileClip
 import os
 import shutil
 import subprocess
 import tempfile
 import time
-import cv2
-import certifi
-import yt_dlp
-import whisper
 import streamlit as st
 
+import config
+from ingest import UrlIngest
+from parallel_encode import encode_parallel
+from renditions import video_codec_args
+from thumbnails import thumbnail_strip
+from whisper_backend import get_whisper_model, transcribe as whisper_transcribe
+
 # ---------- FFmpeg Setup ----------
 FFMPEG = r"C:\ffmpeg\bin\ffmpeg.exe"  # Make sure this path is valid
 if not os.path.isfile(FFMPEG):
@@ -30,6 +32,15 @@ def run(cmd: list[str]) -> None:
     except FileNotFoundError as e:
         raise RuntimeError(f"[FileNotFoundError] Could not run command:\n{' '.join(cmd)}\n\nError: {e}")
 
+# ---------- Previews ----------
+def show_keyframes(path: str) -> None:
+    """Keyframe sprite sheet of a video instead of embedding the whole file."""
+    strip = thumbnail_strip(path)
+    if strip:
+        st.image(strip["sprite"])
+    else:
+        st.video(path)
+
 # ---------- Audio Extraction (.wav for Whisper) ----------
 def extract_audio(inp: str) -> str:
     out = inp.rsplit('.', 1)[0] + "_audio.wav"
@@ -37,29 +48,26 @@ def extract_audio(inp: str) -> str:
     return out
 
 # ---------- Resize Video ----------
-def resize_to_reel(inp: str) -> str:
+def resize_to_reel(inp: str, parallel: bool = False) -> str:
     out = inp.rsplit('.', 1)[0] + "_1080x1920.mp4"
     vf = "scale=1080:-2,pad=1080:1920:(ow-iw)/2:(oh-ih)/2"
-    run([FFMPEG, "-y", "-i", inp, "-vf", vf, "-c:v", "libx264", "-c:a", "copy", out])
+    if parallel:
+        # Keyframe-aligned pieces encoded concurrently, joined without re-encoding
+        try:
+            encode_parallel(inp, out, vf, video_codec_args(), ffmpeg=FFMPEG)
+            return out
+        except Exception as e:
+            print("Parallel encode failed, falling back to a single encode:", e)
+    run([FFMPEG, "-y", "-i", inp, "-vf", vf, *video_codec_args(), "-threads", str(config.SCHED_ENCODE_THREADS),
+         "-c:a", "copy", out])
     return out
 
 # ---------- Download YouTube Video ----------
-def download_youtube(url: str) -> str:
-    ydl_opts = {
-        "format": "best[ext=mp4][acodec!=none][vcodec!=none]",
-        "outtmpl": os.path.join(UPLOAD_DIR, "%(title)s.%(ext)s"),
-        "noplaylist": True,
-        "quiet": True,
-        "http_headers": {"User-Agent": "Mozilla/5.0"},
-        "merge_output_format": "mp4",
-        "ca_certificates": certifi.where(),
-    }
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        info = ydl.extract_info(url, download=True)
-        original_path = ydl.prepare_filename(info)
-        safe_path = os.path.join(UPLOAD_DIR, f"video_{int(time.time())}.mp4")
-        os.rename(original_path, safe_path)
-        return safe_path
+def download_youtube(url: str) -> UrlIngest:
+    """Fetch the audio-only stream now and the video in the background."""
+    ingest = UrlIngest(url, UPLOAD_DIR, ffmpeg=FFMPEG)
+    ingest.start()
+    return ingest
 
 # ---------- Transcription with Whisper ----------
 def transcribe(audio: str) -> tuple[str, str]:
@@ -69,8 +77,8 @@ def transcribe(audio: str) -> tuple[str, str]:
     )
 
     st.info("🔁 Transcribing using Whisper...")
-    model = whisper.load_model("base")
-    result = model.transcribe(audio, fp16=False)
+    model = get_whisper_model()
+    result = whisper_transcribe(model, audio)
 
     full_text = result.get("text", "").strip()
 
@@ -88,6 +96,8 @@ st.title("🎬 Video Processor + Whisper Transcriber")
 
 if "video" not in st.session_state:
     st.session_state.video = None
+if "ingest" not in st.session_state:
+    st.session_state.ingest = None
 
 choice = st.radio("Choose input type", ["Upload", "YouTube"])
 
@@ -100,6 +110,7 @@ if choice == "Upload":
         with open(save_path, "wb") as out:
             out.write(f.read())
         st.session_state.video = save_path
+        st.session_state.ingest = None
         st.success("Uploaded successfully ✅")
 
 # YouTube Section
@@ -107,29 +118,35 @@ else:
     url = st.text_input("Enter YouTube video URL")
     if st.button("Download") and url:
         try:
-            st.session_state.video = download_youtube(url)
-            st.success("Downloaded successfully ✅")
+            st.session_state.ingest = download_youtube(url)
+            st.session_state.video = None
+            st.success("Audio downloaded ✅ the video keeps downloading in the background")
         except Exception as e:
             st.error(f"Download error: {e}")
 
 # Process Section
-if st.session_state.video:
-    st.video(st.session_state.video)
+ingest = st.session_state.ingest
+if ingest is not None and ingest.video_ready:
+    st.session_state.video = ingest.video_path
+
+if st.session_state.video or ingest is not None:
+    if st.session_state.video:
+        show_keyframes(st.session_state.video)
+    else:
+        st.info("⏳ Video still downloading; transcription can start from the audio now")
+
+    parallel = st.checkbox("⚡ Parallel encode (splits the video at keyframes across all cores)")
 
     if st.button("Process"):
         try:
-            video_path = st.session_state.video
-            st.caption(f"🎥 Input video: {video_path}")
-
-            audio_path = extract_audio(video_path)
-            st.success("✅ Audio extracted")
+            # URL jobs already have the audio; transcribe it before touching the video
+            if ingest is not None:
+                audio_path = ingest.audio_path
+            else:
+                audio_path = extract_audio(st.session_state.video)
+                st.success("✅ Audio extracted")
             st.caption(f"🔊 Audio file: {audio_path}")
 
-            reel_path = resize_to_reel(video_path)
-            st.success("✅ Resized to 1080x1920")
-            st.caption(f"📱 Reel video: {reel_path}")
-            st.video(reel_path)
-
             text, txt_path = transcribe(audio_path)
 
             st.success("✅ Transcription complete")
@@ -139,6 +156,17 @@ if st.session_state.video:
             with open(txt_path, "rb") as f:
                 st.download_button("⬇ Download Transcript", f, file_name="transcript.txt")
 
+            if ingest is not None:
+                with st.spinner("⏳ Waiting for the video download..."):
+                    st.session_state.video = ingest.wait_video()
+            video_path = st.session_state.video
+            st.caption(f"🎥 Input video: {video_path}")
+
+            reel_path = resize_to_reel(video_path, parallel=parallel)
+            st.success("✅ Resized to 1080x1920")
+            st.caption(f"📱 Reel video: {reel_path}")
+            show_keyframes(reel_path)
+
             with open(reel_path, "rb") as f:
                 st.download_button("⬇ Download Resized Reel", f, file_name="reel.mp4")
 
@@ -1,10 +1,12 @@
-import whisper
 import os
 import time
 import streamlit as st
 
+from whisper_backend import get_whisper_model, transcribe as whisper_transcribe
+
 # ✅ Add FFmpeg to PATH for Whisper (important!)
-os.environ["PATH"] += os.pathsep + r"C:/Users/DIVYA SRI/Downloads/ffmpeg-7.1.1-essentials_build/ffmpeg-7.1.1-essentials_build/bin"
+if r"C:/Users/DIVYA SRI/Downloads/ffmpeg-7.1.1-essentials_build/ffmpeg-7.1.1-essentials_build/bin" not in os.environ["PATH"]:
+    os.environ["PATH"] += os.pathsep + r"C:/Users/DIVYA SRI/Downloads/ffmpeg-7.1.1-essentials_build/ffmpeg-7.1.1-essentials_build/bin"
 
 # ✅ Set up upload folder
 UPLOAD_DIR = "uploads"
@@ -44,8 +46,8 @@ if video_file:
 
         # ✅ Transcribe with Whisper
         st.info("🔁 Transcribing with Whisper...")
-        model = whisper.load_model("base")
-        result = model.transcribe(audio_path)
+        model = get_whisper_model()
+        result = whisper_transcribe(model, audio_path)
         full_text = result.get("text", "").strip()
 
         st.text_area("📝 Transcript", value=full_text, height=300)
@@ -4,8 +4,14 @@ import cv2
 import streamlit as st
 import tempfile
 
+import config
+from parallel_encode import encode_parallel
+from renditions import video_codec_args
+from thumbnails import thumbnail_strip
+
 # ----- FFmpeg Setup -----
 FFMPEG = r"C:/ffmpeg/bin/ffmpeg.exe"  # ✅ Change if installed elsewhere
+FFPROBE = os.path.join(os.path.dirname(FFMPEG), "ffprobe.exe")
 os.environ["FFMPEG_BINARY"] = FFMPEG
 
 def run(cmd: list[str]) -> None:
@@ -15,11 +21,26 @@ def run(cmd: list[str]) -> None:
         st.error(f"❌ FFmpeg Error:\n{res.stderr}")
         raise RuntimeError(res.stderr.strip())
 
-def resize_to_reel(input_path: str) -> str:
-    """Resize input video to vertical 1080x1920 format."""
+def show_keyframes(path: str) -> None:
+    """Keyframe sprite sheet of a video instead of embedding the whole file."""
+    strip = thumbnail_strip(path, ffmpeg=FFMPEG, ffprobe=FFPROBE)
+    if strip:
+        st.image(strip["sprite"])
+    else:
+        st.video(path)
+
+def resize_to_reel(input_path: str, parallel: bool = False) -> str:
+    """Resize input video to vertical 1080x1920 format, optionally encoding keyframe-aligned pieces in parallel."""
     output_path = input_path.rsplit('.', 1)[0] + "_reel.mp4"
     vf = "scale=1080:-2,pad=1080:1920:(ow-iw)/2:(oh-ih)/2"
-    run([FFMPEG, "-y", "-i", input_path, "-vf", vf, "-c:v", "libx264", "-c:a", "copy", output_path])
+    if parallel:
+        try:
+            encode_parallel(input_path, output_path, vf, video_codec_args(), ffmpeg=FFMPEG, ffprobe=FFPROBE)
+            return output_path
+        except Exception as e:
+            st.warning(f"⚠️ Parallel encode failed, falling back to a single encode: {e}")
+    run([FFMPEG, "-y", "-i", input_path, "-vf", vf, *video_codec_args(), "-threads", str(config.SCHED_ENCODE_THREADS),
+         "-c:a", "copy", output_path])
     return output_path
 
 def chunk_video(input_path: str, seconds=300) -> list[str]:
@@ -71,15 +92,17 @@ if uploaded_file:
         tmp.write(uploaded_file.read())
         input_path = tmp.name
 
-    st.video(input_path)
+    show_keyframes(input_path)
+
+    parallel = st.checkbox("⚡ Parallel encode (splits the video at keyframes across all cores)")
 
     if st.button("▶️ Process Video"):
         try:
             # Step 1: Resize
             with st.spinner("📐 Resizing to vertical 1080x1920 format..."):
-                reel_path = resize_to_reel(input_path)
+                reel_path = resize_to_reel(input_path, parallel=parallel)
                 st.success("✅ Reel created successfully!")
-                st.video(reel_path)
+                show_keyframes(reel_path)
 
             # Step 2: Split into chunks
             with st.spinner("✂️ Splitting into 5-minute chunks..."):
@@ -89,7 +112,7 @@ if uploaded_file:
             # Step 3: Evaluation
             for i, chunk in enumerate(chunks):
                 st.subheader(f"🎬 Chunk {i+1}")
-                st.video(chunk)
+                show_keyframes(chunk)
                 metrics = evaluate_video(chunk)
                 for k, v in metrics.items():
                     st.markdown(f"**{k}**: {v}")
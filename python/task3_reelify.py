@@ -4,7 +4,12 @@ import cv2
 import streamlit as st
 import tempfile
 
+import config
+from renditions import video_codec_args
+from thumbnails import thumbnail_strip
+
 FFMPEG = r"C:/ffmpeg/ffmpeg-7.1.1-essentials_build/bin/ffmpeg.exe"
+FFPROBE = os.path.join(os.path.dirname(FFMPEG), "ffprobe.exe")
 os.environ["FFMPEG_BINARY"] = FFMPEG
 
 st.set_page_config(page_title="Reel Creator", layout="centered")
@@ -17,10 +22,19 @@ def run(cmd):
     if result.returncode != 0:
         raise RuntimeError(result.stderr)
 
+def show_keyframes(path: str) -> None:
+    """Keyframe sprite sheet of a video instead of embedding the whole file."""
+    strip = thumbnail_strip(path, ffmpeg=FFMPEG, ffprobe=FFPROBE)
+    if strip:
+        st.image(strip["sprite"])
+    else:
+        st.video(path)
+
 def resize_video(input_path):
     output_path = input_path.replace(".mp4", "_reel.mp4")
     vf = "scale=1080:-2,pad=1080:1920:(ow-iw)/2:(oh-ih)/2"
-    run([FFMPEG, "-y", "-i", input_path, "-vf", vf, "-c:v", "libx264", "-c:a", "copy", output_path])
+    run([FFMPEG, "-y", "-i", input_path, "-vf", vf, *video_codec_args(), "-threads", str(config.SCHED_ENCODE_THREADS),
+         "-c:a", "copy", output_path])
     return output_path
 
 def chunk_video(input_path):
@@ -50,19 +64,19 @@ if uploaded_file:
     tmp_path = tempfile.NamedTemporaryFile(delete=False, suffix=".mp4").name
     with open(tmp_path, "wb") as f:
         f.write(uploaded_file.read())
-    st.video(tmp_path)
+    show_keyframes(tmp_path)
 
     if st.button("▶️ Process"):
         reel = resize_video(tmp_path)
         st.success("Reel format ready")
-        st.video(reel)
+        show_keyframes(reel)
 
         chunks = chunk_video(reel)
         st.success(f"{len(chunks)} segments created")
 
         for idx, chunk in enumerate(chunks):
             st.subheader(f"🎞️ Segment {idx+1}")
-            st.video(chunk)
+            show_keyframes(chunk)
             meta = evaluate_video(chunk)
             for k, v in meta.items():
                 st.markdown(f"**{k}**: {v}")
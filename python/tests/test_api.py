@@ -0,0 +1,106 @@
+import base64
+import hashlib
+import hmac
+import json
+import sqlite3
+import time
+
+import pytest
+
+import api
+import config
+from auth import issue_token, verify_token
+from database import init_database, record_processing
+from progress import get_job, register_job
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = str(tmp_path / "app.db")
+    init_database(path)
+    monkeypatch.setattr(config, "DATABASE_PATH", path)
+    return path
+
+
+@pytest.fixture
+def client(db_path):
+    return api.app.test_client()
+
+
+class _FakeIngest:
+    def __init__(self, url, out_dir, ffmpeg="ffmpeg"):
+        self.audio_path = f"{out_dir}/audio.wav"
+        self.video_path = f"{out_dir}/video.mp4"
+        self.started = False
+
+    def start(self):
+        self.started = True
+        return self.audio_path
+
+    def wait_video(self, timeout=None):
+        return self.video_path
+
+
+class _FakeProcessor:
+    def process_video(self, video_path, ingest=None, **options):
+        assert ingest.started and video_path == ingest.video_path
+        return {
+            'success': True,
+            'reels': ["/o/reel_1.mp4"],
+            'reel_details': [{'reel_path': "/o/reel_1.mp4", 'duration': 30.0, 'segment_text': "hello"}],
+            'trace': {'name': "process_video"}
+        }
+
+
+def test_url_job_writes_its_history_row(db_path, monkeypatch):
+    monkeypatch.setattr(api, "UrlIngest", _FakeIngest)
+    monkeypatch.setattr(api, "_get_processor", lambda: _FakeProcessor())
+    register_job("video-1", owner="7")
+
+    api._run_url_job("video-1", "http://example.com/a.mp4", {})
+
+    conn = sqlite3.connect(db_path)
+    history = conn.execute("SELECT id, original_filename, status, user_id, source_path FROM processing_history").fetchall()
+    assert [row[1:] for row in history] == [("http://example.com/a.mp4", "completed", 7, "http://example.com/a.mp4")]
+    reels = conn.execute("SELECT processing_id, reel_path FROM reels").fetchall()
+    assert reels == [(history[0][0], "/o/reel_1.mp4")]
+
+
+def test_cancel_requires_the_job_owner(client):
+    register_job("video-2", owner="7")
+
+    assert client.post("/api/jobs/video-2/cancel").status_code == 401
+    assert client.post("/api/jobs/video-2/cancel", headers={'Authorization': f"Bearer {issue_token(8)}"}).status_code == 404
+    assert not get_job("video-2").cancelled
+
+    response = client.post("/api/jobs/video-2/cancel", headers={'Authorization': f"Bearer {issue_token(7)}"})
+    assert response.status_code == 200
+    assert get_job("video-2").cancelled
+
+
+def test_trace_is_only_visible_to_its_user(client, db_path):
+    processing_id = record_processing("a.mp4", "completed", user_id=7, trace={'name': "process_video"},
+                                      db_path=db_path)
+    url = f"/api/processing/{processing_id}/trace"
+
+    assert client.get(url).status_code == 401
+    assert client.get(url, query_string={'token': issue_token(8)}).status_code == 404
+    response = client.get(url, query_string={'token': issue_token(7)})
+    assert response.status_code == 200
+    assert response.get_json() == {'name': "process_video"}
+
+
+def test_supabase_session_token_names_its_user(monkeypatch):
+    monkeypatch.setattr(config, "SUPABASE_JWT_SECRET", "jwt-secret")
+
+    def encode(data):
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b"=").decode()
+
+    signing_input = f"{encode({'alg': 'HS256', 'typ': 'JWT'})}.{encode({'sub': 'user-uuid', 'exp': time.time() + 60})}"
+    signature = hmac.new(b"jwt-secret", signing_input.encode(), hashlib.sha256).digest()
+    token = f"{signing_input}.{base64.urlsafe_b64encode(signature).rstrip(b'=').decode()}"
+
+    assert verify_token(token) == "user-uuid"
+    assert verify_token(token[:-2] + "AA") is None
+    assert verify_token(issue_token(7, ttl=-1)) is None
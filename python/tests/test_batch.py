@@ -0,0 +1,49 @@
+import json
+import multiprocessing
+import os
+import time
+
+import pytest
+
+import batch
+import config
+import scheduler
+import video_processor
+
+JOBS = 4
+
+
+def _fake_process_admitted(self, video_path, *args):
+    # Stands in for the pipeline once the scheduler has admitted the job
+    log = os.path.join(os.path.dirname(video_path), "spans.jsonl")
+    started = time.time()
+    time.sleep(0.5)
+    with open(log, "a") as f:
+        f.write(json.dumps([started, time.time()]) + "\n")
+    return {'success': True, 'reel_details': [], 'trace': None}
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="patches reach pool workers by fork")
+def test_batch_runs_more_jobs_than_the_per_user_limit(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config, "SCHED_NODE_LOCK_DIR", tmp_path / "slots")
+    monkeypatch.setattr(scheduler, "_scheduler", None)
+    monkeypatch.setattr(batch, "_processor", None)
+    monkeypatch.setattr(video_processor.VideoProcessor, "__init__", lambda self: None)
+    monkeypatch.setattr(video_processor.VideoProcessor, "_process_admitted", _fake_process_admitted)
+    monkeypatch.setattr(video_processor, "probe_duration", lambda path: 1.0)
+
+    videos = tmp_path / "videos"
+    videos.mkdir()
+    for i in range(JOBS):
+        (videos / f"clip_{i}.mp4").write_bytes(b"")
+
+    assert JOBS > config.SCHED_MAX_JOBS_PER_USER
+    summary = batch.run_batch(str(videos), jobs=JOBS, db_path=str(tmp_path / "batch.db"))
+
+    assert summary['succeeded'] == JOBS
+    assert summary['failed'] == 0
+    with open(videos / "spans.jsonl") as f:
+        spans = [json.loads(line) for line in f]
+    overlapping = max(sum(start <= t < end for start, end in spans) for t, _ in spans)
+    assert overlapping > config.SCHED_MAX_JOBS_PER_USER
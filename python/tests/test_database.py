@@ -0,0 +1,17 @@
+import sqlite3
+
+import config
+from database import init_database, record_processing
+
+
+def test_default_database_is_config_database_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = str(tmp_path / "configured.db")
+    monkeypatch.setattr(config, "DATABASE_PATH", path)
+
+    init_database()
+    record_processing("a.mp4", "completed", [])
+
+    rows = sqlite3.connect(path).execute("SELECT original_filename FROM processing_history").fetchall()
+    assert rows == [("a.mp4",)]
+    assert not (tmp_path / "app_database.db").exists()
@@ -0,0 +1,55 @@
+import pytest
+
+import config
+import scheduler
+import video_processor
+from video_processor import VideoProcessor
+
+
+class _FakeIngest:
+    """Audio already fetched; the video arrives when wait_video is called."""
+
+    def __init__(self, out_dir, events):
+        self.audio_path = f"{out_dir}/audio.wav"
+        self.video_path = f"{out_dir}/video.mp4"
+        self.events = events
+
+    def wait_video(self, timeout=None):
+        self.events.append("video")
+        return self.video_path
+
+
+@pytest.fixture
+def processor(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config, "SCHED_NODE_LOCK_DIR", tmp_path / "slots")
+    monkeypatch.setattr(config, "SCENE_INDEX", False)
+    monkeypatch.setattr(config, "FINGERPRINT_ENABLED", False)
+    monkeypatch.setattr(scheduler, "_scheduler", None)
+    monkeypatch.setattr(video_processor, "describe_reels", lambda reels, *args: [])
+    return VideoProcessor(load_models=False, chat_completion=lambda **kwargs: None)
+
+
+def test_ingested_audio_is_transcribed_before_the_video_is_awaited(processor, tmp_path, monkeypatch):
+    events = []
+    ingest = _FakeIngest(str(tmp_path), events)
+
+    def extract_audio(video_path, workspace=None):
+        raise AssertionError("the ingest already fetched the audio")
+
+    def transcribe_and_select(audio_path, reel_count, reel_duration, job):
+        events.append(("transcribe", audio_path))
+        return {'text': "hi", 'segments': []}, [{'start': 0.0, 'end': 30.0, 'text': "hi"}]
+
+    def create_reels(video_path, important_segments, reel_duration, **kwargs):
+        events.append(("render", video_path))
+        return ["reel_1.mp4"]
+
+    monkeypatch.setattr(processor, "extract_audio", extract_audio)
+    monkeypatch.setattr(processor, "_transcribe_and_select", transcribe_and_select)
+    monkeypatch.setattr(processor, "create_reels", create_reels)
+
+    result = processor.process_video(ingest.video_path, ingest=ingest)
+
+    assert result['success'], result.get('error')
+    assert events == [("transcribe", ingest.audio_path), "video", ("render", ingest.video_path)]
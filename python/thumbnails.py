@@ -0,0 +1,160 @@
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from typing import Dict, List, Optional
+
+import config
+
+TILE_WIDTH = 160
+COLUMNS = 10
+MAX_TILES = 100  # 10x10 sheet
+MIN_INTERVAL_SECONDS = 1.0  # never more than one tile per second of video
+SAMPLE_BYTES = 1 << 20  # bytes hashed from each of the head, middle and tail
+
+SPRITE_NAME = "sprite.jpg"
+VTT_NAME = "thumbnails.vtt"
+
+
+def content_key(video_path: str) -> str:
+    """
+    Cache key of a video's contents: its size plus samples from the start,
+    middle and end. Constant-time for any file size, and a re-upload of the
+    same file hits the cache under a different name.
+    """
+    size = os.path.getsize(video_path)
+    digest = hashlib.sha1(str(size).encode())
+    with open(video_path, 'rb') as f:
+        for offset in sorted({0, max(0, size // 2 - SAMPLE_BYTES // 2), max(0, size - SAMPLE_BYTES)}):
+            f.seek(offset)
+            digest.update(f.read(SAMPLE_BYTES))
+    return digest.hexdigest()[:20]
+
+
+def url_key(url: str) -> str:
+    """Cache key of a remote video, which cannot be sampled cheaply: its URL."""
+    return hashlib.sha1(url.encode()).hexdigest()[:20]
+
+
+def thumbnail_dir(key: str) -> str:
+    return os.path.join(str(config.THUMBNAIL_DIR), key)
+
+
+def _probe_duration(video_path: str, ffprobe: str) -> float:
+    try:
+        result = subprocess.run([
+            ffprobe,
+            "-v", "error",
+            "-show_entries", "format=duration",
+            "-of", "default=noprint_wrappers=1:nokey=1",
+            video_path
+        ], check=True, capture_output=True, text=True)
+        return float(result.stdout.strip())
+    except (subprocess.CalledProcessError, FileNotFoundError, ValueError):
+        return 0.0
+
+
+def _timestamp(seconds: float) -> str:
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    return f"{hours:02d}:{minutes:02d}:{millis // 1000:02d}.{millis % 1000:03d}"
+
+
+def write_vtt(path: str, times: List[float], duration: float, tile_width: int, tile_height: int,
+              columns: int = COLUMNS, sprite_name: str = SPRITE_NAME):
+    """WebVTT index mapping each time range to its tile, as ``sprite.jpg#xywh=x,y,w,h``."""
+    lines = ["WEBVTT", ""]
+    for i, start in enumerate(times):
+        end = times[i + 1] if i + 1 < len(times) else max(duration, start + MIN_INTERVAL_SECONDS)
+        x, y = (i % columns) * tile_width, (i // columns) * tile_height
+        lines += [f"{_timestamp(start)} --> {_timestamp(end)}",
+                  f"{sprite_name}#xywh={x},{y},{tile_width},{tile_height}", ""]
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines))
+
+
+def prune_cache(max_bytes: Optional[int] = None, keep: Optional[str] = None):
+    """Evict the least recently used sprite sheets until the cache fits config.THUMBNAIL_CACHE_MAX_BYTES."""
+    max_bytes = config.THUMBNAIL_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    root = str(config.THUMBNAIL_DIR)
+    if not max_bytes or not os.path.isdir(root):
+        return
+    entries = []
+    for entry in os.scandir(root):
+        # In-progress builds are "<key>.<random>" scratch dirs
+        if not entry.is_dir() or "." in entry.name:
+            continue
+        size = sum(f.stat().st_size for f in os.scandir(entry.path) if f.is_file())
+        entries.append((entry.stat().st_mtime, entry.name, size))
+    total = sum(size for _, _, size in entries)
+    for _, name, size in sorted(entries):
+        if total <= max_bytes:
+            break
+        if name == keep:
+            continue
+        shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+        total -= size
+
+
+def thumbnail_strip(video_path: str, ffmpeg: str = "ffmpeg", ffprobe: str = "ffprobe",
+                    key: Optional[str] = None) -> Optional[Dict]:
+    """
+    Sprite sheet of keyframe thumbnails plus a WebVTT index, cached by content.
+
+    One ffmpeg pass decodes keyframes only (``-skip_frame nokey``), keeps at
+    most MAX_TILES of them evenly spread over the video, scales them to
+    TILE_WIDTH and tiles them into a single JPEG; the tile timestamps come
+    from showinfo on stderr. Returns ``{'key', 'sprite', 'vtt'}`` or None if
+    ffmpeg fails. ``video_path`` may be a URL ffmpeg can read, given a ``key``.
+    """
+    key = key or content_key(video_path)
+    target = thumbnail_dir(key)
+    result = {'key': key, 'sprite': os.path.join(target, SPRITE_NAME), 'vtt': os.path.join(target, VTT_NAME)}
+    if os.path.exists(result['vtt']):
+        # Recently used sheets are the last to be evicted
+        os.utime(target)
+        return result
+
+    duration = _probe_duration(video_path, ffprobe)
+    interval = max(MIN_INTERVAL_SECONDS, duration / MAX_TILES)
+    expected = min(MAX_TILES, int(duration / interval) + 1) if duration else MAX_TILES
+    rows = -(-expected // COLUMNS)
+
+    os.makedirs(str(config.THUMBNAIL_DIR), exist_ok=True)
+    scratch = tempfile.mkdtemp(prefix=f"{key}.", dir=str(config.THUMBNAIL_DIR))
+    try:
+        process = subprocess.run([
+            ffmpeg,
+            "-hide_banner",
+            "-skip_frame", "nokey",
+            "-i", video_path,
+            "-an", "-sn", "-dn",
+            "-vf", f"select='isnan(prev_selected_t)+gte(t-prev_selected_t,{interval:.3f})',"
+                   f"scale={TILE_WIDTH}:-2,showinfo,tile={COLUMNS}x{rows}",
+            "-vsync", "0",
+            "-frames:v", "1",
+            "-q:v", "4",
+            "-y", os.path.join(scratch, SPRITE_NAME)
+        ], capture_output=True, text=True, errors='replace')
+        if process.returncode != 0 or not os.path.exists(os.path.join(scratch, SPRITE_NAME)):
+            return None
+
+        times = [float(t) for t in re.findall(r"pts_time:\s*([-\d.]+)", process.stderr)][:COLUMNS * rows]
+        size = re.search(r"\bs:(\d+)x(\d+)", process.stderr)
+        if not times or size is None:
+            return None
+        write_vtt(os.path.join(scratch, VTT_NAME), times, duration, int(size.group(1)), int(size.group(2)))
+
+        try:
+            os.replace(scratch, target)
+        except OSError:
+            # Another request built the same sheet first
+            if not os.path.exists(result['vtt']):
+                raise
+        prune_cache(keep=key)
+        return result
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
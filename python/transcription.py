@@ -0,0 +1,241 @@
+import os
+import struct
+import subprocess
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import config
+from progress import current_job
+from whisper_backend import transcribe
+
+SAMPLE_RATE = 16000
+
+
+class PcmReader:
+    """
+    Random access to 16 kHz mono 16-bit PCM audio without loading it.
+
+    ``read`` seeks and decodes only the requested samples, so memory use is
+    bounded by the window size rather than the file length. WAVs in that format
+    (what ``extract_audio`` writes) are read in place; anything else is first
+    converted to one with ffmpeg into a temporary file.
+    """
+
+    def __init__(self, audio_path: str):
+        self._temp_path = None
+        layout = _pcm_layout(audio_path)
+        if layout is None:
+            fd, self._temp_path = tempfile.mkstemp(suffix='.wav')
+            os.close(fd)
+            subprocess.run(["ffmpeg", "-y", "-i", audio_path, "-vn", "-acodec", "pcm_s16le",
+                            "-ar", str(SAMPLE_RATE), "-ac", "1", self._temp_path],
+                           check=True, capture_output=True)
+            audio_path = self._temp_path
+            layout = _pcm_layout(audio_path)
+        self._data_offset, self.samples = layout
+        self._file = open(audio_path, 'rb')
+
+    def __len__(self) -> int:
+        return self.samples
+
+    @property
+    def seconds(self) -> float:
+        return self.samples / SAMPLE_RATE
+
+    def read(self, start: int, stop: int) -> np.ndarray:
+        """Samples [start, stop) as float32 in [-1, 1]."""
+        start = max(0, start)
+        stop = min(self.samples, stop)
+        if stop <= start:
+            return np.zeros(0, dtype=np.float32)
+        self._file.seek(self._data_offset + start * 2)
+        data = np.fromfile(self._file, dtype='<i2', count=stop - start)
+        return data.astype(np.float32) / 32768.0
+
+    def close(self):
+        self._file.close()
+        if self._temp_path is not None:
+            os.remove(self._temp_path)
+            self._temp_path = None
+
+    def __enter__(self) -> "PcmReader":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _pcm_layout(audio_path: str) -> Optional[Tuple[int, int]]:
+    """(data offset, sample count) of a 16 kHz mono s16le WAV, or None for anything else."""
+    try:
+        file_size = os.path.getsize(audio_path)
+        with open(audio_path, 'rb') as f:
+            header = f.read(12)
+            if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+                return None
+            fmt_ok = False
+            while True:
+                chunk = f.read(8)
+                if len(chunk) < 8:
+                    return None
+                chunk_id, size = chunk[:4], struct.unpack('<I', chunk[4:])[0]
+                if chunk_id == b'fmt ':
+                    fmt = f.read(size)
+                    tag, channels, rate = struct.unpack('<HHI', fmt[:8])
+                    bits = struct.unpack('<H', fmt[14:16])[0]
+                    fmt_ok = tag in (1, 0xFFFE) and channels == 1 and rate == SAMPLE_RATE and bits == 16
+                    f.seek(size % 2, 1)
+                elif chunk_id == b'data':
+                    if not fmt_ok:
+                        return None
+                    offset = f.tell()
+                    # Streamed WAVs may carry a placeholder size; trust the file length
+                    size = min(size, file_size - offset)
+                    return offset, size // 2
+                else:
+                    f.seek(size + size % 2, 1)
+    except (OSError, struct.error):
+        return None
+
+
+def shift_segments(segments: List[Dict], offset: float, first_id: int) -> List[Dict]:
+    """Copy Whisper segments (and word timings) moved ``offset`` seconds later, renumbered from ``first_id``."""
+    shifted = []
+    for i, segment in enumerate(segments):
+        segment = dict(segment)
+        segment['id'] = first_id + i
+        segment['start'] += offset
+        segment['end'] += offset
+        if segment.get('words'):
+            segment['words'] = [
+                dict(word, start=word['start'] + offset, end=word['end'] + offset)
+                for word in segment['words']
+            ]
+        shifted.append(segment)
+    return shifted
+
+
+def transcribe_windowed(model, audio_path: str, window_seconds: Optional[float] = None,
+                        overlap_seconds: Optional[float] = None, **decode_options) -> Dict[str, Any]:
+    """
+    Transcribe audio in fixed, overlapping windows with bounded memory.
+
+    Only one window of PCM is in memory at a time (see PcmReader), so peak
+    memory does not grow with the length of the audio. Consecutive windows
+    overlap by ``overlap_seconds``; each window keeps the segments whose
+    midpoint lies in its half of the overlap, so words at a boundary are heard
+    whole and transcribed once. The tail of the kept text is passed to the next
+    window as ``initial_prompt``, and segment timestamps are shifted back onto
+    the full timeline. When a job is active it is checked for cancellation
+    before every window, so a cancelled job stops within one window of work.
+    """
+    window_seconds = window_seconds or config.TRANSCRIBE_WINDOW_SECONDS
+    overlap_seconds = config.TRANSCRIBE_OVERLAP_SECONDS if overlap_seconds is None else overlap_seconds
+    job = current_job()
+
+    with PcmReader(audio_path) as audio:
+        total = len(audio)
+        if total == 0:
+            return {'text': '', 'segments': [], 'language': None}
+
+        window = int(window_seconds * SAMPLE_RATE)
+        overlap = min(int(overlap_seconds * SAMPLE_RATE), window // 2)
+        step = window - overlap
+        segments: List[Dict] = []
+        language = None
+        prompt = decode_options.pop('initial_prompt', None)
+
+        offset = 0
+        while offset < total:
+            if job is not None:
+                job.check_cancelled()
+
+            last = offset + window >= total
+            chunk = audio.read(offset, offset + window)
+            result = transcribe(model, chunk, initial_prompt=prompt, **decode_options)
+            del chunk
+
+            # This window owns [keep_from, keep_until) of the overlapping timeline
+            keep_from = (offset + overlap / 2) / SAMPLE_RATE if offset else 0.0
+            keep_until = float('inf') if last else (offset + step + overlap / 2) / SAMPLE_RATE
+            kept = [
+                segment for segment in shift_segments(result['segments'], offset / SAMPLE_RATE, len(segments))
+                if keep_from <= (segment['start'] + segment['end']) / 2 < keep_until
+            ]
+            for i, segment in enumerate(kept):
+                segment['id'] = len(segments) + i
+            segments.extend(kept)
+            language = language or result.get('language')
+            # Carry context so names and style stay consistent across windows
+            kept_text = ''.join(segment['text'] for segment in kept)
+            prompt = kept_text[-config.TRANSCRIBE_PROMPT_CHARS:] or prompt
+
+            done = total if last else offset + step
+            if job is not None:
+                job.update('transcription', done / total, f"Transcribed {done / SAMPLE_RATE:.0f}s "
+                                                          f"of {total / SAMPLE_RATE:.0f}s")
+            if last:
+                break
+            offset += step
+
+    return {'text': ''.join(segment['text'] for segment in segments), 'segments': segments, 'language': language}
+
+
+def _merge_windows(windows: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    merged: List[Tuple[float, float]] = []
+    for start, end in sorted(windows):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def refine_windows(model, audio_path: str, transcript: Dict[str, Any], windows: List[Tuple[float, float]],
+                   padding: Optional[float] = None, **decode_options) -> Dict[str, Any]:
+    """
+    Re-transcribe only the given time windows with a (larger) model.
+
+    Used by cascade mode: a fast draft transcript covers the whole file, and
+    only the windows that end up in reels are decoded again. Each window is
+    padded, decoded with the preceding draft text as prompt, and its segments
+    replace the draft segments whose midpoint falls inside the window. The
+    result keeps the ``{'text', 'segments'}`` shape of a full transcription.
+    """
+    padding = config.CASCADE_PADDING_SECONDS if padding is None else padding
+    job = current_job()
+
+    with PcmReader(audio_path) as audio:
+        padded = [(max(0.0, start - padding), min(audio.seconds, end + padding)) for start, end in windows]
+        merged = _merge_windows([(start, end) for start, end in padded if end > start])
+
+        segments = list(transcript['segments'])
+        for i, (start, end) in enumerate(merged):
+            if job is not None:
+                job.check_cancelled()
+
+            def inside(segment):
+                return start <= (segment['start'] + segment['end']) / 2 < end
+
+            context = ''.join(seg['text'] for seg in segments if seg['end'] <= start)
+            chunk = audio.read(int(start * SAMPLE_RATE), int(end * SAMPLE_RATE))
+            result = transcribe(model, chunk, initial_prompt=context[-config.TRANSCRIBE_PROMPT_CHARS:] or None,
+                                **decode_options)
+            refined = [seg for seg in shift_segments(result['segments'], start, 0) if inside(seg)]
+
+            segments = [seg for seg in segments if not inside(seg)] + refined
+            segments.sort(key=lambda seg: seg['start'])
+
+            if job is not None:
+                job.update('analysis', (i + 1) / len(merged), f"Refined {i + 1} of {len(merged)} reel window(s)")
+
+    for i, segment in enumerate(segments):
+        segment['id'] = i
+
+    return {
+        'text': ''.join(seg['text'] for seg in segments),
+        'segments': segments,
+        'language': transcript.get('language')
+    }
@@ -1,69 +1,449 @@
 import subprocess
-import whisper
 import openai
 import os
 import tempfile
 import json
-from typing import List, Dict, Any
+import sqlite3
+import time
+import wave
+from typing import List, Dict, Any, Callable, Optional, Tuple
+
+import numpy as np
+
+import config
+from audio_features import segment_features
+from captions import CAPTION_MODES, rebase_segments, subtitles_filter, write_ass, write_srt
+from ffmpeg_runner import run_ffmpeg
+from fingerprint import (Fingerprint, compute_fingerprint, find_duplicate, shift_cuts, shift_to_query,
+                         store_fingerprint)
+from ingest import UrlIngest
+from metrics import REGISTRY, Tracer, current_span, span
+from progress import JobCancelled, register_job
+from reframe import VERTICAL_ASPECT, crop_filter, track_subject
+from renditions import (PACKAGINGS, Rendition, filter_graph, hls_output, mp4_outputs, rendition_paths,
+                        resolve_renditions, video_codec_args)
+from scene_index import SceneIndexBuild, snap_window
+from scheduler import SchedulerBusy, get_scheduler
+from transcription import refine_windows, transcribe_windowed
+from whisper_backend import configure_torch_threads, get_whisper_model, model_lock
+from workspace import JobWorkspace
+
+
+PCM_BYTES_PER_SECOND = 16000 * 2  # 16 kHz mono s16le
+WAV_HEADER_BYTES = 44
+
+
+def _estimate_pcm_size(duration: float) -> int:
+    """Size of the 16 kHz mono WAV extracted from ``duration`` seconds of media, 0 if unknown."""
+    if duration <= 0:
+        return 0
+    return int(duration * PCM_BYTES_PER_SECOND) + WAV_HEADER_BYTES
+
+
+def reel_window(segment: Dict, reel_duration: int, scene_cuts: Optional[np.ndarray] = None) -> Tuple[float, float]:
+    """
+    Return the (start, end) cut times of the reel built around a segment,
+    snapped to nearby shot boundaries when ``scene_cuts`` are known.
+    """
+    start_time = max(0, segment['start'] - 2)
+    end_time = min(start_time + reel_duration, segment['end'] + 2)
+    if scene_cuts is not None:
+        start_time, end_time = snap_window(start_time, end_time, scene_cuts, reel_duration)
+    return start_time, end_time
+
+
+def describe_reels(reels: List[str], important_segments: List[Dict], reel_duration: int,
+                   renditions: Optional[List[Rendition]] = None, packaging: str = "mp4",
+                   scene_cuts: Optional[np.ndarray] = None) -> List[Dict]:
+    """Pair generated reel files (and their renditions) with the segment each was cut from."""
+    details = []
+    for i, segment in enumerate(important_segments):
+        reel_path = next((p for p in reels if os.path.basename(p) == f'reel_{i+1}.mp4'), None)
+        if reel_path is None:
+            continue
+        start_time, end_time = reel_window(segment, reel_duration, scene_cuts)
+        detail = {
+            'reel_path': reel_path,
+            'duration': int(round(end_time - start_time)),
+            'segment_text': segment['text'],
+            'start_time': start_time,
+            'end_time': end_time
+        }
+        if renditions:
+            stem = reel_path[:-len('.mp4')]
+            if packaging == 'hls':
+                paths = [os.path.join(stem, r.name, 'index.m3u8') for r in renditions]
+                detail['hls_playlist'] = os.path.join(stem, 'master.m3u8')
+            else:
+                paths = rendition_paths(stem, renditions)
+            detail['renditions'] = [
+                {'name': r.name, 'width': r.width, 'height': r.height, 'path': path}
+                for r, path in zip(renditions, paths)
+            ]
+        details.append(detail)
+    return details
+
+
+def probe_duration(media_path: str) -> float:
+    """Return the container duration of a media file in seconds, or 0 if unknown."""
+    try:
+        result = subprocess.run([
+            "ffprobe",
+            "-v", "error",
+            "-show_entries", "format=duration",
+            "-of", "default=noprint_wrappers=1:nokey=1",
+            media_path
+        ], check=True, capture_output=True, text=True)
+        return float(result.stdout.strip() or 0)
+    except (subprocess.CalledProcessError, FileNotFoundError, ValueError):
+        return 0.0
+
+
+def probe_has_audio(media_path: str) -> bool:
+    """Return whether a media file has at least one audio stream (True if unknown)."""
+    try:
+        result = subprocess.run([
+            "ffprobe",
+            "-v", "error",
+            "-select_streams", "a",
+            "-show_entries", "stream=index",
+            "-of", "csv=p=0",
+            media_path
+        ], check=True, capture_output=True, text=True)
+        return bool(result.stdout.strip())
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return True
+
+
+def wav_duration(audio_path: str) -> float:
+    """Return the duration of a PCM WAV file in seconds, or 0 if unreadable."""
+    try:
+        with wave.open(audio_path, 'rb') as wav:
+            return wav.getnframes() / float(wav.getframerate())
+    except (OSError, wave.Error, ZeroDivisionError):
+        return 0.0
 
 
 class VideoProcessor:
-    def __init__(self):
-        # Load Whisper model
-        self.whisper_model = whisper.load_model("base")
+    def __init__(self, model_name: Optional[str] = None, precision: Optional[str] = None,
+                 cascade: Optional[bool] = None, load_models: bool = True,
+                 chat_completion: Optional[Callable[..., Any]] = None):
+        """
+        ``load_models=False`` skips the Whisper models for callers that only
+        extract, select or render (transcription then fails). ``chat_completion``
+        replaces ``openai.ChatCompletion.create`` for segment selection.
+        """
+        # Load Whisper model (config.WHISPER_MODEL / WHISPER_PRECISION by default)
+        self.whisper_model = get_whisper_model(model_name, precision) if load_models else None
+
+        # Cascade mode: a small draft model transcribes the whole file for
+        # selection, and whisper_model only re-transcribes the chosen windows
+        self.cascade = config.WHISPER_CASCADE if cascade is None else cascade
+        self.draft_model = None
+        if self.cascade and load_models:
+            self.draft_model = get_whisper_model(config.WHISPER_DRAFT_MODEL, precision)
 
         # Set OpenAI API key
         openai.api_key = os.getenv("OPENAI_API_KEY", "your-api-key-here")
+        self.chat_completion = chat_completion or openai.ChatCompletion.create
+
+    def process_video(self, video_path: str, reel_count: int = 2, reel_duration: int = 30,
+                      workspace: Optional[JobWorkspace] = None,
+                      submitted_at: Optional[float] = None, job_id: Optional[str] = None,
+                      user: Optional[str] = None, priority: int = 0,
+                      captions: Optional[str] = None, renditions: Optional[List[str]] = None,
+                      packaging: Optional[str] = None,
+                      db_path: str = config.DATABASE_PATH, headless: bool = False,
+                      ingest: Optional[UrlIngest] = None) -> Dict[str, Any]:
+        """
+        Turn a video into reels. Jobs are admitted through the CPU scheduler:
+        when the node is saturated the call returns immediately with
+        ``busy=True`` instead of queueing, otherwise each CPU-heavy stage waits
+        for an ASR or encode slot, ordered by ``priority`` and per-``user``
+        fair share. ``captions`` is "burn", "soft", "" for none, or None for config.CAPTIONS.
+        ``renditions`` names presets from renditions.RENDITION_PRESETS (default
+        config.REEL_RENDITIONS) and ``packaging`` is "mp4" or "hls". Fingerprints
+        are matched against and indexed in ``db_path``. ``headless`` callers
+        (batch) wait for admission instead of getting ``busy``. With an
+        ``ingest`` whose audio is already fetched, transcription and selection
+        run on that audio while the video downloads; ``video_path`` is awaited
+        only before rendering.
+        """
+        try:
+            with get_scheduler().admit(user or "anonymous", priority, headless=headless):
+                return self._process_admitted(video_path, reel_count, reel_duration, workspace,
+                                              submitted_at, job_id, captions, renditions, packaging, db_path,
+                                              ingest)
+        except SchedulerBusy as e:
+            REGISTRY.inc("reelify_jobs_total", labels={'status': 'rejected'})
+            return {
+                'success': False,
+                'busy': True,
+                'error': str(e)
+            }
+
+    def _process_admitted(self, video_path: str, reel_count: int, reel_duration: int,
+                          workspace: Optional[JobWorkspace], submitted_at: Optional[float],
+                          job_id: Optional[str], captions: Optional[str], renditions: Optional[List[str]],
+                          packaging: Optional[str], db_path: str,
+                          ingest: Optional[UrlIngest] = None) -> Dict[str, Any]:
+        # Intermediates live in a per-job workspace that is removed on success
+        # and failure alike; a caller-supplied workspace is left to the caller.
+        owns_workspace = workspace is None
+        if owns_workspace:
+            workspace = JobWorkspace(job_id)
+
+        # Progress/cancel handle, reachable by id through the API
+        job = register_job(job_id or workspace.job_id)
 
-    def process_video(self, video_path: str, reel_count: int = 2, reel_duration: int = 30) -> Dict[str, Any]:
+        tracer = Tracer("process_video", job_id=workspace.job_id, source=os.path.basename(video_path))
+        if submitted_at is not None:
+            queue_wait = max(0.0, time.time() - submitted_at)
+            tracer.root.set(queue_wait_seconds=round(queue_wait, 3))
+            REGISTRY.observe("reelify_queue_wait_seconds", queue_wait)
+
+        scene_build = None
         try:
-            # Step 1: Extract audio from video
-            audio_path = self.extract_audio(video_path)
+            with tracer.activate(), job.activate():
+                # Shot boundaries are indexed in the background while the audio is processed
+                if config.SCENE_INDEX and ingest is None:
+                    scene_build = SceneIndexBuild(video_path)
 
-            # Step 2: Transcribe audio with Whisper
-            transcript_result = self.audio_to_text(audio_path)
+                # Step 1: Extract audio from video, unless the ingest already fetched it
+                if ingest is None:
+                    job.update('audio_extraction', 0.0, "Extracting audio")
+                    with span("extract_audio", metric="reelify_stage_seconds", stage="extract_audio"):
+                        audio_path = self.extract_audio(video_path, workspace=workspace)
+                else:
+                    audio_path = ingest.audio_path
 
-            # Step 3: Use AI to pick important segments
-            important_segments = self.analyze_text_segments(
-                transcript_result['text'],
-                transcript_result['segments'],
-                reel_count
-            )
+                # Step 1b: A re-encoded duplicate of an indexed video reuses its transcript
+                fingerprint, duplicate = None, None
+                if config.FINGERPRINT_ENABLED and ingest is None:
+                    with span("fingerprint", metric="reelify_stage_seconds", stage="fingerprint"):
+                        fingerprint, duplicate = self.match_fingerprint(video_path, audio_path, db_path)
+                if scene_build is not None and duplicate is not None and duplicate['scene_cuts'] is not None:
+                    scene_build.cancel()
 
-            # Step 4: Generate video clips
-            reels = self.create_reels(video_path, important_segments, reel_duration)
+                if duplicate is not None:
+                    job.update('analysis', 0.0, "Reusing the transcript of an earlier upload")
+                    with span("reuse_transcript", metric="reelify_stage_seconds", stage="reuse_transcript"):
+                        transcript_result, important_segments = self.reuse_duplicate(
+                            duplicate, fingerprint.duration, reel_count
+                        )
+                else:
+                    transcript_result, important_segments = self._transcribe_and_select(
+                        audio_path, reel_count, reel_duration, job
+                    )
 
-            # Clean up temp audio
-            os.unlink(audio_path)
+                # Step 3c: Rendering needs the video; fingerprint and index it once it is here
+                if ingest is not None:
+                    job.check_cancelled()
+                    job.update('download', 0.0, "Waiting for the video download")
+                    with span("video_download_wait", metric="reelify_stage_seconds", stage="video_download_wait"):
+                        video_path = ingest.wait_video()
+                    if config.SCENE_INDEX:
+                        scene_build = SceneIndexBuild(video_path)
+                    if config.FINGERPRINT_ENABLED:
+                        with span("fingerprint", metric="reelify_stage_seconds", stage="fingerprint"):
+                            fingerprint, duplicate = self.match_fingerprint(video_path, audio_path, db_path)
+                    if scene_build is not None and duplicate is not None and duplicate['scene_cuts'] is not None:
+                        scene_build.cancel()
 
+                # Step 4: Generate video clips
+                job.check_cancelled()
+                scene_cuts = self.collect_scene_cuts(scene_build, duplicate, fingerprint)
+                job.update('reel_generation', 0.0, "Rendering reels")
+                with span("create_reels", metric="reelify_stage_seconds", stage="create_reels"):
+                    output_dir = os.path.join(str(config.OUTPUT_DIR), workspace.job_id)
+                    rendition_set = resolve_renditions(config.REEL_RENDITIONS if renditions is None else renditions)
+                    packaging = packaging or config.REEL_PACKAGING
+                    reels = self.create_reels(video_path, important_segments, reel_duration, output_dir=output_dir,
+                                              captions=(config.CAPTIONS if captions is None else captions) or None,
+                                              transcript_segments=transcript_result['segments'],
+                                              workspace=workspace, renditions=rendition_set,
+                                              packaging=packaging, scene_cuts=scene_cuts, reframe=config.REFRAME)
+                    reel_details = describe_reels(reels, important_segments, reel_duration, rendition_set, packaging,
+                                                  scene_cuts)
+
+                if fingerprint is not None and duplicate is None:
+                    self.index_fingerprint(fingerprint, video_path, transcript_result, important_segments, reel_count,
+                                           scene_cuts, db_path)
+
+            REGISTRY.inc("reelify_jobs_total", labels={'status': 'completed'})
+            job.finish('completed', f"Generated {len(reels)} reel(s)")
             return {
                 'success': True,
+                'job_id': workspace.job_id,
                 'reels': reels,
+                'reel_details': reel_details,
                 'transcript': transcript_result['text'],
-                'important_segments': important_segments
+                'important_segments': important_segments,
+                'scene_cuts': scene_cuts.tolist() if scene_cuts is not None else None,
+                'trace': tracer.to_dict()
+            }
+
+        except JobCancelled as e:
+            REGISTRY.inc("reelify_jobs_total", labels={'status': 'cancelled'})
+            job.finish('cancelled', "Cancelled")
+            return {
+                'success': False,
+                'cancelled': True,
+                'error': str(e),
+                'trace': tracer.to_dict()
             }
 
         except Exception as e:
+            REGISTRY.inc("reelify_jobs_total", labels={'status': 'failed'})
+            job.finish('failed', str(e))
             return {
                 'success': False,
-                'error': str(e)
+                'error': str(e),
+                'trace': tracer.to_dict()
             }
 
-    def extract_audio(self, video_path: str) -> str:
+        except BaseException:
+            # Interrupted from outside (a Streamlit rerun, KeyboardInterrupt): close the job, then let it propagate
+            REGISTRY.inc("reelify_jobs_total", labels={'status': 'cancelled'})
+            job.finish('cancelled', "Interrupted")
+            raise
+
+        finally:
+            if scene_build is not None:
+                scene_build.cancel()
+            if owns_workspace:
+                workspace.cleanup()
+
+    def _transcribe_and_select(self, audio_path: str, reel_count: int, reel_duration: int,
+                               job) -> Tuple[Dict[str, Any], List[Dict]]:
+        """Steps 2-3b: transcribe, pick the reel segments and, in cascade mode, refine them."""
+        # Step 2: Transcribe audio with Whisper
+        job.update('transcription', 0.0, "Converting speech to text")
+        with span("audio_to_text", metric="reelify_stage_seconds", stage="audio_to_text"):
+            transcript_result = self.audio_to_text(audio_path)
+
+        # Step 3: Use AI to pick important segments, helped by audio cues
+        job.check_cancelled()
+        job.update('analysis', 0.0, "Selecting the most engaging segments")
+        audio_scores = None
+        if config.AUDIO_HIGHLIGHTS:
+            with span("audio_features", metric="reelify_stage_seconds", stage="audio_features"):
+                audio_scores = segment_features(audio_path, transcript_result['segments'])
+        with span("analyze_text_segments", metric="reelify_stage_seconds", stage="analyze_text_segments"):
+            important_segments = self.analyze_text_segments(
+                transcript_result['text'],
+                transcript_result['segments'],
+                reel_count,
+                audio_scores=audio_scores
+            )
+
+        # Step 3b: Cascade mode re-transcribes just the reel windows accurately
+        if self.cascade:
+            with span("refine_transcript", metric="reelify_stage_seconds", stage="refine_transcript"):
+                transcript_result, important_segments = self.refine_transcript(
+                    audio_path, transcript_result, important_segments, reel_duration
+                )
+
+        return transcript_result, important_segments
+
+    def match_fingerprint(self, video_path: str, audio_path: str,
+                          db_path: str = config.DATABASE_PATH) -> Tuple[Optional[Fingerprint], Optional[Dict]]:
+        """
+        Fingerprint the upload and look for an indexed near-duplicate. Lookup
+        problems never fail the job; they just mean no reuse.
+        """
+        try:
+            fingerprint = compute_fingerprint(video_path, audio_path)
+            duplicate = find_duplicate(fingerprint, db_path)
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Fingerprint lookup skipped: {e}")
+            return None, None
+
+        active = current_span()
+        if active is not None:
+            active.set(keyframes=len(fingerprint.hashes), duplicate=duplicate is not None)
+            if duplicate is not None:
+                active.set(duplicate_of=duplicate['source'], offset=duplicate['offset'],
+                           score=round(duplicate['score'], 3))
+        return fingerprint, duplicate
+
+    def reuse_duplicate(self, duplicate: Dict[str, Any], duration: float,
+                        reel_count: int) -> Tuple[Dict[str, Any], List[Dict]]:
+        """
+        Shift a duplicate's stored transcript and selections onto this upload's
+        timeline. Selections are re-picked from the shifted transcript when the
+        reel count differs or some fall outside this upload.
+        """
+        segments = shift_to_query(duplicate['transcript']['segments'], duplicate['offset'], duration)
+        transcript_result = {'text': ''.join(seg['text'] for seg in segments), 'segments': segments}
+
+        important_segments = shift_to_query(duplicate['important_segments'], duplicate['offset'], duration)
+        if duplicate['reel_count'] != reel_count or len(important_segments) != len(duplicate['important_segments']):
+            important_segments = self.analyze_text_segments(transcript_result['text'], segments, reel_count)
+
+        REGISTRY.inc("reelify_transcripts_reused_total")
+        return transcript_result, important_segments
+
+    def collect_scene_cuts(self, scene_build: Optional[SceneIndexBuild], duplicate: Optional[Dict[str, Any]],
+                           fingerprint: Optional[Fingerprint]) -> Optional[np.ndarray]:
+        """
+        Shot boundaries for snapping reel cuts: the duplicate's stored ones when
+        available, else the background index. A failed index only means the
+        reels are cut unsnapped.
+        """
+        if duplicate is not None and duplicate['scene_cuts'] is not None:
+            return shift_cuts(duplicate['scene_cuts'], duplicate['offset'], fingerprint.duration)
+        if scene_build is None:
+            return None
+        try:
+            with span("scene_index_wait") as active:
+                scene_cuts = scene_build.result()
+                active.set(cuts=len(scene_cuts))
+            return scene_cuts
+        except Exception as e:
+            print(f"Scene index skipped: {e}")
+            return None
+
+    def index_fingerprint(self, fingerprint: Fingerprint, video_path: str, transcript_result: Dict[str, Any],
+                          important_segments: List[Dict], reel_count: int,
+                          scene_cuts: Optional[np.ndarray] = None, db_path: str = config.DATABASE_PATH):
+        try:
+            store_fingerprint(fingerprint, os.path.basename(video_path), transcript_result,
+                              important_segments, reel_count, scene_cuts, db_path=db_path)
+        except sqlite3.Error as e:
+            print(f"Could not index fingerprint: {e}")
+
+    def extract_audio(self, video_path: str, workspace: Optional[JobWorkspace] = None) -> str:
         """
         Extract mono 16kHz PCM audio from video using ffmpeg.
         """
-        audio_path = tempfile.mktemp(suffix='.wav')
+        # The length sizes the PCM file and drives the progress bar
+        duration = probe_duration(video_path)
+        if workspace is not None:
+            # 16 kHz mono s16le is ~32 KB/s, small enough for tmpfs on short inputs;
+            # an unknown length goes to disk
+            pcm_size = _estimate_pcm_size(duration)
+            workspace.check_quota(expected=pcm_size)
+            audio_path = workspace.path("audio.wav", hot=pcm_size > 0, size_hint=pcm_size)
+        else:
+            fd, audio_path = tempfile.mkstemp(suffix='.wav')
+            os.close(fd)
         try:
-            subprocess.run([
-                "ffmpeg",
-                "-i", video_path,
-                "-vn",
-                "-acodec", "pcm_s16le",
-                "-ar", "16000",
-                "-ac", "1",
-                audio_path
-            ], check=True, capture_output=True)
+            with get_scheduler().acquire('encode') as grant:
+                run_ffmpeg([
+                    "ffmpeg",
+                    "-y",
+                    "-threads", str(grant.threads),
+                    "-i", video_path,
+                    "-vn",
+                    "-acodec", "pcm_s16le",
+                    "-ar", "16000",
+                    "-ac", "1",
+                    audio_path
+                ], op="extract_audio", inputs=[video_path], outputs=[audio_path],
+                   stage='audio_extraction', duration=duration)
+            if workspace is not None:
+                workspace.check_quota()
             return audio_path
         except subprocess.CalledProcessError as e:
             raise Exception(f"Error extracting audio: {e.stderr.decode()}")
@@ -73,17 +453,73 @@ class VideoProcessor:
         Transcribe audio using OpenAI Whisper.
         """
         try:
-            result = self.whisper_model.transcribe(audio_path)
+            model = self.draft_model if self.cascade else self.whisper_model
+            if model is None:
+                raise Exception("no Whisper model loaded (created with load_models=False)")
+            with model_lock(model), get_scheduler().acquire('asr') as grant:
+                configure_torch_threads(grant.threads)
+                started = time.time()
+                result = transcribe_windowed(model, audio_path)
+            audio_seconds = wav_duration(audio_path)
+            if audio_seconds > 0:
+                rtf = (time.time() - started) / audio_seconds
+                REGISTRY.observe("reelify_asr_real_time_factor", rtf)
+                active = current_span()
+                if active is not None:
+                    active.set(audio_seconds=round(audio_seconds, 3), real_time_factor=round(rtf, 4))
             return {
                 'text': result['text'],
                 'segments': result['segments']
             }
+        except JobCancelled:
+            raise
         except Exception as e:
             raise Exception(f"Error transcribing audio: {str(e)}")
 
-    def analyze_text_segments(self, full_text: str, segments: List[Dict], reel_count: int) -> List[Dict]:
+    def refine_transcript(self, audio_path: str, transcript: Dict[str, Any], important_segments: List[Dict],
+                          reel_duration: int) -> Tuple[Dict[str, Any], List[Dict]]:
+        """
+        Re-transcribe the selected reel windows with the accurate model.
+
+        Returns the spliced transcript and the important segments rebuilt from
+        the refined segments, so captions and cut points use the better text
+        and timestamps.
+        """
+        try:
+            windows = [reel_window(segment, reel_duration) for segment in important_segments]
+            with model_lock(self.whisper_model), get_scheduler().acquire('asr') as grant:
+                configure_torch_threads(grant.threads)
+                refined = refine_windows(self.whisper_model, audio_path, transcript, windows)
+        except JobCancelled:
+            raise
+        except Exception as e:
+            raise Exception(f"Error refining transcript: {str(e)}")
+
+        refined_segments = []
+        for segment in important_segments:
+            overlapping = [
+                seg for seg in refined['segments']
+                if seg['end'] > segment['start'] and seg['start'] < segment['end']
+            ]
+            if not overlapping:
+                refined_segments.append(segment)
+                continue
+            refined_segments.append({
+                'text': ''.join(seg['text'] for seg in overlapping).strip(),
+                'start': overlapping[0]['start'],
+                'end': overlapping[-1]['end']
+            })
+
+        return {'text': refined['text'], 'segments': refined['segments']}, refined_segments
+
+    def analyze_text_segments(self, full_text: str, segments: List[Dict], reel_count: int,
+                              audio_scores: Optional[List[Dict]] = None) -> List[Dict]:
         """
         Ask OpenAI to pick the most important segments for reels.
+
+        ``audio_scores`` (from audio_features.segment_features, one per segment)
+        are added to each segment's columns in the prompt and drive the
+        fallback pick when the API is unavailable.
         """
         try:
             segment_texts = [
@@ -95,6 +531,12 @@ class VideoProcessor:
                 }
                 for i, seg in enumerate(segments)
             ]
+            audio_hint = ""
+            if audio_scores:
+                for segment_text, scores in zip(segment_texts, audio_scores):
+                    segment_text.update(scores)
+                audio_hint = ("- Have a high audio_score (raised voices, laughter or applause; "
+                              "loudness_z, flux_z and onsets_per_sec are its parts)")
 
             prompt = f"""
             Analyze the following video transcript and identify the {reel_count} most important, engaging, and meaningful segments that would make great short video reels.
@@ -104,6 +546,7 @@ class VideoProcessor:
             - Contain key information or insights
             - Have emotional impact
             - Are self-contained and make sense on their own
+            {audio_hint}
 
             Full transcript: {full_text}
 
@@ -114,7 +557,7 @@ class VideoProcessor:
             Example: [2, 7, 15]
             """
 
-            response = openai.ChatCompletion.create(
+            response = self.chat_completion(
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": "You are an expert video editor who selects impactful clips for reels."},
@@ -139,6 +582,9 @@ class VideoProcessor:
             return important_segments
 
         except Exception as e:
+            if audio_scores:
+                return self._loudest_segments(segments, audio_scores, reel_count)
+
             # Fallback: evenly pick from start
             fallback = []
             step = max(1, len(segments) // reel_count)
@@ -153,33 +599,183 @@ class VideoProcessor:
                     break
             return fallback
 
-    def create_reels(self, video_path: str, important_segments: List[Dict], reel_duration: int) -> List[str]:
+    @staticmethod
+    def _loudest_segments(segments: List[Dict], audio_scores: List[Dict], reel_count: int) -> List[Dict]:
+        """Fallback pick: the highest audio_score segments, in timeline order."""
+        ranked = sorted(range(len(segments)), key=lambda i: audio_scores[i]['audio_score'], reverse=True)
+        chosen = sorted(ranked[:reel_count])
+        return [
+            {'text': segments[i]['text'], 'start': segments[i]['start'], 'end': segments[i]['end']}
+            for i in chosen
+        ]
+
+    def create_reels(self, video_path: str, important_segments: List[Dict], reel_duration: int,
+                     output_dir: Optional[str] = None, captions: Optional[str] = None,
+                     transcript_segments: Optional[List[Dict]] = None,
+                     workspace: Optional[JobWorkspace] = None, renditions: Optional[List[Rendition]] = None,
+                     packaging: str = "mp4", scene_cuts: Optional[np.ndarray] = None,
+                     reframe: bool = False) -> List[str]:
         """
         Generate reel video clips using ffmpeg from the selected segments.
+
+        With ``renditions`` every reel is decoded once and split into one
+        scale/crop chain per rendition, all encoded by the same ffmpeg run
+        (reel_N.mp4 is the first rendition, reel_N_<name>.mp4 the others).
+        ``packaging="hls"`` writes the renditions as fMP4 HLS variants under
+        reel_N/ instead, and reel_N.mp4 is remuxed from the first variant.
+
+        With ``captions="burn"`` the transcript lines inside each reel window are
+        rendered into the picture by the subtitles filter of the same encode;
+        ``captions="soft"`` muxes them as a selectable mov_text track instead.
+        Captions come from ``transcript_segments`` (the important segments
+        themselves when omitted).
+
+        ``scene_cuts`` (shot boundaries in seconds, see scene_index.py) move
+        each reel's start and end onto a nearby cut.
+
+        With ``reframe`` each window is first analysed at low resolution (see
+        reframe.py) and the crop follows the subject: cropping renditions use
+        the tracked crop instead of the center one, and without renditions
+        the reel is cropped to 9:16 at the source height.
         """
+        if captions is not None and captions not in CAPTION_MODES:
+            raise ValueError(f"Unknown caption mode '{captions}', expected one of {CAPTION_MODES}")
+        if packaging not in PACKAGINGS:
+            raise ValueError(f"Unknown packaging '{packaging}', expected one of {PACKAGINGS}")
+        has_audio = probe_has_audio(video_path) if renditions and packaging == 'hls' else True
+
         reels = []
+        if output_dir is None:
+            output_dir = tempfile.mkdtemp(prefix='reels_')
+        os.makedirs(output_dir, exist_ok=True)
+        if workspace is not None:
+            # Reels outlive the workspace but count against the job's quota
+            workspace.track(output_dir)
 
+        scheduler = get_scheduler()
         for i, segment in enumerate(important_segments):
+            caption_path = None
             try:
-                start_time = max(0, segment['start'] - 2)
-                end_time = min(start_time + reel_duration, segment['end'] + 2)
-                output_path = tempfile.mktemp(suffix=f'_reel_{i+1}.mp4')
+                start_time, end_time = reel_window(segment, reel_duration, scene_cuts)
+                output_path = os.path.join(output_dir, f'reel_{i+1}.mp4')
+                fraction_range = (i / len(important_segments), (i + 1) / len(important_segments))
 
-                subprocess.run([
-                    "ffmpeg",
-                    "-ss", str(start_time),
-                    "-i", video_path,
-                    "-t", str(end_time - start_time),
-                    "-vcodec", "libx264",
-                    "-acodec", "aac",
-                    "-crf", "23",
-                    "-preset", "medium",
-                    output_path
-                ], check=True, capture_output=True)
+                cues = []
+                if captions is not None:
+                    cues = rebase_segments(transcript_segments or important_segments, start_time, end_time)
+                # A window without speech gets no captions: an empty .srt input makes ffmpeg fail
+                reel_captions = captions if cues else None
+                if reel_captions is not None:
+                    suffix = '.ass' if captions == 'burn' else '.srt'
+                    if workspace is not None:
+                        caption_path = workspace.path(f"reel_{i+1}{suffix}", hot=True)
+                    else:
+                        fd, caption_path = tempfile.mkstemp(suffix=suffix)
+                        os.close(fd)
+                    (write_ass if captions == 'burn' else write_srt)(cues, caption_path)
+
+                with span(f"reel_{i+1}", start=start_time, end=end_time):
+                    # Subject analysis decodes on its own, outside the encode slot
+                    trajectory = self.track_subject(video_path, start_time, end_time) if reframe else None
+                    with scheduler.acquire('encode') as grant:
+                        if renditions:
+                            self._encode_renditions(video_path, start_time, end_time, renditions, packaging,
+                                                    os.path.join(output_dir, f'reel_{i+1}'), reel_captions,
+                                                    caption_path, grant.threads, fraction_range, has_audio,
+                                                    trajectory)
+                        else:
+                            inputs = ["-ss", str(start_time), "-i", video_path]
+                            caption_args = []
+                            # Input seeking restarts timestamps at 0, matching the rebased cues and the crop expression
+                            filters = [crop_filter(trajectory, VERTICAL_ASPECT)] if trajectory is not None else []
+                            if reel_captions == 'burn':
+                                filters.append(subtitles_filter(caption_path))
+                            if filters:
+                                caption_args = ["-vf", ",".join(filters)]
+                            if reel_captions == 'soft':
+                                inputs += ["-i", caption_path]
+                                caption_args += ["-map", "0:v:0", "-map", "0:a?", "-map", "1:s", "-c:s", "mov_text"]
+
+                            run_ffmpeg([
+                                "ffmpeg",
+                                "-y",
+                                *inputs,
+                                "-t", str(end_time - start_time),
+                                *caption_args,
+                                *video_codec_args(),
+                                "-acodec", "aac",
+                                "-threads", str(grant.threads),
+                                output_path
+                            ], op="cut_reel", outputs=[output_path],
+                               stage='reel_generation', duration=end_time - start_time, fraction_range=fraction_range)
 
                 reels.append(output_path)
+                if workspace is not None:
+                    workspace.check_quota()
             except subprocess.CalledProcessError as e:
+                REGISTRY.inc("reelify_reel_failures_total")
                 print(f"Error creating reel {i+1}: {e.stderr.decode()}")
                 continue
+            finally:
+                # Workspace files go away with the workspace
+                if caption_path is not None and workspace is None:
+                    os.remove(caption_path)
 
         return reels
+
+    def track_subject(self, video_path: str, start_time: float, end_time: float) -> Optional[np.ndarray]:
+        """Subject trajectory of a reel window; analysis problems fall back to the center crop."""
+        with span("reframe", metric="reelify_stage_seconds", stage="reframe") as active:
+            try:
+                trajectory = track_subject(video_path, start_time, end_time - start_time)
+            except Exception as e:
+                print(f"Reframe skipped: {e}")
+                return None
+            active.set(samples=0 if trajectory is None else len(trajectory))
+            return trajectory
+
+    def _encode_renditions(self, video_path: str, start_time: float, end_time: float,
+                           renditions: List[Rendition], packaging: str, output_stem: str,
+                           captions: Optional[str], caption_path: Optional[str], threads: int,
+                           fraction_range: Tuple[float, float], has_audio: bool = True,
+                           trajectory: Optional[np.ndarray] = None):
+        """One decode of the reel window, split into every rendition's encode."""
+        duration = end_time - start_time
+        inputs = ["-ss", str(start_time), "-t", str(duration), "-i", video_path]
+        if captions == 'soft':
+            inputs += ["-i", caption_path]
+
+        graph, labels = filter_graph(renditions, subtitles_filter(caption_path) if captions == 'burn' else None,
+                                     trajectory)
+        if packaging == 'hls':
+            output_args, _ = hls_output(renditions, labels, output_stem, has_audio)
+            outputs = [output_stem]
+        else:
+            output_args, outputs = mp4_outputs(renditions, labels, output_stem,
+                                               subtitle_input=1 if captions == 'soft' else None)
+
+        run_ffmpeg([
+            "ffmpeg",
+            "-y",
+            *inputs,
+            "-filter_complex", graph,
+            "-threads", str(threads),
+            *output_args
+        ], op="cut_renditions", outputs=outputs,
+           stage='reel_generation', duration=duration, fraction_range=fraction_range)
+
+        if packaging == 'hls':
+            # Progressive copy of the top variant for download/preview: stream copy, no re-encode
+            subtitle_args = ["-i", caption_path] if captions == 'soft' else []
+            run_ffmpeg([
+                "ffmpeg",
+                "-y",
+                "-i", os.path.join(output_stem, renditions[0].name, "index.m3u8"),
+                *subtitle_args,
+                "-map", "0",
+                *(["-map", "1:s", "-c:s", "mov_text"] if subtitle_args else []),
+                "-c:v", "copy",
+                "-c:a", "copy",
+                "-movflags", "+faststart",
+                f"{output_stem}.mp4"
+            ], op="remux_reel", outputs=[f"{output_stem}.mp4"])
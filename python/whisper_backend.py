@@ -0,0 +1,188 @@
+import os
+import re
+import threading
+import time
+import weakref
+from typing import Any, Dict, List, Optional
+
+import config
+from model_store import load_mapped
+
+PRECISIONS = ("fp32", "int8")
+
+_threads_configured = False
+
+# Whisper's kv-cache hooks live on the model's modules, so one model must not
+# decode two inputs at once; every shared model gets its own (reentrant) lock
+_model_locks: "weakref.WeakKeyDictionary[Any, threading.RLock]" = weakref.WeakKeyDictionary()
+_model_locks_guard = threading.Lock()
+
+# Loaded models by (name, precision), see get_whisper_model
+_models: Dict[Any, Any] = {}
+_models_guard = threading.Lock()
+
+
+def configure_torch_threads(threads: Optional[int] = None):
+    """
+    Pin torch's intra-op pool to ``threads`` (default: config.WHISPER_THREADS,
+    or every core when that is 0). The inter-op pool (config.WHISPER_INTEROP_THREADS)
+    is only settable before torch starts parallel work, so it is set once per process.
+    """
+    global _threads_configured
+    import torch
+
+    threads = threads or config.WHISPER_THREADS or os.cpu_count() or 1
+    torch.set_num_threads(threads)
+    if not _threads_configured:
+        try:
+            torch.set_num_interop_threads(max(1, config.WHISPER_INTEROP_THREADS))
+        except RuntimeError:
+            pass
+        _threads_configured = True
+
+
+def _quantize_int8(model):
+    """Apply dynamic int8 quantization to every linear layer of a Whisper model."""
+    import torch
+
+    # Whisper subclasses nn.Linear only to cast weights for fp16; the quantizer
+    # matches exact types, so turn those back into plain nn.Linear first.
+    for module in model.modules():
+        if isinstance(module, torch.nn.Linear) and type(module) is not torch.nn.Linear:
+            module.__class__ = torch.nn.Linear
+
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def load_whisper_model(name: Optional[str] = None, precision: Optional[str] = None,
+                       threads: Optional[int] = None):
+    """
+    Load a Whisper model for CPU inference.
+
+    ``precision`` is "fp32" (stock weights) or "int8" (dynamically quantized
+    linear layers, roughly 2x faster on CPU with a small accuracy cost; see
+    ``quantization_report``). Defaults come from config.WHISPER_MODEL and
+    config.WHISPER_PRECISION. With config.WHISPER_MMAP the fp32 weights are
+    mapped from a converted checkpoint (see model_store.py); int8 then
+    quantizes from the mapped weights into private memory.
+    """
+    import whisper
+
+    name = name or config.WHISPER_MODEL
+    precision = precision or config.WHISPER_PRECISION
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown Whisper precision '{precision}', expected one of {PRECISIONS}")
+
+    configure_torch_threads(threads)
+    # Memory-mapped weights load in milliseconds and are shared between processes
+    model = load_mapped(name) if config.WHISPER_MMAP else None
+    if model is None:
+        model = whisper.load_model(name, device="cpu")
+    if precision == "int8":
+        model = _quantize_int8(model)
+    model.eval()
+    return model
+
+
+def get_whisper_model(name: Optional[str] = None, precision: Optional[str] = None):
+    """Process-wide cached ``load_whisper_model``; every caller shares one instance per model."""
+    key = (name or config.WHISPER_MODEL, precision or config.WHISPER_PRECISION)
+    with _models_guard:
+        model = _models.get(key)
+        if model is None:
+            model = load_whisper_model(*key)
+            _models[key] = model
+        return model
+
+
+def model_lock(model) -> threading.RLock:
+    """
+    The lock serialising ``model``. Take it before an ASR scheduler slot so
+    the slot is not held while waiting for another job's decode.
+    """
+    with _model_locks_guard:
+        lock = _model_locks.get(model)
+        if lock is None:
+            lock = threading.RLock()
+            _model_locks[model] = lock
+        return lock
+
+
+def transcribe(model, audio, **options) -> Dict[str, Any]:
+    """Run ``model.transcribe`` with CPU-appropriate defaults under inference mode."""
+    import torch
+
+    options.setdefault("fp16", False)
+    with model_lock(model), torch.inference_mode():
+        return model.transcribe(audio, **options)
+
+
+def _normalize_words(text: str) -> List[str]:
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """Word-level Levenshtein distance divided by the reference length."""
+    ref = _normalize_words(reference)
+    hyp = _normalize_words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            )
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def quantization_report(samples: List[Dict[str, str]], name: Optional[str] = None,
+                        threads: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Compare int8 against fp32 transcription on a fixed sample set.
+
+    Each sample is ``{'audio': path, 'reference': text}``; without a reference
+    the fp32 transcript is used as one, so the WER delta then measures how far
+    int8 drifts from fp32. Returns per-sample rows and totals.
+    """
+    name = name or config.WHISPER_MODEL
+    rows = []
+    timings = {}
+
+    for precision in PRECISIONS:
+        model = load_whisper_model(name, precision=precision, threads=threads)
+        transcribe(model, samples[0]['audio'])  # warm-up so the first sample is not penalized
+        total = 0.0
+        for i, sample in enumerate(samples):
+            started = time.perf_counter()
+            text = transcribe(model, sample['audio'])['text']
+            elapsed = time.perf_counter() - started
+            total += elapsed
+            if precision == "fp32":
+                rows.append({'audio': sample['audio'], 'reference': sample.get('reference'), 'fp32_text': text,
+                             'fp32_seconds': round(elapsed, 3)})
+            else:
+                rows[i].update({'int8_text': text, 'int8_seconds': round(elapsed, 3)})
+        timings[precision] = total
+        del model
+
+    for row in rows:
+        reference = row['reference'] or row['fp32_text']
+        row['fp32_wer'] = round(word_error_rate(reference, row['fp32_text']), 4)
+        row['int8_wer'] = round(word_error_rate(reference, row['int8_text']), 4)
+        row['wer_delta'] = round(row['int8_wer'] - row['fp32_wer'], 4)
+
+    return {
+        'model': name,
+        'threads': threads or config.WHISPER_THREADS or os.cpu_count(),
+        'samples': rows,
+        'fp32_seconds': round(timings['fp32'], 3),
+        'int8_seconds': round(timings['int8'], 3),
+        'speedup': round(timings['fp32'] / timings['int8'], 2) if timings['int8'] else 0.0,
+        'mean_wer_delta': round(sum(row['wer_delta'] for row in rows) / len(rows), 4) if rows else 0.0
+    }
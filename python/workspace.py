@@ -0,0 +1,211 @@
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import List, Optional, Set
+
+import config
+
+
+class WorkspaceQuotaExceeded(Exception):
+    """Raised when a job writes more scratch data than its disk quota allows."""
+
+
+def _default_tmpfs_root() -> Optional[Path]:
+    """Return the RAM-backed tmpfs root to use for hot files, if any."""
+    if not config.TMPFS_DIR:
+        return None
+    root = Path(config.TMPFS_DIR)
+    if root.is_dir() and os.access(root, os.W_OK):
+        return root / "reelify"
+    return None
+
+
+HEARTBEAT_SECONDS = 60  # how often live workspaces touch their owner file
+STALE_AFTER_SECONDS = 5 * HEARTBEAT_SECONDS  # owner files older than this belong to dead processes
+
+_live_owners: Set[Path] = set()
+_live_lock = threading.Lock()
+_heartbeat_thread: Optional[threading.Thread] = None
+
+
+def _heartbeat():
+    while True:
+        time.sleep(HEARTBEAT_SECONDS)
+        with _live_lock:
+            owners = list(_live_owners)
+        for owner in owners:
+            try:
+                os.utime(owner)
+            except OSError:
+                pass
+
+
+def _register_owner(owner: Path):
+    """
+    Keep an owner file's mtime fresh while this process lives. Liveness is
+    judged by that mtime rather than by PID, which means nothing on a
+    scratch dir shared between hosts or containers (and os.kill(pid, 0)
+    does something else entirely on Windows).
+    """
+    global _heartbeat_thread
+    with _live_lock:
+        _live_owners.add(owner)
+        if _heartbeat_thread is None:
+            _heartbeat_thread = threading.Thread(target=_heartbeat, daemon=True)
+            _heartbeat_thread.start()
+
+
+def _unregister_owner(owner: Path):
+    with _live_lock:
+        _live_owners.discard(owner)
+
+
+class JobWorkspace:
+    """
+    Per-job scratch area for pipeline intermediates.
+
+    Large files go to ``<scratch>/<job_id>`` on disk. Small, hot files such as
+    PCM audio or segment lists can be requested with ``hot=True`` and are placed
+    on tmpfs when one is available and has room. Everything is removed on
+    ``cleanup()``, which also runs when the workspace is used as a context
+    manager, whether the job succeeded or failed.
+
+    The quota covers the disk and tmpfs areas plus any directory passed to
+    ``track()`` (e.g. the job's reel output), which is counted but kept.
+    """
+
+    OWNER_FILE = ".owner"
+
+    def __init__(self, job_id: Optional[str] = None, root: Optional[str] = None,
+                 tmpfs_root: Optional[str] = None, quota_bytes: Optional[int] = None,
+                 keep: bool = False):
+        self.job_id = job_id or uuid.uuid4().hex
+        self.root = Path(root) if root else Path(config.SCRATCH_DIR)
+        self.tmpfs_root = Path(tmpfs_root) if tmpfs_root else _default_tmpfs_root()
+        self.quota_bytes = config.JOB_DISK_QUOTA if quota_bytes is None else quota_bytes
+        self.keep = keep
+        self.tracked: List[Path] = []
+
+        self.disk_dir = self.root / self.job_id
+        self.disk_dir.mkdir(parents=True, exist_ok=True)
+        self._write_owner(self.disk_dir)
+
+        self.hot_dir = None
+        if self.tmpfs_root is not None:
+            try:
+                self.hot_dir = self.tmpfs_root / self.job_id
+                self.hot_dir.mkdir(parents=True, exist_ok=True)
+                self._write_owner(self.hot_dir)
+            except OSError:
+                self.hot_dir = None
+
+    def _write_owner(self, directory: Path):
+        owner = directory / self.OWNER_FILE
+        owner.write_text(f"{socket.gethostname()} {os.getpid()} {time.time():.0f}")
+        _register_owner(owner)
+
+    def path(self, name: str, hot: bool = False, size_hint: int = 0) -> str:
+        """
+        Return a collision-free path for an intermediate file inside this job.
+
+        ``hot`` files go to tmpfs unless the expected size exceeds
+        ``config.TMPFS_MAX_FILE_SIZE`` or the free space left on the tmpfs.
+        """
+        if hot and self.hot_dir is not None and size_hint <= config.TMPFS_MAX_FILE_SIZE:
+            try:
+                free = shutil.disk_usage(self.hot_dir).free
+            except OSError:
+                free = 0
+            if size_hint < free:
+                return str(self.hot_dir / name)
+        return str(self.disk_dir / name)
+
+    def track(self, directory: str):
+        """Count the files under ``directory`` against the quota without removing them on cleanup."""
+        path = Path(directory)
+        if path not in self.tracked:
+            self.tracked.append(path)
+
+    def usage(self) -> int:
+        """Bytes currently written by this job: disk, tmpfs and tracked directories."""
+        total = 0
+        for directory in [self.disk_dir, self.hot_dir] + self.tracked:
+            if directory is None:
+                continue
+            for dirpath, _, filenames in os.walk(directory):
+                for filename in filenames:
+                    try:
+                        total += os.path.getsize(os.path.join(dirpath, filename))
+                    except OSError:
+                        pass
+        return total
+
+    def check_quota(self, expected: int = 0):
+        """
+        Raise WorkspaceQuotaExceeded if the job is over its quota, or would be
+        after writing ``expected`` more bytes.
+        """
+        if not self.quota_bytes:
+            return
+        used = self.usage()
+        if used + expected > self.quota_bytes:
+            raise WorkspaceQuotaExceeded(
+                f"Job {self.job_id} uses {used / (1024 * 1024):.1f} MB"
+                + (f" and needs {expected / (1024 * 1024):.1f} MB more" if expected else "")
+                + f", quota is {self.quota_bytes / (1024 * 1024):.1f} MB"
+            )
+
+    def cleanup(self):
+        """Remove all intermediates of this job."""
+        for directory in (self.disk_dir, self.hot_dir):
+            if directory is not None:
+                _unregister_owner(directory / self.OWNER_FILE)
+                shutil.rmtree(directory, ignore_errors=True)
+
+    def __enter__(self) -> "JobWorkspace":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self.keep:
+            self.cleanup()
+        return False
+
+
+def cleanup_stale_workspaces(root: Optional[str] = None, tmpfs_root: Optional[str] = None,
+                             max_age: Optional[float] = None) -> int:
+    """
+    Remove workspaces left behind by crashed processes.
+
+    A workspace is stale when its owner file has not been touched by the
+    heartbeat for STALE_AFTER_SECONDS, or when it is older than ``max_age``
+    seconds. Returns the number removed.
+    """
+    max_age = config.WORKSPACE_MAX_AGE if max_age is None else max_age
+    roots = [Path(root) if root else Path(config.SCRATCH_DIR)]
+    hot_root = Path(tmpfs_root) if tmpfs_root else _default_tmpfs_root()
+    if hot_root is not None:
+        roots.append(hot_root)
+
+    removed = 0
+    now = time.time()
+    for base in roots:
+        if not base.is_dir():
+            continue
+        for directory in base.iterdir():
+            owner = directory / JobWorkspace.OWNER_FILE
+            if not directory.is_dir() or not owner.exists():
+                continue
+            try:
+                created = float(owner.read_text().split()[-1])
+                heartbeat = owner.stat().st_mtime
+            except (OSError, ValueError, IndexError):
+                continue
+            expired = bool(max_age) and now - created > max_age
+            if expired or now - heartbeat > STALE_AFTER_SECONDS:
+                shutil.rmtree(directory, ignore_errors=True)
+                removed += 1
+    return removed
@@ -0,0 +1,70 @@
+"""
+ZIP archives streamed as they are written.
+
+zipfile writes to an unseekable sink by putting each member's CRC and sizes
+in a data descriptor after its data, so an archive can be produced front to
+back without a temp file. Members are stored, not deflated: MP4 is already
+compressed, and stored members cost no CPU beyond the CRC.
+"""
+
+import io
+import os
+import time
+import zipfile
+from typing import Iterable, Iterator, List, Tuple
+
+CHUNK_SIZE = 1 << 20
+
+
+class _StreamSink(io.RawIOBase):
+    """Write-only, unseekable file that collects what zipfile writes until drained."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self) -> Iterator[bytes]:
+        """Everything written since the last drain, as at most one non-empty piece."""
+        if self._chunks:
+            data = b"".join(self._chunks)
+            self._chunks = []
+            yield data
+
+
+def stream_zip(entries: Iterable[Tuple[str, str]], chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Yield a stored ZIP of ``(path, archive_name)`` entries piece by piece.
+    At most one chunk of file data is held in memory at a time.
+    """
+    sink = _StreamSink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for path, name in entries:
+            info = zipfile.ZipInfo(name, date_time=time.localtime(os.path.getmtime(path))[:6])
+            info.compress_type = zipfile.ZIP_STORED
+            # Known up front so zipfile picks ZIP64 headers for members over 4 GiB
+            info.file_size = os.path.getsize(path)
+            with open(path, "rb") as source, archive.open(info, mode="w") as member:
+                while True:
+                    chunk = source.read(chunk_size)
+                    if not chunk:
+                        break
+                    member.write(chunk)
+                    yield from sink.drain()
+            # Data descriptor of the member just closed
+            yield from sink.drain()
+    # Central directory, written when the archive closes
+    yield from sink.drain()
@@ -1,7 +1,12 @@
 import React, { useEffect, useState } from 'react';
 import { supabase } from '../lib/supabase';
 import { ProcessingStatus as ProcessingStatusType } from '../types';
-import { Loader2, CheckCircle, AlertCircle } from 'lucide-react';
+import { Loader2, CheckCircle, AlertCircle, XCircle } from 'lucide-react';
+
+// Python processing API (api.py); when set, live progress comes from its event stream.
+// The upload backend starts the job there with POST /api/jobs/<videoId>/process (passing the
+// Supabase user id as the job's owner), so the Supabase video id is also the Python job id.
+const apiUrl = import.meta.env.VITE_REELIFY_API_URL as string | undefined;
 
 interface ProcessingStatusProps {
   videoId: string;
@@ -11,6 +16,53 @@ interface ProcessingStatusProps {
 export const ProcessingStatus: React.FC<ProcessingStatusProps> = ({ videoId, onComplete }) => {
   const [status, setStatus] = useState<ProcessingStatusType | null>(null);
   const [error, setError] = useState('');
+  const [cancelling, setCancelling] = useState(false);
+
+  useEffect(() => {
+    if (!apiUrl) return;
+
+    const events = new EventSource(`${apiUrl}/api/jobs/${videoId}/events`);
+    events.onmessage = (event) => {
+      const newStatus = JSON.parse(event.data) as ProcessingStatusType;
+      setStatus(newStatus);
+      if (newStatus.stage === 'completed') {
+        onComplete();
+      }
+      if (newStatus.finished) {
+        events.close();
+      }
+    };
+    events.onerror = () => {
+      // Job unknown to this API instance or stream closed; fall back to Supabase updates
+      events.close();
+    };
+
+    return () => {
+      events.close();
+    };
+  }, [videoId, onComplete]);
+
+  const handleCancel = async () => {
+    if (!apiUrl) return;
+    setCancelling(true);
+    try {
+      // api.py only lets the job's owner cancel it; it verifies the Supabase session token
+      const { data: { session } } = await supabase.auth.getSession();
+      if (!session) {
+        throw new Error('Sign in again to cancel');
+      }
+      const response = await fetch(`${apiUrl}/api/jobs/${videoId}/cancel`, {
+        method: 'POST',
+        headers: { Authorization: `Bearer ${session.access_token}` }
+      });
+      if (!response.ok) {
+        throw new Error(`Cancel failed (${response.status})`);
+      }
+    } catch (err: any) {
+      setError(err.message);
+      setCancelling(false);
+    }
+  };
 
   useEffect(() => {
     const fetchStatus = async () => {
@@ -99,13 +151,39 @@ export const ProcessingStatus: React.FC<ProcessingStatusProps> = ({ videoId, onC
     { key: 'completed', label: 'Processing Complete' }
   ];
 
+  if (status.stage === 'cancelled' || status.stage === 'failed') {
+    return (
+      <div className="bg-gray-50 border border-gray-200 rounded-md p-4">
+        <div className="flex">
+          <XCircle className="h-5 w-5 text-gray-400" />
+          <div className="ml-3">
+            <p className="text-sm text-gray-800">
+              {status.stage === 'cancelled' ? 'Processing cancelled' : `Processing failed: ${status.message}`}
+            </p>
+          </div>
+        </div>
+      </div>
+    );
+  }
+
   const currentStageIndex = stages.findIndex(stage => stage.key === status.stage);
 
   return (
     <div className="bg-white border border-gray-200 rounded-lg p-6">
-      <div className="mb-4">
-        <h3 className="text-lg font-medium text-gray-900 mb-2">Processing Video</h3>
-        <p className="text-sm text-gray-600">{status.message}</p>
+      <div className="mb-4 flex items-start justify-between">
+        <div>
+          <h3 className="text-lg font-medium text-gray-900 mb-2">Processing Video</h3>
+          <p className="text-sm text-gray-600">{status.message}</p>
+        </div>
+        {apiUrl && (
+          <button
+            onClick={handleCancel}
+            disabled={cancelling}
+            className="text-sm text-gray-600 hover:text-red-600 disabled:opacity-50"
+          >
+            {cancelling ? 'Cancelling...' : 'Cancel'}
+          </button>
+        )}
       </div>
 
       <div className="space-y-3">
@@ -1,8 +1,12 @@
 import React, { useEffect, useState } from 'react';
 import { supabase } from '../lib/supabase';
 import { Reel } from '../types';
+import { ThumbnailScrubber } from './ThumbnailScrubber';
 import { Play, Download, Share2, Clock, Calendar } from 'lucide-react';
 
+// Python processing API (api.py); when set, reels without a stored thumbnail index get one from it
+const apiUrl = import.meta.env.VITE_REELIFY_API_URL as string | undefined;
+
 interface ReelsListProps {
   videoId: string;
 }
@@ -11,6 +15,7 @@ export const ReelsList: React.FC<ReelsListProps> = ({ videoId }) => {
   const [reels, setReels] = useState<Reel[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
+  const [thumbnailVtts, setThumbnailVtts] = useState<Record<string, string>>({});
 
   useEffect(() => {
     const fetchReels = async () => {
@@ -54,6 +59,32 @@ export const ReelsList: React.FC<ReelsListProps> = ({ videoId }) => {
     };
   }, [videoId]);
 
+  useEffect(() => {
+    if (!apiUrl) return;
+    let cancelled = false;
+    for (const reel of reels) {
+      if (reel.status !== 'completed' || reel.thumbnails_vtt || thumbnailVtts[reel.id]) continue;
+      fetch(`${apiUrl}/api/thumbnails?url=${encodeURIComponent(reel.url)}`)
+        .then((response) => (response.ok ? response.json() : null))
+        .then((body) => {
+          if (!cancelled && body?.vtt_url) {
+            setThumbnailVtts((current) => ({ ...current, [reel.id]: `${apiUrl}${body.vtt_url}` }));
+          }
+        })
+        .catch(() => undefined);
+    }
+    return () => {
+      cancelled = true;
+    };
+  }, [reels]);
+
+  const thumbnailsVtt = (reel: Reel) => reel.thumbnails_vtt ?? thumbnailVtts[reel.id];
+
+  // Safari plays HLS natively; other browsers get the progressive MP4
+  const supportsHls = document.createElement('video').canPlayType('application/vnd.apple.mpegurl') !== '';
+
+  const playbackUrl = (reel: Reel) => (reel.hls_url && supportsHls ? reel.hls_url : reel.url);
+
   const formatDuration = (seconds: number) => {
     return `${Math.floor(seconds / 60)}:${(seconds % 60).toString().padStart(2, '0')}`;
   };
@@ -100,11 +131,14 @@ export const ReelsList: React.FC<ReelsListProps> = ({ videoId }) => {
         {reels.map((reel) => (
           <div key={reel.id} className="bg-white border border-gray-200 rounded-lg overflow-hidden shadow-sm hover:shadow-md transition-shadow">
             <div className="aspect-video bg-gray-100 relative">
-              {reel.status === 'completed' ? (
+              {reel.status === 'completed' && thumbnailsVtt(reel) ? (
+                // Keyframe sprite scrubbed on hover; the video itself only loads on Play
+                <ThumbnailScrubber vttUrl={thumbnailsVtt(reel)!} className="w-full h-full" />
+              ) : reel.status === 'completed' ? (
                 <video
-                  src={reel.url}
+                  src={playbackUrl(reel)}
                   className="w-full h-full object-cover"
-                  poster={`${reel.url}#t=1`}
+                  preload="metadata"
                 />
               ) : (
                 <div className="w-full h-full flex items-center justify-center">
@@ -131,10 +165,25 @@ export const ReelsList: React.FC<ReelsListProps> = ({ videoId }) => {
                 </div>
               </div>
               
+              {reel.status === 'completed' && reel.renditions && reel.renditions.length > 1 && (
+                <div className="flex flex-wrap gap-2 mb-3">
+                  {reel.renditions.map((rendition) => (
+                    <a
+                      key={rendition.name}
+                      href={rendition.url}
+                      download={`${reel.title}_${rendition.name}.mp4`}
+                      className="text-xs px-2 py-1 border border-gray-300 rounded text-gray-600 hover:bg-gray-50"
+                    >
+                      {rendition.width}×{rendition.height}
+                    </a>
+                  ))}
+                </div>
+              )}
+
               {reel.status === 'completed' ? (
                 <div className="flex space-x-2">
                   <button
-                    onClick={() => window.open(reel.url, '_blank')}
+                    onClick={() => window.open(playbackUrl(reel), '_blank')}
                     className="flex-1 bg-indigo-600 text-white px-3 py-2 rounded-md text-sm font-medium hover:bg-indigo-700 transition-colors flex items-center justify-center"
                   >
                     <Play className="h-4 w-4 mr-1" />
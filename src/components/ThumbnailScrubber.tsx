@@ -0,0 +1,83 @@
+import React, { useEffect, useState } from 'react';
+
+interface SpriteCue {
+  start: number;
+  end: number;
+  sprite: string;
+  x: number;
+  y: number;
+  width: number;
+  height: number;
+}
+
+interface ThumbnailScrubberProps {
+  vttUrl: string;
+  className?: string;
+}
+
+const parseTimestamp = (value: string) =>
+  value.split(':').reduce((total, part) => total * 60 + parseFloat(part), 0);
+
+// WebVTT thumbnail index written by thumbnails.py: one `sprite.jpg#xywh=x,y,w,h` cue per tile
+const parseSpriteVtt = (text: string, baseUrl: string): SpriteCue[] => {
+  const cues: SpriteCue[] = [];
+  for (const block of text.split(/\r?\n\r?\n/)) {
+    const lines = block.trim().split(/\r?\n/);
+    const timing = lines.findIndex((line) => line.includes('-->'));
+    if (timing < 0 || !lines[timing + 1]) continue;
+
+    const [start, end] = lines[timing].split('-->').map((part) => parseTimestamp(part.trim()));
+    const [file, fragment] = lines[timing + 1].split('#xywh=');
+    if (!fragment) continue;
+    const [x, y, width, height] = fragment.split(',').map(Number);
+    cues.push({ start, end, sprite: new URL(file, baseUrl).href, x, y, width, height });
+  }
+  return cues;
+};
+
+export const ThumbnailScrubber: React.FC<ThumbnailScrubberProps> = ({ vttUrl, className }) => {
+  const [cues, setCues] = useState<SpriteCue[]>([]);
+  const [index, setIndex] = useState(0);
+
+  useEffect(() => {
+    let cancelled = false;
+    fetch(vttUrl)
+      .then((response) => (response.ok ? response.text() : ''))
+      .then((text) => {
+        if (!cancelled) setCues(parseSpriteVtt(text, new URL(vttUrl, window.location.href).href));
+      })
+      .catch(() => {
+        if (!cancelled) setCues([]);
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, [vttUrl]);
+
+  if (cues.length === 0) {
+    return <div className={`bg-gray-200 ${className ?? ''}`} />;
+  }
+
+  const cue = cues[Math.min(index, cues.length - 1)];
+  const duration = cues[cues.length - 1].end;
+
+  const handleMove = (event: React.MouseEvent<HTMLDivElement>) => {
+    const rect = event.currentTarget.getBoundingClientRect();
+    const time = ((event.clientX - rect.left) / rect.width) * duration;
+    const found = cues.findIndex((candidate) => time < candidate.end);
+    setIndex(found < 0 ? cues.length - 1 : found);
+  };
+
+  return (
+    <div className={`relative overflow-hidden bg-black ${className ?? ''}`} onMouseMove={handleMove} onMouseLeave={() => setIndex(0)}>
+      <svg
+        viewBox={`${cue.x} ${cue.y} ${cue.width} ${cue.height}`}
+        preserveAspectRatio="xMidYMid slice"
+        className="w-full h-full"
+      >
+        <image href={cue.sprite} x={0} y={0} />
+      </svg>
+      <div className="absolute bottom-0 left-0 h-1 bg-indigo-500" style={{ width: `${(cue.end / duration) * 100}%` }} />
+    </div>
+  );
+};
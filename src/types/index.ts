@@ -52,11 +52,24 @@ export interface Reel {
   duration: number;
   status: 'generating' | 'completed' | 'failed';
   created_at: string;
+  renditions?: ReelRendition[];
+  hls_url?: string;
+  // WebVTT index of the keyframe sprite sheet; when unset ReelsList asks api.py /api/thumbnails?url=
+  thumbnails_vtt?: string;
+}
+
+export interface ReelRendition {
+  name: string;
+  width: number;
+  height: number;
+  url: string;
 }
 
 export interface ProcessingStatus {
   video_id: string;
-  stage: 'upload' | 'audio_extraction' | 'transcription' | 'analysis' | 'reel_generation' | 'completed';
+  stage: 'upload' | 'audio_extraction' | 'transcription' | 'analysis' | 'reel_generation' | 'completed' | 'failed' | 'cancelled';
   progress: number;
   message: string;
+  cancelled?: boolean;
+  finished?: boolean;
 }
\ No newline at end of file